@@ -7,6 +7,10 @@ import time
 from pathlib import Path
 from typing import Tuple, List
 import argparse
+from hex_image import require_valid_hex, inspect_hex
+from flash_telemetry import FlashTelemetry, LoopStatistics, START_TIMEOUT, STALL_TIMEOUT
+from client_logs import CLIENT_LOGS_DIR, ClientLogClaim
+from share_sync import sync_tree
 
 # ---- Console safety: avoid charmap/encoding crashes everywhere ----
 try:
@@ -46,6 +50,12 @@ def parse_args():
     ap = argparse.ArgumentParser()
     ap.add_argument("--old", type=str, help="Path to previous version folder")
     ap.add_argument("--new", type=str, help="Path to latest version folder")
+    ap.add_argument("--channel", type=str, default=CHANNEL, help="UdsClient_CL channel (default %(default)s)")
+    ap.add_argument("--logs-dir", type=str, help="Folder for flashing logs/telemetry (default C:\\temp3)")
+    ap.add_argument("--no-clean", action="store_true", help="Do not empty the logs folder before flashing")
+    ap.add_argument("--no-copy", action="store_true", help="Do not copy the logs to the external disk")
+    ap.add_argument("--loops", type=int, default=1, help="Number of flash rounds to run in this process")
+    ap.add_argument("--keep-going", action="store_true", help="Continue with the next round after a failure")
     return ap.parse_args()
 
 def find_two_version_dirs(root: Path) -> Tuple[Path, Path]:
@@ -81,6 +91,10 @@ def find_merged_files(version_dir: Path) -> Tuple[Path, Path]:
 
     app_hex = pick_latest_file(app_candidates)
     boot_hex = pick_latest_file(boot_candidates)
+
+    # Reject truncated/corrupt images now instead of minutes into a flash
+    require_valid_hex(app_hex)
+    require_valid_hex(boot_hex)
     return app_hex, boot_hex
 
 def list_xmls_in_target():
@@ -92,7 +106,9 @@ def list_xmls_in_target():
         for x in xmls:
             print("   -", x.name)
 
-def run_flash(exe: Path, channel: str, target: str, file_path: Path) -> None:
+def run_flash(exe: Path, channel: str, target: str, file_path: Path,
+              step: str = "", stall_timeout: float = STALL_TIMEOUT,
+              start_timeout: float = START_TIMEOUT) -> dict:
     def require_exists(path: Path, desc: str) -> None:
         if not path.exists():
             raise FileNotFoundError(f"{desc} not found: {path}")
@@ -117,18 +133,29 @@ def run_flash(exe: Path, channel: str, target: str, file_path: Path) -> None:
     env = os.environ.copy()
     env["PATH"] = str(TARGET_DIR) + os.pathsep + env.get("PATH", "")
 
-    process = subprocess.Popen(
-        cmd,
-        cwd=str(TARGET_DIR),
-        env=env,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.STDOUT,
-        text=True,
-        encoding="utf-8",
-        errors="replace",
-        bufsize=1,
-        universal_newlines=True,
-    )
+    # UdsClient_CL writes to C:\temp3 for every target; claim this run's log there
+    claim = ClientLogClaim(CLIENT_LOGS_DIR, LOGS_DIR)
+    with claim.starting():
+        process = subprocess.Popen(
+            cmd,
+            cwd=str(TARGET_DIR),
+            env=env,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+            bufsize=1,
+            universal_newlines=True,
+        )
+        claim.wait_for_log(process)
+
+    # Telemetry: timestamped % samples, throughput and stall watchdog
+    image_size = inspect_hex(file_path).get("size")
+    telemetry = FlashTelemetry(step or f"{target}_{file_path.stem}", target, file_path,
+                               image_size=image_size, stall_timeout=stall_timeout,
+                               start_timeout=start_timeout)
+    telemetry.watch(process)
 
     pct_re = re.compile(r"^\s*(\d{1,3})%\s*$")
     last_pct = None
@@ -167,6 +194,7 @@ def run_flash(exe: Path, channel: str, target: str, file_path: Path) -> None:
         m = pct_re.match(line)
         if m:
             pct = int(m.group(1))
+            telemetry.sample(pct)
             render_progress(pct)
             continue
 
@@ -190,14 +218,22 @@ def run_flash(exe: Path, channel: str, target: str, file_path: Path) -> None:
         # print(line)
 
     process.wait()
+    telemetry.finish(process.returncode)
+    claim.collect()
 
     # If we ended on a progress line, close it nicely
     if last_pct is not None:
         sys.stdout.write("\n")
         sys.stdout.flush()
 
+    telemetry.print_summary()
+    telemetry.write(LOGS_DIR)
+
+    if telemetry.stalled:
+        raise RuntimeError(f"Flash stalled: {telemetry.stall_message} ({target})")
     if process.returncode != 0:
         raise RuntimeError(f"Flash command failed with exit code {process.returncode}")
+    return telemetry.summary()
 
 def sleep_with_countdown(seconds: int, message: str):
     """Show live countdown in console while waiting."""
@@ -207,39 +243,46 @@ def sleep_with_countdown(seconds: int, message: str):
         time.sleep(1)
     print()  # newline after countdown
 
-def flash_one_round(old_app: Path, old_boot: Path, new_app: Path, new_boot: Path) -> None:
+def timed_step(stats: LoopStatistics, round_no: int, step: str, target: str, file_path: Path) -> None:
+    """run_flash() one step and record its duration/result in the loop statistics."""
+    step_start = time.time()
+    try:
+        summary = run_flash(EXE, CHANNEL, target, file_path, step=step)
+    except Exception as e:
+        if stats is not None:
+            stats.record_step(round_no, step, time.time() - step_start, ok=False, error=str(e))
+        raise
+    duration = time.time() - step_start
+    if stats is not None:
+        stats.record_step(round_no, step, duration, ok=True, summary=summary)
+    print(f"   -> Done in {int(duration)} sec")
+
+def flash_one_round(old_app: Path, old_boot: Path, new_app: Path, new_boot: Path,
+                    round_label: str = None, stats: LoopStatistics = None, round_no: int = 1) -> None:
     """Exactly one round: old FW -> old Boot -> new FW -> new Boot, with waits."""
-    round_label = os.environ.get("ROUND_INDEX") or "single run"
+    round_label = round_label or os.environ.get("ROUND_INDEX") or "single run"
     print(f"\n=== FLASH ROUND {round_label} ===")
 
     round_start = time.time()
 
     # # 1) old firmware
     print("\n[STEP 1] Flashing OLD firmware...")
-    step_start = time.time()
-    run_flash(EXE, CHANNEL, FIRMWARE_NewGen, old_app)
-    print(f"   -> Done in {int(time.time() - step_start)} sec")
+    timed_step(stats, round_no, "step1_old_fw", FIRMWARE_NewGen, old_app)
     sleep_with_countdown(60, "Waiting after old firmware")
 
     # 2) old boot
     print("\n[STEP 2] Flashing OLD bootloader...")
-    step_start = time.time()
-    run_flash(EXE, CHANNEL, BOOT_NG, old_boot)
-    print(f"   -> Done in {int(time.time() - step_start)} sec")
+    timed_step(stats, round_no, "step2_old_boot", BOOT_NG, old_boot)
     sleep_with_countdown(20, "Waiting after old boot")
 
     # # 3) new firmware
     print("\n[STEP 3] Flashing NEW firmware...")
-    step_start = time.time()
-    run_flash(EXE, CHANNEL, FIRMWARE_NewGen, new_app)
-    print(f"   -> Done in {int(time.time() - step_start)} sec")
+    timed_step(stats, round_no, "step3_new_fw", FIRMWARE_NewGen, new_app)
     sleep_with_countdown(60, "Waiting after new firmware")
 
     # 4) new boot
     print("\n[STEP 4] Flashing NEW bootloader...")
-    step_start = time.time()
-    run_flash(EXE, CHANNEL, BOOT_NG, new_boot)
-    print(f"   -> Done in {int(time.time() - step_start)} sec")
+    timed_step(stats, round_no, "step4_new_boot", BOOT_NG, new_boot)
     sleep_with_countdown(20, "Waiting after new boot")
 
     print(f"\n✅ Round completed in {int(time.time() - round_start)} sec\n")
@@ -267,7 +310,7 @@ def clear_temp3():
     print("   - Cleanup finished.")
 
 
-def copying_files(version_str: str):
+def copying_files(version_str: str, dest_subdir: str = ""):
 
     if not version_str:
         print("[copying_files] version_str is empty, nothing to copy.")
@@ -281,7 +324,7 @@ def copying_files(version_str: str):
     external_root = Path(r"Z:\V&V\UDS_Result")
     final_root = external_root / "NewGen" / ("0" + version_str)
     print(final_root)
-    dest_dir = final_root / "Flashing logs"
+    dest_dir = final_root / "Flashing logs" / dest_subdir
 
     # print(f"\n📁 Copying logs to external disk: {dest_dir}")
     # dest_dir.mkdir(parents=True, exist_ok=True)
@@ -294,25 +337,27 @@ def copying_files(version_str: str):
         print("  ❌ mkdir failed:", type(e).__name__, e)
         return
 
-    files_copied = 0
-    for entry in LOGS_DIR.iterdir():
-        if entry.is_file():
-            target = dest_dir / entry.name
-            shutil.copy2(entry, target)
-            print(f"  Copied {entry} -> {target}")
-            files_copied += 1
+    # Incremental: files already on the share (same size/mtime/hash) are skipped
+    result = sync_tree(LOGS_DIR, dest_dir, recursive=False)
 
-    if files_copied == 0:
+    if result["copied"] + result["skipped"] == 0:
         print("  (No files found to copy in Temp3)")
     else:
-        print(f"✅ Copy to external disk completed. {files_copied} file(s) copied.")
+        print(f"✅ Copy to external disk completed. {result['copied']} file(s) copied, "
+              f"{result['skipped']} unchanged, {result['failed']} failed.")
 
 
 
 def main() -> int:
-    clear_temp3()
+    global CHANNEL, LOGS_DIR
+    args = parse_args()
+    CHANNEL = args.channel
+    if args.logs_dir:
+        LOGS_DIR = Path(args.logs_dir)
+        LOGS_DIR.mkdir(parents=True, exist_ok=True)
+    if not args.no_clean:
+        clear_temp3()
     try:
-        args = parse_args()
 
         if args.old and args.new:
             old_dir = Path(args.old)
@@ -337,12 +382,31 @@ def main() -> int:
         print(f"  BOOT: {new_boot}")
         print(f"Version folder name for logs: {version_str}")
 
-        flash_one_round(old_app, old_boot, new_app, new_boot)
+        # Paths and hex metadata are resolved once and reused by every round
+        loops = max(1, args.loops)
+        stats = LoopStatistics("NewGen", loops)
+        failed = False
+        for round_no in range(1, loops + 1):
+            label = f"{round_no}/{loops}" if loops > 1 else None
+            try:
+                flash_one_round(old_app, old_boot, new_app, new_boot,
+                                round_label=label, stats=stats, round_no=round_no)
+                stats.record_round(True)
+            except Exception as e:
+                stats.record_round(False)
+                failed = True
+                print(f"\n[FAIL] Flash round {round_no}/{loops}: {e}", file=sys.stderr)
+                if not args.keep_going:
+                    break
+
+        stats.print_summary()
+        stats.write(LOGS_DIR)
 
         # 🔽 NEW: copy Temp3 logs to external disk
-        copying_files(version_str)
+        if not args.no_copy:
+            copying_files(version_str, LOGS_DIR.name if args.logs_dir else "")
 
-        return 0
+        return 1 if failed else 0
 
     except Exception as e:
         print(f"\nERROR: {e}", file=sys.stderr)
@@ -0,0 +1,347 @@
+# can_trace.py
+"""
+CAN trace ring buffer, dumped to BLF/ASC only around failing requests.
+
+A "Mismatch Tx and Rx" or "No response from ECU" only leaves UdsClient_CL's
+text log behind: no flow control frames, no timing, no cyclic traffic. CanTrace
+listens on the bench channel next to UdsClient_CL (the PCAN driver lets several
+applications share a channel and passes each one the others' frames) and keeps
+the last TRACE_SECONDS of frames in preallocated arrays:
+
+    timestamps  array('d')       ids  array('I')       flags / dlc  array('B')
+    data        bytearray(capacity * 8)
+
+The listener copies the fields of each frame into the next slot and drops the
+python-can Message; nothing is allocated or kept per frame, and old frames are
+overwritten in place. Nothing is written to disk unless a request fails.
+
+When the analysis records a FAIL / NRC / NO_RESPONSE, the failing request is
+located in the trace among the ISO-TP single/first frames on the request ID
+that carry its DID, inside the script section's time span. A table script
+sends the same DID ~60 times, so the engine passes how many of those requests
+came after the failing one (engine.requests_after), counted back from the
+newest frame; without it (stored results) the last one is used. The frames from
+PRE_S before to POST_S after it are written as one file in the profile's
+Logs/Traces (overlapping windows of one section are merged). If the request
+is not in the trace (unknown DID, other ID), the whole section span is dumped.
+
+    upp.py --follow --trace PCAN_USBBUS1                      # live parser, one dump per failing section
+    python -m Project.Common.can_trace --channel PCAN_USBBUS1 --out bench.blf   # capture, dump on Enter
+    python -m Project.Common.can_trace --bench 200000         # listener cost per frame
+
+The UPP runner passes --trace to the live parser; the NewGen runner keeps the
+trace itself and dumps after its parser run. UDS_CAN_TRACE=0 turns it off.
+"""
+import argparse
+import sqlite3
+import sys
+import time
+from array import array
+from contextlib import closing
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from Project.Common.profiles import PROFILES, Profile
+from Project.Common.results_store import DB_PATH, STATUS_FAIL, STATUS_NO_RESPONSE, STATUS_NRC, connect
+
+try:
+    import can
+except ImportError:  # the runners still work, just without a trace
+    can = None
+
+# =========================
+# ======  CONFIG  =========
+# =========================
+
+CAN_INTERFACE = "pcan"
+BITRATE = 500000
+
+# History kept in memory, sized for this bus load (frames/s)
+TRACE_SECONDS = 300
+BUS_FRAMES_PER_S = 2000
+
+# Dump window around the failing request (s)
+PRE_S = 5.0
+POST_S = 2.0
+
+# Tail dumped when a batch is aborted (fail-fast, timeout)
+ABORT_TAIL_S = 30.0
+
+# Dumps per trace, so a dead ECU does not fill the disk
+MAX_DUMPS = 20
+
+# .blf (CANalyzer / CANoe) or .asc
+TRACE_FORMAT = ".blf"
+TRACE_DIR_NAME = "Traces"
+
+FAILED_STATUSES = (STATUS_FAIL, STATUS_NRC, STATUS_NO_RESPONSE)
+
+DATA_BYTES = 8                      # classic CAN
+
+FLAG_EXTENDED = 0x01
+FLAG_ERROR = 0x02
+FLAG_REMOTE = 0x04
+FLAG_TX = 0x08
+
+
+def pcan_channel(client_channel: str) -> str:
+    """UdsClient_CL channel ("51" = PCAN handle 0x51) -> python-can channel name ("PCAN_USBBUS1")."""
+    return f"PCAN_USBBUS{int(client_channel, 16) - 0x50}"
+
+
+# =========================
+# ======  RING  ===========
+# =========================
+
+class TraceRing(can.Listener if can is not None else object):
+    """Fixed-size frame history; on_message_received runs on the notifier thread."""
+
+    def __init__(self, capacity: int = TRACE_SECONDS * BUS_FRAMES_PER_S, channel: Optional[str] = None):
+        self.capacity = capacity
+        self.channel = channel
+        self._ts = array("d", bytes(8 * capacity))
+        self._ids = array("I", bytes(4 * capacity))
+        self._flags = array("B", bytes(capacity))
+        self._dlc = array("B", bytes(capacity))
+        self._data = bytearray(DATA_BYTES * capacity)
+        self._next = 0
+        self.received = 0           # frames seen since start, including overwritten ones
+        # Frame timestamps stay in the interface's clock (kept as-is in the dump);
+        # wall time = frame timestamp + offset, taken at the first frame
+        self.clock_offset = 0.0
+
+    def on_message_received(self, msg) -> None:
+        i = self._next
+        data = msg.data
+        n = len(data) if len(data) <= DATA_BYTES else DATA_BYTES
+        if not self.received:
+            self.clock_offset = time.time() - msg.timestamp
+        self._ts[i] = msg.timestamp
+        self._ids[i] = msg.arbitration_id
+        self._flags[i] = (msg.is_extended_id | msg.is_error_frame << 1 | msg.is_remote_frame << 2
+                          | (not msg.is_rx) << 3)
+        self._dlc[i] = n
+        o = i * DATA_BYTES
+        self._data[o:o + n] = data if n == len(data) else data[:n]
+        self._next = i + 1 if i + 1 < self.capacity else 0
+        self.received += 1
+
+    def __call__(self, msg) -> None:
+        self.on_message_received(msg)
+
+    def stop(self) -> None:
+        pass
+
+    def _order(self) -> np.ndarray:
+        """Slot indices of the stored frames, oldest first."""
+        if self.received < self.capacity:
+            return np.arange(self.received)
+        return np.roll(np.arange(self.capacity), -self._next)
+
+    def span(self) -> Tuple[float, float]:
+        """(oldest, newest) wall time held; (0, 0) when empty."""
+        if not self.received:
+            return 0.0, 0.0
+        newest = self._ts[self._next - 1]
+        oldest = self._ts[self._next if self.received >= self.capacity else 0]
+        return oldest + self.clock_offset, newest + self.clock_offset
+
+    def find_request(self, request_id: int, did: bytes, start: float, end: float,
+                     back: Optional[int] = None) -> Optional[float]:
+        """
+        Wall time of the single/first frame on `request_id` carrying `did`
+        within [start, end] (wall times) that has `back` such frames after it
+        (None: the last one). None if the ring no longer holds it.
+        """
+        order = self._order()
+        if not len(order):
+            return None
+        ts = np.frombuffer(self._ts, dtype=np.float64)[order] + self.clock_offset
+        ids = np.frombuffer(self._ids, dtype=np.uint32)[order]
+        data = np.frombuffer(self._data, dtype=np.uint8).reshape(-1, DATA_BYTES)[order]
+        pci = data[:, 0] >> 4
+        single = (pci == 0) & (data[:, 2] == did[0]) & (data[:, 3] == did[1])
+        first = (pci == 1) & (data[:, 3] == did[0]) & (data[:, 4] == did[1])
+        hits = np.flatnonzero((ids == request_id) & (ts >= start) & (ts <= end) & (single | first))
+        back = back or 0
+        return float(ts[hits[-1 - back]]) if back < len(hits) else None
+
+    def messages(self, start: float, end: float) -> List:
+        """The stored frames within [start, end] (wall times) as python-can Messages, only built for a dump."""
+        order = self._order()
+        ts = np.frombuffer(self._ts, dtype=np.float64)[order] + self.clock_offset
+        out = []
+        for i in order[(ts >= start) & (ts <= end)]:
+            flags = self._flags[i]
+            o = i * DATA_BYTES
+            out.append(can.Message(timestamp=self._ts[i], arbitration_id=self._ids[i],
+                                   is_extended_id=bool(flags & FLAG_EXTENDED), is_error_frame=bool(flags & FLAG_ERROR),
+                                   is_remote_frame=bool(flags & FLAG_REMOTE), is_rx=not flags & FLAG_TX,
+                                   dlc=self._dlc[i], data=bytes(self._data[o:o + self._dlc[i]]),
+                                   channel=self.channel))
+        return out
+
+
+# =========================
+# ======  CAPTURE  ========
+# =========================
+
+class CanTrace:
+    """A TraceRing fed from one bus, with the dump policy of the runners."""
+
+    def __init__(self, bus, profile: Profile, out_dir: Optional[Path] = None, channel: Optional[str] = None):
+        self.bus = bus
+        self.request_id = profile.can_ids[0]
+        self.out_dir = Path(out_dir or Path(profile.logs_folder) / TRACE_DIR_NAME)
+        self.ring = TraceRing(channel=channel)
+        self.notifier = can.Notifier(bus, [self.ring])
+        self.opened = time.time()
+        self.dumps: List[Path] = []
+
+    @classmethod
+    def open(cls, channel: str, profile: Profile, interface: str = CAN_INTERFACE,
+             bitrate: int = BITRATE) -> Optional["CanTrace"]:
+        """Start capturing on `channel`; None (with a warning) when the bus cannot be opened."""
+        if can is None:
+            print("[WARN] CAN trace disabled: python-can is not installed")
+            return None
+        try:
+            bus = can.Bus(interface=interface, channel=channel, bitrate=bitrate)
+        except (can.CanError, OSError, ValueError, ImportError) as e:
+            print(f"[WARN] CAN trace disabled: could not open {interface} {channel}: {e}")
+            return None
+        print(f"[INFO] CAN trace on {channel}: last {TRACE_SECONDS}s kept, dumped to {TRACE_FORMAT} on failures")
+        return cls(bus, profile, channel=channel)
+
+    def close(self) -> None:
+        self.notifier.stop()
+        self.bus.shutdown()
+        print(f"[INFO] CAN trace: {self.ring.received} frame(s) seen, {len(self.dumps)} dump(s)")
+
+    def dump_window(self, start: float, end: float, name: str) -> Optional[Path]:
+        if len(self.dumps) >= MAX_DUMPS:
+            return None
+        messages = self.ring.messages(start, end)
+        if not messages:
+            print(f"[WARN] CAN trace: no frames left for {name} (older than the last {TRACE_SECONDS}s?)")
+            return None
+        stamp = datetime.fromtimestamp(start).strftime("%Y%m%d_%H%M%S")
+        path = write_trace(self.out_dir / f"{name}_{stamp}{TRACE_FORMAT}", messages)
+        self.dumps.append(path)
+        print(f"[INFO] CAN trace: {len(messages)} frame(s) around {name} -> {path}")
+        if len(self.dumps) == MAX_DUMPS:
+            print(f"[WARN] CAN trace: {MAX_DUMPS} dumps written, no more for this run")
+        return path
+
+    def dump_failures(self, failures: Iterable[Tuple[str, str, str, Optional[int]]], start: float,
+                      end: float) -> List[Path]:
+        """
+        failures: (script, DID, status, requests with that DID after it or None)
+        of one script section (or run) that ran between `start` and `end`.
+        One file per merged window.
+        """
+        windows: List[List] = []        # [start, end, name]
+        for script, did, status, back in failures:
+            if status not in FAILED_STATUSES:
+                continue
+            try:
+                did_bytes = bytes.fromhex(did)
+            except (TypeError, ValueError):
+                did_bytes = b""
+            at = self.ring.find_request(self.request_id, did_bytes, start - 1, end, back) \
+                if len(did_bytes) == 2 else None
+            window = [at - PRE_S, at + POST_S] if at is not None else [start, end]
+            windows.append(window + [f"{script}_{did}_{status}"])
+        windows.sort()
+        merged: List[List] = []
+        for w in windows:
+            if merged and w[0] <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], w[1])
+            else:
+                merged.append(w)
+        return [p for p in (self.dump_window(*w) for w in merged) if p]
+
+    def dump_tail(self, name: str, seconds: float = ABORT_TAIL_S) -> Optional[Path]:
+        _, newest = self.ring.span()
+        return self.dump_window(newest - seconds, newest, name)
+
+
+def write_trace(path: Path, messages: List) -> Path:
+    """Write `messages` with python-can's logger for the suffix (.blf, .asc)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with can.Logger(str(path)) as writer:
+        for msg in messages:
+            writer.on_message_received(msg)
+    return path
+
+
+def stored_failures(device: str, since: float, db_path: Path = DB_PATH) -> List[Tuple[str, str, str, None]]:
+    """(script, DID, status, None) of the failed records of `device` runs parsed since `since` (epoch s)."""
+    if not Path(db_path).is_file():
+        return []
+    started = datetime.fromtimestamp(since).isoformat(timespec="seconds")
+    try:
+        with closing(connect(db_path)) as conn:
+            rows = conn.execute(
+                "SELECT x.script, x.did, x.status FROM records x JOIN runs r ON r.id = x.run_id "
+                "WHERE r.device = ? AND r.started >= ? AND x.status IN (?, ?, ?) ORDER BY x.id",
+                (device, started) + FAILED_STATUSES).fetchall()
+    except sqlite3.Error as e:
+        print(f"[WARN] Could not read failures from {db_path}: {e}")
+        return []
+    # The store keeps no request position: each dump goes to the last request of its DID
+    return [tuple(r) + (None,) for r in rows]
+
+
+# =========================
+# ========= CLI ===========
+# =========================
+
+def _bench(frames: int) -> None:
+    ring = TraceRing(capacity=min(frames, TRACE_SECONDS * BUS_FRAMES_PER_S))
+    msgs = [can.Message(arbitration_id=0x7D8, data=bytes([0x21 + i % 15] * 8), timestamp=i * 1e-4)
+            for i in range(1000)]
+    start = time.perf_counter()
+    for i in range(frames):
+        ring.on_message_received(msgs[i % 1000])
+    per_frame = (time.perf_counter() - start) / frames
+    print(f"[INFO] {per_frame * 1e6:.2f} us per frame, {per_frame * BUS_FRAMES_PER_S * 100:.2f}% of one core "
+          f"at {BUS_FRAMES_PER_S} frames/s, {ring.capacity} slots = "
+          f"{ring.capacity * (8 + 4 + 1 + 1 + DATA_BYTES) / 1e6:.1f} MB")
+
+
+def _main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="CAN trace ring buffer, dumped around failures")
+    ap.add_argument("--project", default="UPP", choices=sorted(PROFILES))
+    ap.add_argument("--channel", default="PCAN_USBBUS1")
+    ap.add_argument("--interface", default=CAN_INTERFACE)
+    ap.add_argument("--out", type=Path, help="capture until Enter, then write the kept frames here (.blf/.asc)")
+    ap.add_argument("--bench", type=int, metavar="N", help="feed N frames to the listener and report its cost")
+    args = ap.parse_args(argv)
+
+    if can is None:
+        print("[ERROR] python-can is not installed")
+        return 1
+    if args.bench:
+        _bench(args.bench)
+        return 0
+    trace = CanTrace.open(args.channel, PROFILES[args.project], interface=args.interface)
+    if trace is None:
+        return 1
+    try:
+        input("[INFO] Capturing, press Enter to dump ...")
+    except (KeyboardInterrupt, EOFError):
+        pass
+    trace.close()
+    if args.out:
+        messages = trace.ring.messages(*trace.ring.span())
+        write_trace(args.out, messages)
+        print(f"[INFO] {len(messages)} frame(s) -> {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(_main())
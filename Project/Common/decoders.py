@@ -0,0 +1,126 @@
+# decoders.py
+"""
+Typed decoding of DID data for the reports.
+
+engine.convert() guessed the type from how many non-zero bytes were left after
+dropping every 0x00, so 0x01 0x00 read as 1 and a scaled field came out raw.
+Each project now describes its records in Condition/id_decoders.py:
+
+    DID_DECODERS   = {"F195": ("ascii", 1, ""), "23F9": ("u16", 1, "")}
+    FIELD_DECODERS = {"078F": {0: ("u16", 10, "ms"), 2: ("u8", 1, "degC"), ...}}
+
+DID_DECODERS decode the whole record. FIELD_DECODERS describe the packed
+configuration records (078F, F1D2, F1D3, ...) field by field, keyed by the
+field's first data byte. Specs are (type, scale, unit); the engineering value
+is raw * scale.
+
+Specs are compiled once into Decoder objects with a precompiled struct /
+int.from_bytes reader. Every byte a field covers maps to its Decoder, so the
+record's first non-zero byte (the position the condition tables use) finds the
+field in one dict lookup. DIDs or positions without a spec fall back to
+frame.convert_bytes, i.e. the old behaviour.
+"""
+import struct
+from typing import Dict, Optional, Tuple
+
+from Project.Common.frame import convert_bytes, raw_hex
+
+# Fixed-size big-endian integers
+STRUCT_FORMATS = {"u8": ">B", "s8": ">b", "u16": ">H", "s16": ">h", "u32": ">I", "s32": ">i"}
+# Types that run to the end of the record
+TAIL_TYPES = ("ascii", "hex", "uint")
+
+
+class Decoder:
+    __slots__ = ("kind", "offset", "scale", "unit", "width", "_read")
+
+    def __init__(self, kind: str, scale=1, unit: str = "", offset: int = 0):
+        self.kind = kind
+        self.offset = offset
+        self.scale = scale
+        self.unit = unit
+        if kind in STRUCT_FORMATS:
+            unpack_from = struct.Struct(STRUCT_FORMATS[kind]).unpack_from
+            self.width = struct.calcsize(STRUCT_FORMATS[kind])
+            self._read = lambda data: unpack_from(data, offset)[0]
+        elif kind in ("u24", "s24"):
+            signed = kind == "s24"
+            self.width = 3
+            self._read = lambda data: int.from_bytes(data[offset:offset + 3], "big", signed=signed)
+        elif kind == "uint":
+            self.width = None
+            self._read = lambda data: int.from_bytes(data[offset:], "big")
+        elif kind in TAIL_TYPES:
+            self.width = None
+            self._read = None
+        else:
+            raise ValueError(f"Unknown decoder type {kind!r}")
+
+    def __repr__(self):
+        return f"Decoder({self.kind!r}, offset={self.offset}, scale={self.scale}, unit={self.unit!r})"
+
+    def value(self, data):
+        """Engineering value (int/float, or str for ascii/hex) of this field in `data` (bytes after the DID)."""
+        if self._read is None:
+            tail = bytes(data[self.offset:])
+            if self.kind == "hex":
+                return raw_hex(tail)
+            text = tail.rstrip(b"\x00 ")
+            if not all(32 <= b <= 126 for b in text):
+                raise ValueError("not printable")
+            return text.decode("ascii")
+        raw = self._read(data)
+        return raw if self.scale == 1 else raw * self.scale
+
+    def decode(self, data) -> str:
+        """Report text: '1000 ms', '-20 degC', '03.02.02'."""
+        value = self.value(data)
+        if isinstance(value, float):
+            value = int(value) if value.is_integer() else f"{value:.6g}"
+        return f"{value} {self.unit}" if self.unit else str(value)
+
+
+class DecoderTable:
+    """All decoders of one project, keyed (DID, position) for packed records and DID for whole records."""
+
+    def __init__(self, did_specs: Dict[str, Tuple] = None, field_specs: Dict[str, Dict[int, Tuple]] = None):
+        self._table: Dict[object, Decoder] = {}
+        for did, spec in (did_specs or {}).items():
+            self._table[did] = Decoder(*spec)
+        for did, fields in (field_specs or {}).items():
+            for offset, spec in fields.items():
+                decoder = Decoder(*spec, offset=offset)
+                for position in range(offset, offset + (decoder.width or 1)):
+                    self._table[(did, position)] = decoder
+
+    def __len__(self):
+        return len(self._table)
+
+    def width(self, did: str) -> Optional[int]:
+        """Data length of a whole-record DID with a fixed-size type, None if it varies or is unknown."""
+        decoder = self._table.get(did)
+        return decoder.width if decoder is not None else None
+
+    def lookup(self, did: str, position: int = 0) -> Optional[Decoder]:
+        return self._table.get((did, position)) or self._table.get(did)
+
+    def decode(self, did: str, position: int, data) -> str:
+        """
+        Engineering value of `data` (bytes after the DID) for `did`; `position`
+        is the first non-zero data byte, which selects the field in packed records.
+        """
+        decoder = self._table.get((did, position)) or self._table.get(did)
+        if decoder is None:
+            return convert_bytes(data)
+        try:
+            return decoder.decode(data)
+        except (struct.error, ValueError):
+            # Shorter record than the spec or non-text identifier: old guess
+            return convert_bytes(data)
+
+
+def load_table(module) -> DecoderTable:
+    """DecoderTable from a Condition/id_decoders module (None = empty table)."""
+    if module is None:
+        return DecoderTable()
+    return DecoderTable(getattr(module, "DID_DECODERS", {}), getattr(module, "FIELD_DECODERS", {}))
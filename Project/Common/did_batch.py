@@ -0,0 +1,250 @@
+# did_batch.py
+"""
+Multi-DID ReadDataByIdentifier (0x22) batching for the identifier scripts.
+
+Standard_Identifiers / Generetic_ECU_Read read one DID per request, with
+comments and often a `sleep` in between. ISO 14229 lets one 0x22 carry several
+DIDs; the positive response is the DID/data pairs back to back:
+
+    Tx) Read Data By Identifier : 0xF1 0x95 0xF1 0xB0
+    Rx) Read Data By Identifier : 0xF1 0x95 0x30 0x33 ... 0xF1 0xB0 0x00 0x12 0x34
+
+The response carries no lengths, so a batch only holds DIDs whose data length
+is known: from the last stored read of that DID (results store, raw column)
+or a fixed-size type in Condition/id_decoders.py. A batch is closed before the
+response (0x62 + DID/data pairs) would exceed the profile's response_buffer.
+DIDs of unknown length keep their own request; the next run batches them.
+
+Runs of single-DID reads separated only by comments, blank lines and sleeps
+become batches; the sleeps inside a run go, a sleep after its last read stays.
+Anything else (2E, session, security, reset) ends a run.
+
+The engine splits a multi-DID Tx/Rx pair back into one frame per DID
+(split_request / split_response), so matching, records and reports stay per
+DID. A DID the ECU leaves out of the response simply has no Rx.
+
+    python -m Project.Common.did_batch --project UPP            # plan
+    python -m Project.Common.did_batch --project UPP --write    # batched_variants/UPP/Scripts/*.script
+
+The runners use the batched variants with UDS_BATCH_READS=1.
+"""
+import argparse
+import sqlite3
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from Project.Common.profiles import IDENTIFIER_SCRIPTS, PROFILES, REPO_ROOT, Profile
+from Project.Common.results_store import DB_PATH, STATUS_PASS, STATUS_READ
+from Project.Common.script_lint import parse_script
+
+# =========================
+# ======  CONFIG  =========
+# =========================
+
+VARIANTS_ROOT = REPO_ROOT / "batched_variants"
+
+# DIDs per request, on top of the response buffer limit
+MAX_DIDS = 8
+
+
+# =========================
+# ======  LENGTHS  ========
+# =========================
+
+def known_lengths(profile: Profile, db_path: Path = DB_PATH) -> Dict[str, int]:
+    """DID -> data length: the last stored READ/PASS of the DID, else a fixed-size decoder type."""
+    decoders = profile.decoders()
+    lengths = {did: decoders.width(did) for did in profile.generic_conditions()}
+    lengths = {did: n for did, n in lengths.items() if n}
+    if not Path(db_path).is_file():
+        return lengths
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        rows = conn.execute(
+            "SELECT r.did, r.raw FROM records r JOIN runs u ON u.id = r.run_id "
+            "WHERE u.device = ? AND r.status IN (?, ?) AND r.raw != '' ORDER BY r.run_id",
+            (profile.device, STATUS_READ, STATUS_PASS)).fetchall()
+    except sqlite3.Error:
+        return lengths
+    finally:
+        conn.close()
+    for did, raw in rows:
+        if did:
+            lengths[did] = len(raw.split())
+    return lengths
+
+
+# =========================
+# ======  PARSING  ========
+# =========================
+
+def split_request(payload: bytes) -> List[bytes]:
+    """DIDs of a 0x22 request payload (2 bytes each)."""
+    return [payload[i:i + 2] for i in range(0, len(payload) - 1, 2)]
+
+
+def split_response(dids: Sequence[bytes], payload: bytes, lengths: Dict[str, int]) -> Optional[List[bytes]]:
+    """
+    Multi-DID response payload -> one DID+data payload per DID present, in
+    order. The known length of a DID is used when the next DID follows it;
+    otherwise the data runs to the next requested DID found. None if the
+    payload does not start with a requested DID.
+    """
+    parts = []
+    remaining = list(dids)
+    pos = 0
+    while pos < len(payload) and remaining:
+        head = payload[pos:pos + 2]
+        if head not in remaining:
+            return None
+        remaining = remaining[remaining.index(head) + 1:]
+        start = pos + 2
+        n = lengths.get(head.hex().upper())
+        if not remaining:
+            end = len(payload)
+        elif n is not None and (start + n == len(payload) or payload[start + n:start + n + 2] in remaining):
+            end = start + n
+        else:
+            found = [i for i in (payload.find(d, start) for d in remaining) if i >= 0]
+            end = min(found) if found else len(payload)
+        parts.append(payload[pos:end])
+        pos = end
+    return parts
+
+
+# =========================
+# ======  BATCHING  =======
+# =========================
+
+def _read_did(command) -> Optional[str]:
+    data = command.data
+    if command.cmd == "send" and data and data[0] == 0x22 and len(data) == 3:
+        return f"{data[1]:02X}{data[2]:02X}"
+    return None
+
+
+def pack(dids: List[str], lengths: Dict[str, int], limit: int, max_dids: int = MAX_DIDS) -> List[List[str]]:
+    """Consecutive DIDs -> requests; unknown lengths alone, others up to `limit` response bytes."""
+    batches: List[List[str]] = []
+    current: List[str] = []
+    size = 1                                    # 0x62
+    for did in dids:
+        n = lengths.get(did)
+        if n is None:
+            if current:
+                batches.append(current)
+            batches.append([did])
+            current, size = [], 1
+            continue
+        if current and (size + 2 + n > limit or len(current) >= max_dids):
+            batches.append(current)
+            current, size = [], 1
+        current.append(did)
+        size += 2 + n
+    if current:
+        batches.append(current)
+    return batches
+
+
+def batch_script(script: Path, lengths: Dict[str, int], limit: int) -> Tuple[str, int, int]:
+    """(batched script text, single-DID reads before, 0x22 requests after)."""
+    lines = script.read_text(encoding="utf-8", errors="replace").splitlines()
+    commands = {c.line_no: c for c in parse_script(script)}
+    out: List[str] = []
+    run: List[str] = []                         # DIDs of the current run
+    notes: Dict[str, List[str]] = {}            # DID -> comment lines above its read
+    pending: List[str] = []                     # comment / blank lines since the last command
+    tail: List[str] = []                        # sleeps after the run's last read
+    before = after = 0
+
+    def close_run():
+        nonlocal after
+        for batch in pack(run, lengths, limit):
+            out.extend(notes[batch[0]] if len(batch) == 1 else [f"#Read {' '.join(batch)}"])
+            out.append(f"send 22 {' '.join(batch)}")
+            after += 1
+        out.extend(tail)
+        run.clear()
+        notes.clear()
+        tail.clear()
+
+    for line_no, line in enumerate(lines, start=1):
+        c = commands.get(line_no)
+        if c is None:                           # comment / blank
+            if run:
+                pending.append(line)
+            else:
+                out.append(line)
+            continue
+        did = _read_did(c)
+        if did:
+            before += 1
+            if run:
+                notes[did] = [p for p in pending if p.strip()]
+            else:
+                # Comments above the first read stay where they are
+                notes[did] = []
+            run.append(did)
+            pending.clear()
+            tail.clear()
+        elif c.cmd == "sleep" and run:
+            tail.append(line)
+        else:
+            if run:
+                close_run()
+            # Comments after the run head this command
+            out.extend(pending)
+            pending.clear()
+            out.append(line)
+    if run:
+        close_run()
+    out.extend(pending)
+    return "\n".join(out) + "\n", before, after
+
+
+def variant_path(script: Path, project: str) -> Path:
+    return VARIANTS_ROOT / project / "Scripts" / script.name
+
+
+def write_variants(scripts: List[Path], profile: Profile, db_path: Path = DB_PATH) -> Dict[Path, Path]:
+    """Batched variant of every identifier script in `scripts`; returns original -> variant."""
+    lengths = known_lengths(profile, db_path)
+    variants = {}
+    for script in scripts:
+        if script.stem not in IDENTIFIER_SCRIPTS:
+            continue
+        text, before, after = batch_script(script, lengths, profile.response_buffer)
+        path = variant_path(script, profile.name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding="utf-8")
+        variants[script] = path
+        print(f"[INFO] {script.stem}: {before} single-DID read(s) -> {after} request(s)")
+    return variants
+
+
+# =========================
+# ========= CLI ===========
+# =========================
+
+def _main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Batch single-DID 0x22 reads of the identifier scripts")
+    ap.add_argument("--project", default="UPP", choices=sorted(PROFILES))
+    ap.add_argument("--write", action="store_true", help="write batched_variants/<project>/Scripts/*.script")
+    args = ap.parse_args(argv)
+
+    profile = PROFILES[args.project]
+    scripts = [p for p in profile.script_paths() if p.stem in IDENTIFIER_SCRIPTS and p.is_file()]
+    if args.write:
+        write_variants(scripts, profile)
+        return 0
+    lengths = known_lengths(profile)
+    for script in scripts:
+        _, before, after = batch_script(script, lengths, profile.response_buffer)
+        print(f"[INFO] {script.stem}: {before} single-DID read(s) -> {after} request(s), "
+              f"{len(lengths)} DID length(s) known")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(_main())
@@ -0,0 +1,714 @@
+# engine.py
+"""
+Shared UdsClient_CL log parser for all projects.
+
+Splitting a *.uds.txt into script sections, Tx/Rx matching, condition lookup,
+NRC / timeout reporting, per-script log files and the hand-over to the
+project's compliance matrix used to live twice, in Project/UPP/upp.py and
+Project/NewGen/ng.py. They now live here once; everything project specific
+comes from a Profile (profiles.py).
+
+    python -m Project.Common.engine --project UPP [--follow] [--logs-dir C:\\temp3]
+    python -m Project.Common.engine --project UPP --bundle run.udsb
+
+upp.py and ng.py are thin entry points around ProjectEngine(profile).
+"""
+import argparse
+import glob
+import logging
+import os
+import re
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import List, Optional
+
+from Project.Common.can_trace import CanTrace
+from Project.Common.did_batch import known_lengths, split_request, split_response
+from Project.Common.frame import UdsFrame, first_nonzero, nonzero, raw_hex
+from Project.Common.live_tail import wait_for_new_log, tail_lines, stop_on_stdin_eof
+from Project.Common.logger import setup_logger
+from Project.Common.profiles import PROFILES, Profile, get_profile
+from Project.Common.results_store import (ResultsRecorder, STATUS_PASS, STATUS_FAIL, STATUS_READ,
+                                          STATUS_NRC, STATUS_NO_RESPONSE)
+from Project.Common.version_diff import write_diff_against_previous
+from result_bundle import BundleError, iter_members
+
+DEFAULT_LOGS_DIR = r"C:\temp3"
+
+SCRIPT_START_RE = re.compile(r">>>\s*Script Start")
+SCRIPT_END_RE = re.compile(r"<<< Script End")
+NO_RESPONSE_RE = re.compile(r"\d{2}/\d{2}/\d{4}\s+\d{2}:\d{2}:\d{2}\s+ERROR:.*No response from ECU", re.IGNORECASE)
+READ_DID_SERVICE = "Read Data By Identifier"
+
+
+# =========================
+# ======  LOG LINES  ======
+# =========================
+# The "0xNN"-list helpers below are kept for old callers; the engine itself
+# works on UdsFrame (frame.py), decoded once per line.
+
+def extract_script_name(line):
+    match = re.search(r">>> Script Start:(.*\\Scripts\\([^\\]+)\.script)", line)
+    if match:
+        return match.group(2)
+    return None
+
+
+def extract_values_from_line(line):
+    try:
+        _, data_part = line.split(":", 1)
+    except ValueError:
+        return []
+    return re.findall(r'0x[0-9A-Fa-f]{2}', data_part)
+
+
+def normalize_values(values):
+    return [x for x in values if x != "0x00"]
+
+
+def convert(values):
+    try:
+        hex_str = " ".join(values).replace("0x00", "").strip()
+        if not hex_str:
+            return "0"
+        values = hex_str.split()
+        data = [int(x, 16) for x in values]
+        if len(values) > 3:
+            result = "".join(chr(x) for x in data)
+            if all(32 <= ord(c) <= 126 for c in result):
+                return result
+            return " ".join(str(x) for x in data)
+        else:  # 1-3 bytes
+            combined_hex = "".join(x[2:] for x in values)
+            unsigned_int = int(combined_hex, 16)
+            if len(values) == 1:
+                return str(unsigned_int)
+            elif len(values) == 2:
+                if unsigned_int >= 0x8000:
+                    unsigned_int -= 0x10000
+                return str(unsigned_int)
+            elif len(values) == 3:  # 24-bit signed
+                if unsigned_int >= 0x800000:
+                    unsigned_int -= 0x1000000
+                return str(unsigned_int)
+    except ValueError:
+        return "wrong output"
+
+
+def get_tx_position(tx_values):
+    for i, value in enumerate(tx_values[2:], start=0):
+        if value != "0x00":
+            return i
+    return -1
+
+
+def fix_routine_control_lines(current_lines):
+    """Re-stamp Routine_Control lines and cap long payloads at 27 bytes.
+    Returns the rebuilt (tx_lines, rx_lines, all_lines)."""
+    fixed_lines = []
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    for line in current_lines:
+        if re.search(r">>> Script Start", line):
+            match = re.search(r">>> Script Start:(.*\\Scripts\\([^\\]+)\.script)", line)
+            fixed_lines.append(f"{timestamp} >>> Script Start:{match.group(1)}")
+            continue
+        if re.search(r"<<< Script End", line, re.IGNORECASE):
+            fixed_lines.append(f"{timestamp} <<< Script End")
+            continue
+        values = extract_values_from_line(line)
+        if (line.startswith("Tx)") and "Routine Control" in line and
+                len(values) >= 3 and values[:3] == ["0x01", "0x02", "0x01"]):
+            # Extract payload after the first 3 values, limit to 25 more (total 27)
+            payload_values = values[3:] if len(values) > 3 else []
+            if len(payload_values) >= 25:  # 2 prefix + 25 payload = 27 total
+                payload_values = payload_values[:25]  # Truncate to 25
+            payload = " ".join(payload_values) if payload_values else ""
+            fixed_tx = f"{timestamp} Tx) Routine Control               : 0x02 0x01 {payload}"
+            fixed_lines.append(fixed_tx)
+            continue
+        if values and len(values) > 27:
+            truncated_values = " ".join(values[:27])
+            fixed_line = f"{timestamp} {line.split(':', 1)[0]}: {truncated_values}"
+            fixed_lines.append(fixed_line)
+        else:
+            fixed_lines.append(f"{timestamp} {line}")
+    # Reprocess fixed lines to update tx_lines, rx_lines, all_lines
+    tx_lines, rx_lines, all_lines = [], [], []
+    for fixed_line in fixed_lines:
+        if fixed_line.startswith(f"{timestamp} Tx)"):
+            frame = UdsFrame.from_line(fixed_line)
+            tx_lines.append(frame)
+            all_lines.append((frame, "Tx"))
+        elif fixed_line.startswith(f"{timestamp} Rx)"):
+            frame = UdsFrame.from_line(fixed_line)
+            rx_lines.append(frame)
+            all_lines.append((frame, "Rx"))
+        else:
+            all_lines.append((fixed_line, "Other"))
+    return tx_lines, rx_lines, all_lines
+
+
+def requests_after(tx_lines, frame):
+    """
+    How many later requests of the section carry the DID of Tx `frame` (0 = it
+    is the last one), so the CAN trace can find that very request among the
+    ~60 writes of a table script. None for Rx frames and for the DIDs after the
+    first of a multi-DID read (they have no request of their own on the bus).
+    """
+    if frame is None or frame.direction != "Tx":
+        return None
+    idx = next((i for i, t in enumerate(tx_lines) if t is frame), None)
+    if idx is None or (idx and tx_lines[idx - 1].line is frame.line):
+        return None
+    return sum(1 for i in range(idx + 1, len(tx_lines))
+               if tx_lines[i].did_hex == frame.did_hex and tx_lines[i - 1].line is not tx_lines[i].line)
+
+
+class ScriptSectionSplitter:
+    """
+    Splits a UdsClient_CL log into script sections one line at a time.
+
+    feed() returns a finished (script_name, tx_lines, rx_lines, all_lines)
+    section as soon as '<<< Script End' (or the next '>>> Script Start')
+    closes it, so the same code serves whole-file parsing and live tailing.
+    Tx/Rx entries are UdsFrame objects; all_lines holds (frame or text, type).
+
+    A multi-DID Read Data By Identifier (did_batch.py) is split back into one
+    Tx frame per DID, and its response into one Rx frame per DID returned, so
+    the matcher never sees a batch. did_lengths (DID -> data length) helps
+    cutting the response; without it the cut falls at the next requested DID.
+    """
+
+    def __init__(self, logger, fix_routine_scripts=("Routine_Control",), did_lengths=None):
+        self.logger = logger
+        self.fix_routine_scripts = set(fix_routine_scripts)
+        self.did_lengths = did_lengths or {}
+        self._pending_dids = None  # DIDs of the last multi-DID read, until its response
+        self.sections_seen = 0
+        self._keep_lines = False
+        self._reset()
+        self.current_script_name = None
+        self.script_started = False
+
+    def _reset(self):
+        self.current_tx_lines, self.current_rx_lines, self.current_all_lines = [], [], []
+        self.current_lines = []  # Raw lines, only kept for scripts that need fix_routine_control_lines
+
+    def _section(self, fix_routine=True):
+        if fix_routine and self.current_script_name in self.fix_routine_scripts:
+            self.current_tx_lines, self.current_rx_lines, self.current_all_lines = \
+                fix_routine_control_lines(self.current_lines)
+        self.sections_seen += 1
+        return (self.current_script_name, self.current_tx_lines, self.current_rx_lines, self.current_all_lines)
+
+    def feed(self, line):
+        line = line.strip()
+        finished = None
+
+        # Check for script start marker using regex
+        if SCRIPT_START_RE.search(line):
+            if self.script_started and self.current_script_name:
+                # Save the previous script section
+                finished = self._section(fix_routine=False)
+                self.logger.debug(f"Saved script section: {finished[0]} with {len(finished[1])} Tx lines and {len(finished[2])} Rx lines")
+            # Start a new script section
+            self.current_script_name = extract_script_name(line)
+            if not self.current_script_name:
+                self.current_script_name = f"unknown_script_{self.sections_seen + 1}"
+            self.script_started = True
+            self._reset()
+            self._keep_lines = self.current_script_name in self.fix_routine_scripts
+            if self._keep_lines:
+                self.current_lines.append(line)
+            self.current_all_lines.append((line, "Other"))
+            self.logger.debug(f"Script start marker found: {line}, Script name: {self.current_script_name}")
+            return finished
+
+        # Check for script end marker using regex
+        if SCRIPT_END_RE.search(line):
+            if self.script_started and self.current_script_name:
+                finished = self._section()
+                self.logger.debug(f"Saved script section: {finished[0]} with {len(finished[1])} Tx lines and {len(finished[2])} Rx lines")
+                self.script_started = False
+                self.current_script_name = None
+                self._reset()
+            self.current_all_lines.append((line, "Other"))
+            return finished
+
+        # Only process lines if within a script section
+        if self.script_started:
+            if self._keep_lines:
+                self.current_lines.append(line)
+            frame = UdsFrame.from_line(line) if line[:3] in ("Tx)", "Rx)") else None
+            if frame and frame.direction == "Tx":
+                for part in self._split_tx(frame):
+                    self.current_tx_lines.append(part)
+                    self.current_all_lines.append((part, "Tx"))
+            elif frame:
+                for part in self._split_rx(frame):
+                    self.current_rx_lines.append(part)
+                    self.current_all_lines.append((part, "Rx"))
+            elif "Tester Present:ON" in line:
+                self.logger.info("\033[94mTester Present: ON \033[0m")
+                self.current_all_lines.append((line, "Other"))
+            elif NO_RESPONSE_RE.search(line):
+                self.current_all_lines.append((line, "Error"))
+            else:
+                self.current_all_lines.append((line, "Other"))
+        return None
+
+    def _split_tx(self, frame):
+        self._pending_dids = None
+        if frame.service != READ_DID_SERVICE or len(frame.payload) < 4:
+            return (frame,)
+        self._pending_dids = split_request(frame.payload)
+        return [UdsFrame(frame.direction, frame.timestamp, frame.service, did, frame.line)
+                for did in self._pending_dids]
+
+    def _split_rx(self, frame):
+        if frame.is_pending:
+            # The DIDs stay pending until the final response
+            return (frame,)
+        dids, self._pending_dids = self._pending_dids, None
+        if not dids or frame.is_negative or frame.service != READ_DID_SERVICE:
+            return (frame,)
+        parts = split_response(dids, frame.payload, self.did_lengths)
+        if not parts:
+            self.logger.warning(f"Multi-DID response does not start with a requested DID: {frame.line}")
+            return (frame,)
+        missing = set(dids).difference(part[:2] for part in parts)
+        if missing:
+            self.logger.warning(f"Multi-DID response without {', '.join(sorted(d.hex().upper() for d in missing))} "
+                                f"(not supported in this session?)")
+        return [UdsFrame(frame.direction, frame.timestamp, frame.service, part, frame.line) for part in parts]
+
+    def flush(self):
+        """Return the last section if the log ended without '<<< Script End'."""
+        if self.script_started and self.current_script_name:
+            finished = self._section()
+            self.logger.debug(f"Saved final script section: {finished[0]} with {len(finished[1])} Tx lines and {len(finished[2])} Rx lines")
+            self.script_started = False
+            self.current_script_name = None
+            self._reset()
+            return finished
+        return None
+
+
+def strip_ansi_codes(file_path):
+    ansi_escape = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
+    with open(file_path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    cleaned_content = ansi_escape.sub('', content)
+    with open(file_path, 'w', encoding='utf-8') as f:
+        f.write(cleaned_content)
+
+
+class ProjectEngine:
+    """Parses UdsClient_CL logs for one project profile."""
+
+    def __init__(self, profile: Profile):
+        self.profile = profile
+        self.logs_folder = str(profile.logs_folder)
+        os.makedirs(self.logs_folder, exist_ok=True)
+
+    def get_condition_from_position(self, position, script_name):
+        if isinstance(script_name, tuple):
+            script_name = script_name[0]
+        return self.profile.conditions_at(script_name, position) or ["Unknown Condition"]
+
+    def condition_matrix(self, script_name):
+        if isinstance(script_name, tuple):
+            script_name = script_name[0]
+        return self.profile.condition_matrix(script_name)
+
+    def process_uds_file(self, file_path, logger):
+        logger.info(f"Processing file: {file_path}")
+        with open(file_path, "r", encoding="utf-8") as f:
+            return self.split_sections(f, logger, file_path)
+
+    def process_uds_bundle(self, bundle_path, logger):
+        """Script sections of every raw *.uds.txt in a result bundle, read from the zip without unpacking."""
+        script_sections = []
+        for name, stream in iter_members(bundle_path, category="raw"):
+            logger.info(f"Processing file: {bundle_path}/{name}")
+            script_sections += self.split_sections(stream, logger, name)
+        return script_sections
+
+    def split_sections(self, lines, logger, source):
+        script_sections = []  # List to store (script_name, tx_lines, rx_lines, all_lines) for each script
+        splitter = ScriptSectionSplitter(logger, self.profile.fix_routine_scripts, known_lengths(self.profile))
+
+        for line in lines:
+            section = splitter.feed(line)
+            if section:
+                script_sections.append(section)
+
+        # Save the last script section if it hasn't been closed
+        section = splitter.flush()
+        if section:
+            script_sections.append(section)
+
+        if not script_sections:
+            logger.warning("No script sections found in file: %s", source)
+
+        return script_sections
+
+    def process_tx_rx_lines(self, script_name, tx_lines, rx_lines, all_lines, logger, recorder=None):
+        generic = self.profile.generic_conditions()
+        decode = self.profile.decoders().decode
+        # recorder: optional results_store.ResultsRecorder, fed with every matched record
+        record = recorder.record if recorder else (lambda *args: None)
+        seen_identifiers = set()
+        passed_identifiers = set()
+        result_folder = None
+        # (frame of the failing request, status) for the CAN trace (analyse_traced); an Rx frame
+        # where the request itself is not known
+        failed = self.failed_requests = []
+
+        # ---------- SINGLE pass over all lines for Negative Response handling ----------
+        for i, (line, line_type) in enumerate(all_lines):
+            if line_type == "Rx" and line.is_negative:
+                msg = line.message
+
+                # 0x78: always Pass/ignored
+                if "Request Correctly Received - Response Pending" in line.line:
+                    #logger.info(f"Info: Response Pending (0x78) ignored -> {msg}")
+                    continue
+
+                # Locate previous Tx to get DID, if any
+                prev_identifier = prev_tx = None
+                for j in range(i - 1, -1, -1):
+                    prev_frame, prev_type = all_lines[j]
+                    if prev_type == "Tx":
+                        prev_identifier, prev_tx = prev_frame.did_hex, prev_frame
+                        break
+
+                # 0x12: always error
+                if "NRC=Sub Function Not Supported" in line.line:
+                    logger.error(f"{prev_identifier or 'Unknown'} Negative Response: {msg}")
+                    record(script_name, prev_identifier, "", msg, "", STATUS_NRC)
+                    failed.append((prev_tx, STATUS_NRC))
+                    continue
+
+                # Other NRCs: suppress only if DID is configured
+                if prev_identifier and prev_identifier in self.profile.suppress_nrc_dids:
+                    continue
+                else:
+                    logger.error(f"{prev_identifier or 'Unknown'} Negative Response: {msg}")
+                    record(script_name, prev_identifier, "", msg, "", STATUS_NRC)
+                    failed.append((prev_tx, STATUS_NRC))
+
+            elif line_type == "Error":
+                # Existing error logic
+                for j in range(i - 1, -1, -1):
+                    prev_frame, prev_type = all_lines[j]
+                    if prev_type == "Tx":
+                        prev_identifier = prev_frame.did_hex
+                        if prev_identifier:
+                            timestamp = line[:21] if len(line) >= 19 else "Unknown timestamp"
+                            logger.error(f"{prev_identifier} No response from ECU detected at {timestamp}")
+                            record(script_name, prev_identifier, "", timestamp, "", STATUS_NO_RESPONSE)
+                            failed.append((prev_frame, STATUS_NO_RESPONSE))
+                        else:
+                            timestamp = line[:21] if len(line) >= 19 else "Unknown timestamp"
+                            logger.error(f"Unknown No response from ECU detected at {timestamp} (previous Tx invalid)")
+                        break
+                else:
+                    timestamp = line[:21] if len(line) >= 19 else "Unknown timestamp"
+                    logger.error(f"Unknown No response from ECU detected at {timestamp} (no previous Tx found)")
+
+        # ---------- Tx/Rx matching and value checks ----------
+        for tx in tx_lines:
+            # DID only (a read) or shorter: nothing to compare
+            if len(tx.payload) <= 2:
+                continue
+            tx_identifier = tx.did_hex
+            tx_position = first_nonzero(tx.data)
+            if tx_position == -1:
+                continue
+            identifier_script = script_name in ["Standard_Identifiers", "Generetic_ECU_Read"]
+            matched_rx = None
+            for rx in rx_lines[:]:
+                if len(rx.payload) == 2:
+                    rx_lines.remove(rx)
+                    continue
+                if len(rx.payload) >= 4:
+                    rx_identifier = rx.did_hex
+                    if rx_identifier in self.profile.skip_identifiers:
+                        rx_lines.remove(rx)
+                        continue
+                    if tx_identifier == rx_identifier:
+                        matched_rx = rx
+                        rx_lines.remove(rx)
+                        break
+            if not matched_rx:
+                continue
+            rx_raw = raw_hex(matched_rx.data)
+
+            if not identifier_script:
+                # Every condition the write touches or the readback changes, in one vectorised check
+                for condition, position, passed in self.condition_matrix(script_name).check(tx.data, matched_rx.data):
+                    if passed:
+                        result = decode(tx_identifier, position, tx.data)
+                        logger.info(
+                            f"\033[34m{condition},\033[0m Converted result: \033[34m{result}\033[0m \033[32m Pass\033[0m ")
+                        record(script_name, tx_identifier, condition, result, rx_raw, STATUS_PASS)
+                    else:
+                        logger.error(f"{condition}, Mismatch Tx and Rx {tx_identifier}, Fail")
+                        record(script_name, tx_identifier, condition, decode(tx_identifier, position, matched_rx.data),
+                               rx_raw, STATUS_FAIL)
+                        failed.append((tx, STATUS_FAIL))
+                continue
+
+            Standart_Generetic_condition = generic.get(tx_identifier, "Unknown DID")
+            same_data = nonzero(tx.data) == nonzero(matched_rx.data)
+            result = decode(tx_identifier, tx_position, tx.data)
+            for condition in self.get_condition_from_position(tx_position, script_name):
+                if same_data:
+                    if result != "wrong output":
+                        logger.info(
+                            f"\033[34m{tx_identifier} \033[34m{Standart_Generetic_condition}\033[0m Matching Tx and Rx, Converted: \033[34m{result}\033[0m \033[32m Pass\033[0m")
+                        passed_identifiers.add(tx_identifier)
+                        record(script_name, tx_identifier, Standart_Generetic_condition, result, rx_raw, STATUS_PASS)
+                    else:
+                        logger.error(
+                            f"{tx_identifier} {Standart_Generetic_condition} Mismatch Tx and Rx, Condition: \033[34m{condition}\033[0m, Converted: wrong output Fail")
+                        record(script_name, tx_identifier, Standart_Generetic_condition, result, rx_raw, STATUS_FAIL)
+                        failed.append((tx, STATUS_FAIL))
+                else:
+                    logger.error(f"Mismatch Tx and Rx {tx_identifier} {Standart_Generetic_condition} wrong output Fail")
+                    record(script_name, tx_identifier, Standart_Generetic_condition, decode(tx_identifier, tx_position, matched_rx.data),
+                           rx_raw, STATUS_FAIL)
+                    failed.append((tx, STATUS_FAIL))
+
+        # ---------- RX-only processing (skip Negative Responses here to avoid double logging) ----------
+        for rx in rx_lines:
+            # Skip any Negative Response lines here—they were already processed above
+            if rx.is_negative:
+                continue
+
+            if len(rx.payload) < 3:
+                continue
+            rx_identifier = rx.did_hex
+
+            if rx_identifier == "F195":
+                result = decode(rx_identifier, 0, rx.data)
+                if result and result != "0" and result != "wrong output":
+                    #result_folder = os.path.join("../../Logs", result)
+                    result_folder = os.path.join(self.logs_folder, result)
+                    if recorder:
+                        recorder.set_version(result)
+
+                    os.makedirs(result_folder, exist_ok=True)
+                    logger.debug(f"Creating folder at: {result_folder}")
+
+            if rx_identifier in self.profile.skip_identifiers:
+                continue
+            if rx_identifier in passed_identifiers:
+                continue
+            seen_identifiers.add(rx_identifier)
+
+            if rx.service == "Diagnostic Session Control":
+                logger.warning(f"{rx_identifier}\033[94m Diagnostic Session Control \033[0m")
+                continue
+            if rx.service == "Security Access":
+                logger.warning(f"{rx_identifier}\033[94m Security Access \033[0m")
+                continue
+
+            Standart_Generetic_condition = generic.get(rx_identifier, "Unknown DID")
+            rx_position = first_nonzero(rx.data)
+            result = decode(rx_identifier, rx_position, rx.data) if rx_position >= 0 else "0"
+            raw_values = raw_hex(rx.data)
+            rx_conditions = self.get_condition_from_position(rx_position, script_name) if rx_position >= 0 else ["Unknown Condition"]
+            for condition in rx_conditions:
+                if result == "wrong output":
+                    logger.error(
+                        f"{rx_identifier} Read Data By Identifier, Condition: \033[91m{condition}\033[0m, Converted result: wrong output")
+                    record(script_name, rx_identifier, condition, result, raw_values, STATUS_FAIL)
+                    failed.append((rx, STATUS_FAIL))
+                elif result == "0":
+                    logger.info(
+                        f"\033[34m{rx_identifier} {Standart_Generetic_condition} \033[0m Read Data By Identifier, Converted result: \033[34m\033[0m, Raw Values: \033[34m{raw_values}\033[0m")
+                    record(script_name, rx_identifier, Standart_Generetic_condition, "", raw_values, STATUS_READ)
+                else:
+                    if script_name in ["Standard_Identifiers", "Generetic_ECU_Read"]:
+                        record(script_name, rx_identifier, Standart_Generetic_condition, result, raw_values, STATUS_READ)
+                    if script_name in ["Standard_Identifiers"]:
+                        logger.info(
+                            f"\033[34m{rx_identifier} {Standart_Generetic_condition}\033[0m Read Data By Identifier, Converted result: \033[34m{result}\033[0m, Raw Values: \033[34m{raw_values}\033[0m")
+                    elif script_name in ["Generetic_ECU_Read"]:
+                        logger.info(
+                            f"\033[34m{rx_identifier} {Standart_Generetic_condition} \033[0m Read Data By Identifier, Converted result: \033[34m{result}\033[0m, Raw Values: \033[34m{raw_values}\033[0m")
+
+        # Close and remove logger handlers
+        for handler in logger.handlers[:]:
+            if isinstance(handler, logging.FileHandler):
+                handler.close()
+                logger.removeHandler(handler)
+
+        if isinstance(script_name, tuple):
+            script_name = script_name[0]
+        original_log_file = os.path.join(self.logs_folder, f"{script_name}.log")
+        if result_folder and os.path.exists(original_log_file):
+            new_log_file = os.path.join(result_folder, f"{script_name}.log")
+            try:
+                shutil.move(original_log_file, new_log_file)
+                strip_ansi_codes(new_log_file)
+                logger.debug(f"Created and cleaned log file in {new_log_file}")
+            except Exception as e:
+                logger.error(f"Failed to move or clean log file: {e}")
+        elif os.path.exists(original_log_file):
+            strip_ansi_codes(original_log_file)
+        return result_folder
+
+    def analyse_section(self, section, logger, recorder=None):
+        """Run Tx/Rx matching for one script section; returns the F195 result folder name or None."""
+        script_name, tx_lines, rx_lines, all_lines = section
+        logger.info(f"Processing script section: {script_name}")
+        script_logger = setup_logger(script_name, self.logs_folder)
+        script_logger.setLevel(logging.DEBUG)
+        if tx_lines or rx_lines:
+            result = self.process_tx_rx_lines(script_name, tx_lines, rx_lines, all_lines, script_logger, recorder)
+            if result:
+                return os.path.basename(result)
+        return None
+
+    def analyse_traced(self, section, logger, recorder, trace, started):
+        """analyse_section, then dump the CAN trace around every request of the section that failed."""
+        self.failed_requests = []
+        result = self.analyse_section(section, logger, recorder)
+        if trace:
+            script_name = section[0][0] if isinstance(section[0], tuple) else section[0]
+            tx_lines = section[1]
+            trace.dump_failures([(script_name, frame.did_hex or "Unknown", status, requests_after(tx_lines, frame))
+                                 for frame, status in self.failed_requests], started, time.time())
+        return result
+
+    def follow_uds_log(self, folder_path, logger, since=None, recorder=None, trace=None):
+        """
+        Live mode: wait for the new *.uds.txt, analyse every script section as soon
+        as it ends, and return once stdin is closed (end of the UDS batch).
+        trace: optional can_trace.CanTrace, dumped around the failures of each section.
+        """
+        since = time.time() if since is None else since
+        stop_event = threading.Event()
+        stop_on_stdin_eof(stop_event)
+
+        logger.info(f"Live mode: waiting for a new *.uds.txt in {folder_path} …")
+        log_path = wait_for_new_log(folder_path, since, stop_event)
+        if not log_path:
+            logger.warning("UDS batch finished but no new log file appeared.")
+            return None
+        logger.info(f"Following file: {log_path}")
+        if recorder:
+            recorder.log_file = log_path
+
+        splitter = ScriptSectionSplitter(logger, self.profile.fix_routine_scripts, known_lengths(self.profile))
+        result_folder = None
+        started = time.time()
+        for line in tail_lines(log_path, stop_event):
+            section = splitter.feed(line)
+            if section:
+                result_folder = self.analyse_traced(section, logger, recorder, trace, started) or result_folder
+                started = time.time()
+        section = splitter.flush()
+        if section:
+            result_folder = self.analyse_traced(section, logger, recorder, trace, started) or result_folder
+        if splitter.sections_seen == 0:
+            logger.warning("No script sections to process in %s", log_path)
+        return result_folder
+
+    def run_compliance_matrix(self, result_folder, logger):
+        # pass RESULT_FOLDER to the child process and use the SAME interpreter (venv on Jenkins)
+        env = os.environ.copy()
+        env['RESULT_FOLDER'] = result_folder
+
+        script_path = str(self.profile.compliance_script)
+        logger.info(
+            f"Running compliance matrix modifier: {script_path} (RESULT_FOLDER={result_folder})"
+        )
+
+        try:
+            subprocess.run(
+                [sys.executable, script_path],
+                check=True,
+                env=env,
+            )
+        except subprocess.CalledProcessError as e:
+            logger.error(f"modify_compliance_matrix.py failed with return code {e.returncode}")
+            raise
+
+    def main(self, argv: Optional[List[str]] = None) -> int:
+        arg_parser = argparse.ArgumentParser(description=f"Parse UdsClient_CL logs ({self.profile.name})")
+        arg_parser.add_argument("script", nargs="?", default=None,
+                                help="Script that produced the log (informational, passed by the NewGen runner)")
+        arg_parser.add_argument("--follow", action="store_true",
+                                help="Tail the new log while the UDS batch runs; stops when stdin is closed")
+        arg_parser.add_argument("--logs-dir", default=DEFAULT_LOGS_DIR,
+                                help="Folder with UdsClient_CL *.uds.txt logs")
+        arg_parser.add_argument("--trace", metavar="CHANNEL",
+                                help="With --follow: keep a CAN trace of this channel and dump it around failures")
+        arg_parser.add_argument("--bundle", metavar="UDSB",
+                                help="Parse the raw log(s) inside a result bundle (result_bundle.py) "
+                                     "instead of the newest *.uds.txt")
+        args = arg_parser.parse_args(argv)
+
+        folder_path = args.logs_dir
+        logger = setup_logger("main", self.logs_folder)
+        logger.setLevel(logging.DEBUG)
+        result_folder = None
+        recorder = ResultsRecorder(self.profile.device)
+
+        if args.follow:
+            trace = CanTrace.open(args.trace, self.profile) if args.trace else None
+            try:
+                result_folder = self.follow_uds_log(folder_path, logger, recorder=recorder, trace=trace)
+            finally:
+                if trace:
+                    trace.close()
+        else:
+            if args.bundle:
+                source = args.bundle
+                try:
+                    script_sections = self.process_uds_bundle(source, logger)
+                except BundleError as e:
+                    print(f"[ERROR] {e}")
+                    return 1
+            else:
+                files = glob.glob(os.path.join(folder_path, "*.uds.txt"))
+                if not files:
+                    print("No matching files found.")
+                    return 0
+                source = max(files, key=os.path.getmtime)
+                script_sections = self.process_uds_file(source, logger)
+            recorder.log_file = source
+            # Process all script sections
+            if not script_sections:
+                logger.warning("No script sections to process in %s", source)
+                return 0
+            for section in script_sections:
+                result_folder = self.analyse_section(section, logger, recorder) or result_folder
+
+        run_id = recorder.commit()
+
+        if result_folder:
+            try:
+                write_diff_against_previous(self.profile.device, run_id,
+                                            os.path.join(self.logs_folder, result_folder))
+            except Exception as e:
+                logger.warning(f"Version diff report failed: {e}")
+            self.run_compliance_matrix(result_folder, logger)
+        else:
+            logger.warning("No result folder was detected from logs. Compliance matrix not generated.")
+        return 0
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(add_help=False)
+    ap.add_argument("--project", choices=sorted(PROFILES), required=True)
+    known, rest = ap.parse_known_args()
+    sys.exit(ProjectEngine(get_profile(known.project)).main(rest))
@@ -0,0 +1,122 @@
+# frame.py
+"""
+One Tx/Rx line of a UdsClient_CL log, decoded once.
+
+    Tx) Read Data By Identifier      : 0xF1 0x95
+    2026-10-19 10:00:01 Tx) Routine Control : 0x02 0x01 ...   (re-stamped Routine_Control lines)
+
+The hex tokens become one `bytes` payload (first two bytes = DID), so the
+matcher compares and converts bytes instead of re-running re.findall and
+building lists of "0xNN" strings for every check.
+"""
+import re
+import sys
+from typing import Optional
+
+FRAME_RE = re.compile(r"^(?:(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}) )?([TR]x)\)([^:]*)(?::(.*))?$")
+HEX_BYTE_RE = re.compile(r"0x([0-9A-Fa-f]{2})")
+
+
+class UdsFrame:
+    __slots__ = ("direction", "timestamp", "service", "payload", "line")
+
+    def __init__(self, direction: str, timestamp: Optional[str], service: str, payload: bytes, line: str):
+        self.direction = direction      # "Tx" / "Rx"
+        self.timestamp = timestamp      # only on re-stamped lines
+        self.service = service          # e.g. "Read Data By Identifier", "Negative Response"
+        self.payload = payload
+        self.line = line                # original text, for messages
+
+    @classmethod
+    def from_line(cls, line: str) -> Optional["UdsFrame"]:
+        if line[2:3] == ")" and line[:2] in ("Tx", "Rx"):
+            # Plain client line, no regex needed
+            timestamp, direction = None, line[:2]
+            service, sep, data = line[3:].partition(":")
+            data = data if sep else None
+        else:
+            m = FRAME_RE.match(line)
+            if not m:
+                return None
+            timestamp, direction, service, data = m.groups()
+        # Labels repeat on every line; one shared string per label
+        return cls(direction, timestamp, sys.intern(service.strip()), decode_payload(data), line)
+
+    def __repr__(self):
+        return f"UdsFrame({self.direction}, {self.service!r}, {self.payload.hex(' ').upper()})"
+
+    @property
+    def is_negative(self) -> bool:
+        return self.service == "Negative Response"
+
+    @property
+    def is_pending(self) -> bool:
+        """NRC 0x78 (response pending): the real response still follows."""
+        return self.is_negative and self.payload[1:2] == b"\x78"
+
+    @property
+    def did(self) -> Optional[int]:
+        return int.from_bytes(self.payload[:2], "big") if len(self.payload) >= 2 else None
+
+    @property
+    def did_hex(self) -> Optional[str]:
+        """'F195' style identifier, as used in the condition tables and the results store."""
+        return f"{self.payload[0]:02X}{self.payload[1]:02X}" if len(self.payload) >= 2 else None
+
+    @property
+    def data(self) -> memoryview:
+        """Payload after the DID, without copying."""
+        return memoryview(self.payload)[2:]
+
+    @property
+    def message(self) -> str:
+        """Everything after the first ':' (NRC text etc.)."""
+        return self.line.split(":", 1)[1].strip() if ":" in self.line else ""
+
+
+def decode_payload(data: Optional[str]) -> bytes:
+    """'0xF1 0x95 NRC=...' -> b'\\xf1\\x95'. Only "0xNN" tokens count."""
+    if not data:
+        return b""
+    n = data.count("0x")
+    try:
+        payload = bytes.fromhex(data.replace("0x", ""))
+        if len(payload) == n:
+            return payload
+    except ValueError:
+        pass
+    # Text after the bytes (NRC names) or odd tokens: pick the tokens out
+    return bytes.fromhex("".join(HEX_BYTE_RE.findall(data)))
+
+
+def nonzero(data) -> bytes:
+    """Data bytes with the 0x00 bytes dropped (what normalize_values did for "0xNN" lists)."""
+    return bytes(data).replace(b"\x00", b"")
+
+
+def first_nonzero(data) -> int:
+    """Index of the first non-zero data byte, -1 if all zero (get_tx_position on bytes)."""
+    data = bytes(data)
+    stripped = data.lstrip(b"\x00")
+    return len(data) - len(stripped) if stripped else -1
+
+
+def raw_hex(data) -> str:
+    """'F1 95 30' style raw value for reports."""
+    return bytes(data).hex(" ").upper()
+
+
+def convert_bytes(data) -> str:
+    """
+    Same result as engine.convert() on the "0xNN" list: zero bytes are dropped,
+    4+ bytes are text (or decimals if not printable), 1 byte unsigned, 2-3 bytes
+    big-endian signed.
+    """
+    data = nonzero(data)
+    if not data:
+        return "0"
+    if len(data) > 3:
+        if all(32 <= b <= 126 for b in data):
+            return data.decode("ascii")
+        return " ".join(str(b) for b in data)
+    return str(int.from_bytes(data, "big", signed=len(data) > 1))
@@ -0,0 +1,318 @@
+# isotp_tuning.py
+"""
+ISO-TP parameter sweep for the large multi-frame transfers, per ECU profile.
+
+The biggest transfers are the 078F / F1D3 records (2E write + 22 readback)
+and the 31 01 02 01 history-zone update. The Python clients (uds_session,
+uds_pool, DTC/DTCTest*.py) ran can-isotp with its defaults. This tool sweeps
+
+    blocksize   BS we send in our flow control (how many consecutive frames
+                the ECU may send before waiting for the next FC)
+    stmin       STmin we ask the ECU to keep between consecutive frames (ms)
+    tx_padding  None (short last frame) or a fill byte (always DLC 8)
+
+and for every combination reads each record, writes the same data back (so
+the ECU ends up unchanged) and reads it again, REPEATS times. It measures
+bytes on the wire per second and request latency. A combination counts only
+if every request was answered and every readback matched. Our own sends
+(the 2E / 31 payloads) are paced by the ECU's flow control; BS / STmin speed
+up the responses, the padding decides whether the ECU takes short frames at
+all.
+
+The best combination is stored per profile in isotp_params.json;
+tuned_params(device) gives it to every Python client (IsoTpTransport, so
+uds_pool and the DTC tools too). An untuned profile gets nothing on top, so
+each client keeps what it sent before: can-isotp defaults plus the fill byte
+0x00 that IsoTpTransport always used.
+
+    python -m Project.Common.isotp_tuning --project UPP --virtual     # against VirtualEcu
+    python -m Project.Common.isotp_tuning --project UPP --session 03  # against the bench ECU, saves the result
+
+Writes need an unlocked ECU; when the ECU refuses them (NRC 0x33 etc.) the
+sweep goes on with the reads only. --with-routine adds the script's
+31 01 02 01 request (it updates the history zone on every run).
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from Project.Common.profiles import PROFILES, REPO_ROOT, Profile
+from Project.Common.script_lint import parse_script
+from Project.Common.uds_session import (CAN_CHANNEL, CAN_INTERFACE, IsoTpTransport, NegativeResponse, UdsError,
+                                        UdsSession, can, isotp)
+
+# =========================
+# ======  CONFIG  =========
+# =========================
+
+PARAMS_FILE = REPO_ROOT / "isotp_params.json"
+
+# Added for profiles that were never tuned: nothing, the client's own settings stay
+DEFAULT_ISOTP_PARAMS: Dict = {}
+
+# IsoTpTransport without tuning (can-isotp defaults, fill byte 0x00): the sweep's baseline
+BASELINE_PARAMS = {"blocksize": 8, "stmin": 0, "tx_padding": 0x00}
+
+BLOCKSIZES = (0, 8, 16, 32)         # 0 = no further flow control
+STMINS = (0, 1, 5)                  # ms
+PADDINGS = (None, 0x00, 0xCC)
+
+# Transfers per combination
+REPEATS = 3
+
+# Large records per device (read, written back, read again)
+TUNING_DIDS = {"UPP": ("078F", "F1D3"), "NewGen": ("F190",)}
+
+# History-zone update of Routine_Control.script (--with-routine)
+ROUTINE_PREFIX = [0x31, 0x01, 0x02, 0x01]
+
+VIRTUAL_CHANNEL = "isotp_tuning"
+
+
+# =========================
+# ======  STORAGE  ========
+# =========================
+
+def load_tuning(path: Path = PARAMS_FILE) -> Dict[str, Dict]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def tuned_params(device: str, path: Path = PARAMS_FILE) -> Dict:
+    """can-isotp params for `device`: the stored sweep winner over DEFAULT_ISOTP_PARAMS."""
+    params = dict(DEFAULT_ISOTP_PARAMS)
+    params.update(load_tuning(path).get(device, {}).get("params", {}))
+    return params
+
+
+def save_tuning(device: str, params: Dict, bytes_per_s: float, latency_ms: float, path: Path = PARAMS_FILE) -> None:
+    tuning = load_tuning(path)
+    tuning[device] = {"params": params, "bytes_per_s": round(bytes_per_s), "latency_ms": round(latency_ms, 1),
+                      "measured": datetime.now().isoformat(timespec="seconds")}
+    try:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(tuning, f, indent=2, sort_keys=True)
+    except OSError as e:
+        print(f"[WARN] Could not save ISO-TP params to {path}: {e}")
+
+
+# =========================
+# ======  SIMULATOR  ======
+# =========================
+
+class VirtualEcu:
+    """
+    ECU on a python-can virtual bus for dry runs: 10 / 3E / 22 / 2E / 31 over
+    its own ISO-TP stack (IDs swapped). `fc_blocksize` / `fc_stmin` are the
+    flow control it answers our multi-frame requests with.
+    """
+
+    def __init__(self, profile: Profile, records: Dict[int, bytes], channel: str = VIRTUAL_CHANNEL,
+                 fc_blocksize: int = 8, fc_stmin: int = 1):
+        if can is None or isotp is None:
+            raise UdsError("python-can / can-isotp are not installed")
+        self.records = dict(records)
+        self.bus = can.Bus(interface="virtual", channel=channel)
+        self.notifier = can.Notifier(self.bus, [])
+        tx_id, rx_id = profile.can_ids
+        mode = isotp.AddressingMode.Normal_29bits if max(tx_id, rx_id) > 0x7FF else isotp.AddressingMode.Normal_11bits
+        self.stack = isotp.NotifierBasedCanStack(
+            self.bus, self.notifier, address=isotp.Address(mode, txid=rx_id, rxid=tx_id),
+            params={"blocksize": fc_blocksize, "stmin": fc_stmin, "tx_padding": 0x00, "blocking_send": True})
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._serve, name="virtual-ecu", daemon=True)
+
+    def __enter__(self):
+        self.stack.start()
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join(timeout=2)
+        self.stack.stop()
+        self.notifier.stop()
+        self.bus.shutdown()
+
+    def _serve(self) -> None:
+        while not self._stop.is_set():
+            request = self.stack.recv(block=True, timeout=0.1)
+            if not request:
+                continue
+            response = self._answer(bytes(request))
+            if response:
+                self.stack.send(response, send_timeout=2)
+
+    def _answer(self, req: bytes) -> Optional[bytes]:
+        sid = req[0]
+        if sid == 0x3E:
+            return None if req[1] & 0x80 else bytes([0x7E, req[1]])
+        if sid == 0x10:
+            return bytes([0x50, req[1], 0x00, 0x32, 0x01, 0xF4])
+        did = int.from_bytes(req[1:3], "big") if len(req) >= 3 else None
+        if sid == 0x22:
+            return bytes([0x62]) + req[1:3] + self.records[did] if did in self.records else bytes([0x7F, sid, 0x31])
+        if sid == 0x2E:
+            if did not in self.records or len(req) - 3 != len(self.records[did]):
+                return bytes([0x7F, sid, 0x13])
+            self.records[did] = req[3:]
+            return bytes([0x6E]) + req[1:3]
+        if sid == 0x31:
+            return bytes([0x71]) + req[1:4]
+        return bytes([0x7F, sid, 0x11])
+
+
+# =========================
+# ======  MEASURING  ======
+# =========================
+
+class Trial:
+    """One parameter combination: wire bytes, time and request latencies over all repeats."""
+
+    def __init__(self, params: Dict):
+        self.params = params
+        self.bytes = 0
+        self.seconds = 0.0
+        self.latencies: List[float] = []
+        self.error: Optional[str] = None
+
+    @property
+    def bytes_per_s(self) -> float:
+        return self.bytes / self.seconds if self.seconds and not self.error else 0.0
+
+    @property
+    def latency_ms(self) -> float:
+        return 1000 * sorted(self.latencies)[len(self.latencies) // 2] if self.latencies else 0.0
+
+    def label(self) -> str:
+        pad = self.params["tx_padding"]
+        return (f"BS={self.params['blocksize']:<3} STmin={self.params['stmin']:<2}ms "
+                f"pad={'none' if pad is None else f'0x{pad:02X}'}")
+
+
+def routine_request(profile: Profile) -> Optional[bytes]:
+    script = profile.scripts_dir / "Routine_Control.script"
+    if not script.is_file():
+        return None
+    for c in parse_script(script):
+        if c.cmd == "send" and c.data and c.data[:4] == ROUTINE_PREFIX:
+            return bytes(c.data)
+    return None
+
+
+async def run_trial(transport, dids: List[int], session: Optional[int], write: bool,
+                    routine: Optional[bytes], repeats: int = REPEATS) -> Tuple[Trial, bool]:
+    """Returns (trial, writes still allowed)."""
+    trial = Trial(transport.params)
+    try:
+        async with UdsSession(transport) as uds:
+            if session:
+                await uds.change_session(session)
+            records = {did: await uds.read_did(did) for did in dids}
+            start = time.perf_counter()
+            for _ in range(repeats):
+                for did, data in records.items():
+                    if write:
+                        try:
+                            await uds.request(bytes([0x2E]) + did.to_bytes(2, "big") + data)
+                            trial.bytes += 3 + len(data) + 3
+                        except NegativeResponse as e:
+                            print(f"[WARN] {did:04X} write refused ({e}), measuring reads only")
+                            write = False
+                    response = await uds.request(bytes([0x22]) + did.to_bytes(2, "big"))
+                    trial.bytes += 3 + len(response)
+                    if response[3:] != data:
+                        raise UdsError(f"{did:04X} readback differs from the record written")
+                if routine:
+                    response = await uds.request(routine)
+                    trial.bytes += len(routine) + len(response)
+            trial.seconds = time.perf_counter() - start
+            trial.latencies = list(uds.latencies)
+    except UdsError as e:
+        trial.error = str(e)
+    return trial, write
+
+
+async def sweep(profile: Profile, dids: List[int], make_transport, session: Optional[int] = None,
+                routine: Optional[bytes] = None, repeats: int = REPEATS) -> List[Trial]:
+    trials = []
+    write = True
+    for blocksize, stmin, padding in itertools.product(BLOCKSIZES, STMINS, PADDINGS):
+        params = {"blocksize": blocksize, "stmin": stmin, "tx_padding": padding}
+        trial, write = await run_trial(make_transport(params), dids, session, write, routine, repeats)
+        trials.append(trial)
+        result = trial.error or f"{trial.bytes_per_s:8.0f} B/s, median {trial.latency_ms:6.1f} ms"
+        print(f"[INFO] {trial.label()}  {result}")
+    return trials
+
+
+# =========================
+# ========= CLI ===========
+# =========================
+
+async def _run(args) -> int:
+    profile = PROFILES[args.project]
+    dids = [int(d, 16) for d in (args.dids or TUNING_DIDS.get(profile.name, ()))]
+    if not dids:
+        print(f"[ERROR] No tuning DIDs for {profile.name}, pass --dids")
+        return 1
+    routine = routine_request(profile) if args.with_routine else None
+    tx_id, rx_id = profile.can_ids
+    interface, channel = ("virtual", VIRTUAL_CHANNEL) if args.virtual else (CAN_INTERFACE, args.channel)
+    make_transport = lambda params: IsoTpTransport(interface=interface, channel=channel, tx_id=tx_id, rx_id=rx_id,
+                                                   params=params)
+
+    if args.virtual:
+        # Records the size of the real ones, so the frame counts match
+        records = {did: bytes((did + i) & 0xFF for i in range(args.record_len)) for did in dids}
+        with VirtualEcu(profile, records):
+            trials = await sweep(profile, dids, make_transport, args.session, routine, args.repeats)
+    else:
+        trials = await sweep(profile, dids, make_transport, args.session, routine, args.repeats)
+
+    good = [t for t in trials if not t.error]
+    if not good:
+        print("[ERROR] No parameter combination completed the transfers")
+        return 1
+    best = max(good, key=lambda t: t.bytes_per_s)
+    base = next((t for t in good if t.params == BASELINE_PARAMS), None)
+    gain = f", {best.bytes_per_s / base.bytes_per_s:.2f}x the defaults" if base and base.bytes_per_s else ""
+    print(f"\n[INFO] Best: {best.label()}  {best.bytes_per_s:.0f} B/s, median {best.latency_ms:.1f} ms{gain}")
+    if args.virtual:
+        print("[INFO] Virtual run, not saved")
+    else:
+        save_tuning(profile.name, best.params, best.bytes_per_s, best.latency_ms)
+        print(f"[INFO] Saved for {profile.name} in {PARAMS_FILE}")
+    return 0
+
+
+def _main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Sweep ISO-TP blocksize / STmin / padding on the large transfers")
+    ap.add_argument("--project", default="UPP", choices=sorted(PROFILES))
+    ap.add_argument("--channel", default=CAN_CHANNEL)
+    ap.add_argument("--virtual", action="store_true", help="sweep against VirtualEcu on a python-can virtual bus")
+    ap.add_argument("--session", type=lambda s: int(s, 16), help="enter this session first (e.g. 03)")
+    ap.add_argument("--dids", nargs="*", help="records to transfer (default: %s)" % TUNING_DIDS)
+    ap.add_argument("--with-routine", action="store_true", help="also send the script's 31 01 02 01 request")
+    ap.add_argument("--repeats", type=int, default=REPEATS)
+    ap.add_argument("--record-len", type=int, default=107, help="VirtualEcu record size (078F is 107 bytes)")
+    args = ap.parse_args(argv)
+    try:
+        return asyncio.run(_run(args))
+    except UdsError as e:
+        print(f"[ERROR] {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(_main())
@@ -0,0 +1,75 @@
+# live_tail.py
+"""
+Follow a UdsClient_CL *.uds.txt log while the client is still writing it.
+
+Used by `upp.py --follow` (ProjectEngine.follow_uds_log): the parser starts
+together with the script batch, waits for the new log file to appear in
+C:\\temp3 and hands every complete line to the section splitter, so each
+script is analysed as soon as its '<<< Script End' is written instead of
+after the whole batch.
+"""
+import glob
+import os
+import sys
+import threading
+import time
+from typing import Iterator, Optional
+
+
+def find_new_log(folder: str, since: float, pattern: str = "*.uds.txt") -> Optional[str]:
+    """Newest log in `folder` modified at/after `since` (epoch seconds), else None."""
+    files = [f for f in glob.glob(os.path.join(folder, pattern)) if os.path.getmtime(f) >= since]
+    return max(files, key=os.path.getmtime) if files else None
+
+
+def wait_for_new_log(folder: str, since: float, stop_event: threading.Event,
+                     poll: float = 0.5, pattern: str = "*.uds.txt") -> Optional[str]:
+    """Block until a log newer than `since` shows up, or the batch is over."""
+    while True:
+        path = find_new_log(folder, since, pattern)
+        if path or stop_event.is_set():
+            return path
+        time.sleep(poll)
+
+
+def tail_lines(path: str, stop_event: threading.Event, poll: float = 0.2) -> Iterator[str]:
+    """
+    Yield complete lines from `path` as they are appended.
+
+    A trailing partial line is held back until its newline arrives. Once
+    `stop_event` is set the rest of the file is drained (including a final
+    line without newline) and the generator ends.
+    """
+    pending = ""
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        while True:
+            chunk = f.readline()
+            if chunk:
+                pending += chunk
+                if pending.endswith("\n"):
+                    yield pending
+                    pending = ""
+                continue
+            if stop_event.is_set():
+                # One last read after the writer is done, then flush the tail
+                rest = f.read()
+                if rest:
+                    pending += rest
+                for line in pending.splitlines(keepends=True):
+                    yield line
+                return
+            time.sleep(poll)
+
+
+def stop_on_stdin_eof(stop_event: threading.Event) -> threading.Thread:
+    """Set `stop_event` when stdin is closed (the runner closes it after the batch)."""
+    def _wait():
+        try:
+            sys.stdin.read()
+        except (OSError, ValueError):
+            pass
+        stop_event.set()
+
+    t = threading.Thread(target=_wait, name="stdin-eof", daemon=True)
+    t.start()
+    return t
@@ -0,0 +1,164 @@
+# profiles.py
+"""
+Per-project configuration for the shared parsing engine (engine.py).
+
+A Profile says where a project lives (Project/<name>), which Condition module
+belongs to which script, which scripts the runner executes and on which
+channel, and where the SRD / compliance matrix script are. Condition modules
+are imported lazily, the first time a script section needs them, so a parse
+only loads the modules of its own project.
+
+Adding a new ECU family = a Project/<name> folder with Condition/ and
+Scripts/, plus one Profile entry below.
+"""
+import importlib
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+# Scripts whose Tx/Rx pairs are checked against the generic DID table instead
+# of a position-based condition table
+IDENTIFIER_SCRIPTS = ("Standard_Identifiers", "Generetic_ECU_Read")
+
+
+class Profile:
+    def __init__(self, name: str, device: str, channel: str, scripts: List[str],
+                 condition_modules: Dict[str, str], generic_module: str,
+                 srd_file: Optional[str] = None,
+                 fix_routine_scripts: Tuple[str, ...] = ("Routine_Control",),
+                 skip_identifiers: Tuple[str, ...] = ("",),
+                 suppress_nrc_dids: Tuple[str, ...] = (),
+                 decoder_module: Optional[str] = "id_decoders",
+                 response_buffer: int = 255,
+                 can_ids: Tuple[int, int] = (0x7D0, 0x7D8)):
+        self.name = name
+        self.device = device
+        self.channel = channel
+        self.scripts = scripts
+        self.condition_modules = condition_modules
+        self.generic_module = generic_module
+        self.fix_routine_scripts = set(fix_routine_scripts)
+        self.skip_identifiers = set(skip_identifiers)
+        # Leave empty (or use only for NRCs other than 0x78); 0x78 is always ignored.
+        self.suppress_nrc_dids = set(suppress_nrc_dids)
+        self.decoder_module = decoder_module
+        # Largest positive 0x22 response (0x62 + DID/data pairs) the ECU sends; caps multi-DID reads
+        self.response_buffer = response_buffer
+        # Physical (request, response) CAN IDs for the Python-side UDS tools (uds_session / uds_pool)
+        self.can_ids = can_ids
+
+        self.package = f"Project.{name}"
+        self.project_dir = REPO_ROOT / "Project" / name
+        self.logs_folder = self.project_dir / "Logs"
+        self.scripts_dir = self.project_dir / "Scripts"
+        self.srd_path = self.project_dir / "Documents" / srd_file if srd_file else None
+        self.compliance_script = self.project_dir / "modify_compliance_matrix.py"
+
+        self._modules: Dict[str, object] = {}
+        self._position_index: Dict[str, Dict[int, List[str]]] = {}
+        self._decoders = None
+        self._matrices: Dict[str, object] = {}
+
+    def __repr__(self):
+        return f"Profile({self.name!r})"
+
+    def script_paths(self) -> List[Path]:
+        return [self.scripts_dir / f"{s}.script" for s in self.scripts]
+
+    def _load(self, module: str):
+        mod = self._modules.get(module)
+        if mod is None:
+            mod = self._modules[module] = importlib.import_module(f"{self.package}.Condition.{module}")
+        return mod
+
+    def generic_conditions(self) -> Dict[str, str]:
+        """DID -> name table used for Standard_Identifiers / Generetic_ECU_Read."""
+        return self._load(self.generic_module).ID_CONDITIONS
+
+    def decoders(self):
+        """Typed DID decoders (decoders.DecoderTable), compiled on first use."""
+        if self._decoders is None:
+            from Project.Common.decoders import load_table
+            self._decoders = load_table(self._load(self.decoder_module) if self.decoder_module else None)
+        return self._decoders
+
+    def conditions(self, script_name: str) -> Dict[str, str]:
+        """The script's ID_CONDITIONS (condition name -> byte pattern), {} if it has none."""
+        module = self.condition_modules.get(script_name)
+        return self._load(module).ID_CONDITIONS if module else {}
+
+    def condition_matrix(self, script_name: str):
+        """record_check.ConditionMatrix of the script's ID_CONDITIONS, built once."""
+        matrix = self._matrices.get(script_name)
+        if matrix is None:
+            from Project.Common.record_check import ConditionMatrix
+            matrix = self._matrices[script_name] = ConditionMatrix(self.conditions(script_name))
+        return matrix
+
+    def conditions_at(self, script_name: str, position: int) -> List[str]:
+        """
+        Condition names whose ID_CONDITIONS pattern has a non-"00" byte at
+        `position`. The per-script index is built once instead of re-splitting
+        every pattern for every Tx line.
+        """
+        index = self._position_index.get(script_name)
+        if index is None:
+            index = {}
+            for key, value in self.conditions(script_name).items():
+                for i, part in enumerate(value.split()):
+                    if part != "00":
+                        index.setdefault(i, []).append(key)
+            self._position_index[script_name] = index
+        return index.get(position, [])
+
+
+UPP = Profile(
+    name="UPP",
+    device="UPP",
+    channel="51",
+    scripts=[
+        "Standard_Identifiers",
+        "TrueDriveManager",
+        "CanConfig_103",
+        "Faults_Configuration",
+        "Network_F1D5",
+        "Network_Missmatch_F1D3",
+        "Network_TimeOut_F1D2",
+        "Routine_Control",
+        "Generetic_ECU_Read",
+    ],
+    condition_modules={
+        "Network_TimeOut_F1D2": "id_conditions_F1D2",
+        "Network_Missmatch_F1D3": "id_conditions_F1D3",
+        "Faults_Configuration": "id_conditions_Fault_Config",
+        "TrueDriveManager": "id_conditions_TrueDrive",
+        "Routine_Control": "id_conditions_Routine",
+        "Network_F1D5": "id_conditions_F1D5",
+        "CanConfig_103": "id_conditions_CanConfig_103",
+    },
+    generic_module="id_Standart_Generetic",
+    srd_file="HD-UP-ICD-242601-UDID.xlsx",
+)
+
+NEWGEN = Profile(
+    name="NewGen",
+    device="NewGen",
+    channel="51",
+    scripts=["Standard_Identifiers"],
+    condition_modules={
+        "Network_Management": "id_conditions_Network_Management",
+    },
+    generic_module="id_Standard_Generetic",
+    srd_file="New Gen D-6 Microcontroller UDS DIDs.xlsx",
+    can_ids=(0x1CFFFEF9, 0x1CFFF9FE),
+)
+
+PROFILES: Dict[str, Profile] = {p.name: p for p in (UPP, NEWGEN)}
+
+
+def get_profile(name: str) -> Profile:
+    try:
+        return PROFILES[name]
+    except KeyError:
+        raise ValueError(f"Unknown project profile {name!r} (known: {', '.join(PROFILES)})")
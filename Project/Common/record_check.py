@@ -0,0 +1,87 @@
+# record_check.py
+"""
+Write/readback check of the packed configuration records (078F, F1D3, ...).
+
+The engine used to take the first non-zero byte of a 2E write, look up the
+conditions at that one position and compare write and readback with the zero
+bytes dropped. A write touching several fields reported only the first one,
+and 0x01 0x00 compared equal to 0x00 0x01.
+
+Here the script's ID_CONDITIONS become a conditions x positions bool matrix
+(a pattern byte != "00" marks the condition's positions). Write and readback
+are uint8 arrays; write XOR readback gives the mismatches and np.flatnonzero
+of (write | XOR) the positions that were written or came back different. The
+matrix columns of those positions give every affected condition at once:
+
+    affected = written or mismatched at one of the condition's positions
+    failed   = mismatched at one of the condition's positions
+
+Readback differences at positions no condition covers are reported as
+"Unknown Condition", like a write no condition covers.
+"""
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+UNKNOWN_CONDITION = "Unknown Condition"
+
+
+def as_array(data, width: int) -> np.ndarray:
+    """Record bytes as a uint8 array zero-padded to `width`."""
+    out = np.zeros(width, dtype=np.uint8)
+    raw = np.frombuffer(bytes(data), dtype=np.uint8)
+    out[:len(raw)] = raw
+    return out
+
+
+class ConditionMatrix:
+    def __init__(self, conditions: Dict[str, str]):
+        self.names = list(conditions)
+        patterns = [value.split() for value in conditions.values()]
+        self.width = max((len(p) for p in patterns), default=0)
+        self.mask = np.zeros((len(patterns), self.width), dtype=bool)
+        for row, pattern in enumerate(patterns):
+            self.mask[row, :len(pattern)] = [part != "00" for part in pattern]
+        # Positions at least one condition owns
+        self.covered = self.mask.any(axis=0)
+
+    def __len__(self):
+        return len(self.names)
+
+    def check(self, tx_data, rx_data) -> List[Tuple[str, int, bool]]:
+        """
+        (condition, position, passed) for every condition the write touches or
+        the readback changes. `position` is the condition's first written (else
+        first mismatching) byte, for decoding its value.
+        """
+        tx = np.frombuffer(tx_data, dtype=np.uint8)
+        rx = np.frombuffer(rx_data, dtype=np.uint8)
+        if len(tx) != self.width or len(rx) != self.width:
+            width = max(len(tx), len(rx), self.width)
+            tx, rx = as_array(tx, width), as_array(rx, width)
+        diff = tx ^ rx
+        changed = np.flatnonzero(tx | diff)        # written or mismatched
+        if not changed.size:
+            return []
+        written = (tx[changed] != 0).tolist()
+        mismatched = (diff[changed] != 0).tolist()
+        inside = changed < self.width
+        cols = changed[inside]                      # a prefix of `changed`, so zip() lines up
+        # conditions x changed positions; normally a handful of columns
+        owned = self.mask[:, cols]
+
+        results = []
+        for row in np.flatnonzero(owned.any(axis=1)).tolist():
+            own = owned[row].tolist()
+            hits = [c for c, o, w in zip(cols.tolist(), own, written) if o and w]
+            misses = [c for c, o, m in zip(cols.tolist(), own, mismatched) if o and m]
+            results.append((self.names[row], (hits or misses)[0], not misses))
+
+        covered = np.zeros(len(changed), dtype=bool)
+        covered[inside] = self.covered[cols]
+        loose = [int(c) for c, cov, m in zip(changed.tolist(), covered.tolist(), mismatched) if m and not cov]
+        if not results:
+            results.append((UNKNOWN_CONDITION, int(changed[0]), not any(mismatched)))
+        elif loose:
+            results.append((UNKNOWN_CONDITION, loose[0], False))
+        return results
@@ -0,0 +1,242 @@
+# results_store.py
+"""
+SQLite store for parsed UDS results, shared by the UPP and NewGen parsers.
+
+Every matched record of a parse run (script, DID, condition, converted value,
+raw bytes, status) is buffered by a ResultsRecorder and written in a single
+transaction together with the F195 version of the run. Indexes on
+(did, run_id) and (script, did, condition, run_id) keep "history of DID X" and
+"what changed between two versions" in the millisecond range even with
+hundreds of runs.
+
+    python -m Project.Common.results_store runs --device UPP
+    python -m Project.Common.results_store history F195 --device UPP
+    python -m Project.Common.results_store changed 03.02.00 03.02.02 --device UPP
+"""
+import argparse
+import os
+import sqlite3
+from contextlib import closing
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# =========================
+# ======  CONFIG  =========
+# =========================
+
+# Repo root by default; UDS_RESULTS_DB points it somewhere else (e.g. a bench-local disk)
+DB_PATH = Path(os.environ.get("UDS_RESULTS_DB", Path(__file__).resolve().parents[2] / "uds_results.db"))
+
+STATUS_PASS = "PASS"
+STATUS_FAIL = "FAIL"
+STATUS_READ = "READ"
+STATUS_NRC = "NRC"
+STATUS_NO_RESPONSE = "NO_RESPONSE"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id        INTEGER PRIMARY KEY,
+    device    TEXT NOT NULL,
+    version   TEXT,
+    started   TEXT NOT NULL,
+    log_file  TEXT
+);
+CREATE TABLE IF NOT EXISTS records (
+    id        INTEGER PRIMARY KEY,
+    run_id    INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    script    TEXT NOT NULL,
+    did       TEXT NOT NULL,
+    condition TEXT NOT NULL DEFAULT '',
+    value     TEXT,
+    raw       TEXT,
+    status    TEXT NOT NULL,
+    ts        TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_runs_device_version ON runs(device, version, id);
+CREATE INDEX IF NOT EXISTS ix_records_run ON records(run_id);
+CREATE INDEX IF NOT EXISTS ix_records_did ON records(did, run_id);
+CREATE INDEX IF NOT EXISTS ix_records_key ON records(script, did, condition, run_id);
+"""
+
+
+def connect(db_path: Path = DB_PATH) -> sqlite3.Connection:
+    """Open the store; the caller closes it (`with closing(connect()) as conn`)."""
+    conn = sqlite3.connect(str(db_path))
+    try:
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA foreign_keys = ON")
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.executescript(SCHEMA)
+    except sqlite3.Error:
+        conn.close()
+        raise
+    return conn
+
+
+# =========================
+# ======  WRITING  ========
+# =========================
+
+class ResultsRecorder:
+    """
+    Collects the records of one parse run and stores them with commit().
+
+    The F195 version is usually only known once Standard_Identifiers has been
+    analysed, so records are buffered and the run row is written at the end.
+    """
+
+    def __init__(self, device: str, log_file: Optional[str] = None,
+                 version: Optional[str] = None, db_path: Path = DB_PATH):
+        self.device = device
+        self.log_file = log_file
+        self.version = version
+        self.db_path = db_path
+        self.started = datetime.now().isoformat(timespec="seconds")
+        self.rows: List[Tuple] = []
+
+    def set_version(self, version: str) -> None:
+        self.version = version
+
+    def record(self, script: str, did: Optional[str], condition: Optional[str], value, raw: str,
+               status: str) -> None:
+        if isinstance(script, tuple):
+            script = script[0]
+        self.rows.append((script, did or "Unknown", condition or "", None if value is None else str(value),
+                          raw, status, datetime.now().isoformat(timespec="seconds")))
+
+    def commit(self) -> Optional[int]:
+        """Write the run and its records; returns the run id (None if nothing was recorded)."""
+        if not self.rows:
+            return None
+        try:
+            # closing() closes the connection, the inner `with conn` commits or rolls back
+            with closing(connect(self.db_path)) as conn, conn:
+                cur = conn.execute(
+                    "INSERT INTO runs (device, version, started, log_file) VALUES (?, ?, ?, ?)",
+                    (self.device, self.version, self.started, self.log_file))
+                run_id = cur.lastrowid
+                conn.executemany(
+                    "INSERT INTO records (run_id, script, did, condition, value, raw, status, ts) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(run_id,) + row for row in self.rows])
+        except sqlite3.Error as e:
+            print(f"[WARN] Could not store results in {self.db_path}: {e}")
+            return None
+        print(f"[INFO] Stored {len(self.rows)} record(s) as run {run_id} "
+              f"({self.device} {self.version or 'unknown version'}) in {self.db_path}")
+        self.rows = []
+        return run_id
+
+
+# =========================
+# ======  QUERIES  ========
+# =========================
+
+def list_runs(conn: sqlite3.Connection, device: Optional[str] = None) -> List[sqlite3.Row]:
+    sql = ("SELECT r.id, r.device, r.version, r.started, r.log_file, COUNT(x.id) AS records, "
+           "SUM(x.status IN ('FAIL', 'NRC', 'NO_RESPONSE')) AS failures "
+           "FROM runs r LEFT JOIN records x ON x.run_id = r.id")
+    args: Tuple = ()
+    if device:
+        sql += " WHERE r.device = ?"
+        args = (device,)
+    return conn.execute(sql + " GROUP BY r.id ORDER BY r.id", args).fetchall()
+
+
+def latest_run_id(conn: sqlite3.Connection, device: str, version: str) -> Optional[int]:
+    row = conn.execute("SELECT MAX(id) FROM runs WHERE device = ? AND version = ?",
+                       (device, version)).fetchone()
+    return row[0] if row else None
+
+
+def did_history(conn: sqlite3.Connection, did: str, device: Optional[str] = None) -> List[sqlite3.Row]:
+    sql = ("SELECT r.id AS run_id, r.version, r.started, x.script, x.condition, x.value, x.raw, x.status "
+           "FROM records x JOIN runs r ON r.id = x.run_id WHERE x.did = ?")
+    args: Tuple = (did.upper(),)
+    if device:
+        sql += " AND r.device = ?"
+        args += (device,)
+    return conn.execute(sql + " ORDER BY r.id, x.id", args).fetchall()
+
+
+def run_records(conn: sqlite3.Connection, run_id: int) -> Dict[Tuple[str, str, str], sqlite3.Row]:
+    """Records of one run keyed by (script, did, condition); the last occurrence wins."""
+    rows = conn.execute("SELECT script, did, condition, value, raw, status FROM records "
+                        "WHERE run_id = ? ORDER BY id", (run_id,)).fetchall()
+    return {(r["script"], r["did"], r["condition"]): r for r in rows}
+
+
+Change = Tuple[Tuple[str, str, str], Optional[sqlite3.Row], Optional[sqlite3.Row]]
+
+
+def changed_records(conn: sqlite3.Connection, old_run_id: int, new_run_id: int) -> List[Change]:
+    """(key, old_row, new_row) for every key whose value/status differs between two runs."""
+    old, new = run_records(conn, old_run_id), run_records(conn, new_run_id)
+    out = []
+    for key in sorted(set(old) | set(new)):
+        a, b = old.get(key), new.get(key)
+        if a is None or b is None or (a["value"], a["status"]) != (b["value"], b["status"]):
+            out.append((key, a, b))
+    return out
+
+
+def changed_between(conn: sqlite3.Connection, device: str, old_version: str, new_version: str) -> List[Change]:
+    """changed_records() between the latest runs of two versions."""
+    old_id = latest_run_id(conn, device, old_version)
+    new_id = latest_run_id(conn, device, new_version)
+    missing = [v for v, i in ((old_version, old_id), (new_version, new_id)) if i is None]
+    if missing:
+        raise LookupError(f"No stored {device} run for version(s): {', '.join(missing)}")
+    return changed_records(conn, old_id, new_id)
+
+
+def _fmt(row: Optional[sqlite3.Row]) -> str:
+    return "-" if row is None else f"{row['value']} [{row['status']}]"
+
+
+def _main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Query the UDS results store")
+    ap.add_argument("--db", type=Path, default=DB_PATH)
+    ap.add_argument("--device", default=None, help="UPP / NewGen")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("runs", help="List stored runs")
+    p = sub.add_parser("history", help="Values of one DID over all runs")
+    p.add_argument("did")
+    p = sub.add_parser("changed", help="Records that differ between two versions")
+    p.add_argument("old_version")
+    p.add_argument("new_version")
+    args = ap.parse_args(argv)
+
+    t0 = time.perf_counter()
+    conn = connect(args.db)
+    try:
+        if args.cmd == "runs":
+            for r in list_runs(conn, args.device):
+                print(f"{r['id']:>5}  {r['device']:<7} {r['version'] or '?':<12} {r['started']}  "
+                      f"{r['records']:>5} records, {r['failures'] or 0} failing")
+        elif args.cmd == "history":
+            for r in did_history(conn, args.did, args.device):
+                print(f"{r['run_id']:>5}  {r['version'] or '?':<12} {r['script']:<24} "
+                      f"{r['condition'][:30]:<30} {r['value']} [{r['status']}]")
+        elif args.cmd == "changed":
+            if not args.device:
+                ap.error("changed needs --device")
+            try:
+                rows = changed_between(conn, args.device, args.old_version, args.new_version)
+            except LookupError as e:
+                print(f"[ERROR] {e}")
+                return 1
+            for (script, did, cond), a, b in rows:
+                print(f"{script:<24} {did:<6} {cond[:30]:<30} {_fmt(a)}  ->  {_fmt(b)}")
+            print(f"{len(rows)} difference(s)")
+    finally:
+        conn.close()
+    print(f"({(time.perf_counter() - t0) * 1000:.1f} ms)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(_main())
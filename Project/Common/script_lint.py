@@ -0,0 +1,341 @@
+# script_lint.py
+"""
+Static checks and run-time estimate for UdsClient .script files.
+
+The script language is line based:
+
+    # comment
+    send <hex bytes>        one UDS request (tokens may hold several bytes: "2E 078F 00 ...",
+                            a quoted token is sent as ASCII: send 2E F199 "150325")
+    sleep <ms>              pause
+    linedelay <ms>          pause after every following send / security line
+    tester on|off           TesterPresent keep-alive
+    security <level>        SecurityAccess seed/key exchange
+
+Every line is parsed without touching the bench. Errors are things the client
+or the ECU will reject (unknown command, bad hex, wrong request length, a 2E
+write whose payload does not match the script's condition table). Warnings
+are things that run but are probably not what was meant (runaway sleeps,
+security outside an extended session, a write whose changed byte has no
+condition, a DID missing from the generic table).
+
+The estimate adds up sleeps, linedelays, one round trip per request and the
+expected P2 timeouts (requests with the suppress-positive-response bit, plus
+the 'No response from ECU' count of the last stored run of that script).
+
+    python -m Project.Common.script_lint --project UPP
+    python -m Project.Common.script_lint --project UPP Project/UPP/Scripts/Faults_Configuration.script
+"""
+import argparse
+import re
+import sqlite3
+import sys
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from Project.Common.profiles import IDENTIFIER_SCRIPTS, PROFILES, REPO_ROOT, Profile
+from Project.Common.results_store import DB_PATH, STATUS_NO_RESPONSE
+
+sys.path.append(str(REPO_ROOT))
+from uds_shards import load_durations
+
+# =========================
+# ======  CONFIG  =========
+# =========================
+
+# Same budget as TIMEOUT_SINGLE_RUN in update_copy_and_run_upp.py
+BUDGET_SECONDS = 3600
+
+# Typical request -> response round trip through UdsClient_CL (ms)
+REQUEST_MS = 60
+
+# Client wait before 'No response from ECU' (ms)
+P2_TIMEOUT_MS = 1000
+
+# Sleeps / linedelays above this are reported as suspicious (ms)
+SLEEP_WARN_MS = 5000
+LINEDELAY_WARN_MS = 1000
+
+HEX_RE = re.compile(r"^(?:[0-9A-Fa-f]{2})+$")
+TOKEN_RE = re.compile(r'"[^"]*"|\S+')
+
+# SID -> (min, max) request bytes after the SID; max None = open ended
+SERVICE_LENGTHS = {
+    0x10: (1, 1),     # DiagnosticSessionControl
+    0x11: (1, 1),     # ECUReset
+    0x14: (3, 3),     # ClearDiagnosticInformation
+    0x19: (1, None),  # ReadDTCInformation
+    0x22: (2, None),  # ReadDataByIdentifier (pairs of DID bytes)
+    0x27: (1, None),  # SecurityAccess
+    0x28: (2, 2),     # CommunicationControl
+    0x2E: (3, None),  # WriteDataByIdentifier (DID + data)
+    0x2F: (3, None),  # InputOutputControlByIdentifier
+    0x31: (3, None),  # RoutineControl (sub-function + RID)
+    0x3E: (1, 1),     # TesterPresent
+    0x83: (1, None),  # AccessTimingParameter
+    0x85: (1, None),  # ControlDTCSetting
+}
+
+# Services whose first byte is a sub-function (bit 7 = suppress positive response)
+SUBFUNCTION_SERVICES = {0x10, 0x11, 0x19, 0x27, 0x28, 0x31, 0x3E, 0x83, 0x85}
+
+
+class Issue:
+    def __init__(self, line_no: int, level: str, message: str):
+        self.line_no = line_no
+        self.level = level
+        self.message = message
+
+    def __str__(self):
+        return f"line {self.line_no}: {self.message}"
+
+
+class ScriptReport:
+    """Lint result and cost estimate of one .script file."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.name = self.path.stem
+        self.issues: List[Issue] = []
+        self.sends = 0
+        self.security = 0
+        self.sleep_ms = 0
+        self.linedelay_ms = 0
+        self.suppressed = 0
+        self.no_response = 0
+
+    def add(self, line_no: int, level: str, message: str) -> None:
+        self.issues.append(Issue(line_no, level, message))
+
+    @property
+    def errors(self) -> List[Issue]:
+        return [i for i in self.issues if i.level == "ERROR"]
+
+    @property
+    def warnings(self) -> List[Issue]:
+        return [i for i in self.issues if i.level == "WARN"]
+
+    @property
+    def request_ms(self) -> int:
+        # SecurityAccess is a seed request plus a key request
+        return (self.sends + 2 * self.security) * REQUEST_MS
+
+    @property
+    def p2_ms(self) -> int:
+        return (self.suppressed + self.no_response) * P2_TIMEOUT_MS
+
+    @property
+    def total_seconds(self) -> float:
+        return (self.sleep_ms + self.linedelay_ms + self.request_ms + self.p2_ms) / 1000.0
+
+
+def parse_bytes(text: str) -> Optional[List[int]]:
+    """'2E 078F 00' -> [0x2E, 0x07, 0x8F, 0x00], '"AB"' -> [0x41, 0x42]; None on bad hex."""
+    data = []
+    for tok in TOKEN_RE.findall(text):
+        if tok.startswith('"') and tok.endswith('"') and len(tok) > 1:
+            data.extend(tok[1:-1].encode("ascii", errors="replace"))
+        elif HEX_RE.match(tok):
+            data.extend(int(tok[i:i + 2], 16) for i in range(0, len(tok), 2))
+        else:
+            return None
+    return data
+
+
+def _parse_ms(report: ScriptReport, line_no: int, cmd: str, args: List[str]) -> Optional[int]:
+    if len(args) != 1 or not args[0].isdigit():
+        report.add(line_no, "ERROR", f"'{cmd}' needs one value in ms, got {' '.join(args) or 'nothing'}")
+        return None
+    return int(args[0])
+
+
+def _expected_lengths(profile: Profile, script_name: str) -> Optional[int]:
+    """Most common pattern length (bytes) of the script's condition table."""
+    module = profile.condition_modules.get(script_name)
+    if not module:
+        return None
+    lengths = Counter(len(v.split()) for v in profile._load(module).ID_CONDITIONS.values())
+    return lengths.most_common(1)[0][0] if lengths else None
+
+
+def _check_send(report: ScriptReport, line_no: int, data: List[int], profile: Optional[Profile],
+                expected_len: Optional[int], generic: Dict[str, str]) -> None:
+    sid, body = data[0], data[1:]
+    limits = SERVICE_LENGTHS.get(sid)
+    if limits is None:
+        report.add(line_no, "WARN", f"unknown service 0x{sid:02X}")
+        return
+    lo, hi = limits
+    if len(body) < lo or (hi is not None and len(body) > hi):
+        want = f"{lo}" if lo == hi else f"at least {lo}" if hi is None else f"{lo}-{hi}"
+        report.add(line_no, "ERROR", f"service 0x{sid:02X} takes {want} byte(s) after the SID, got {len(body)}")
+        return
+
+    if sid in SUBFUNCTION_SERVICES and body[0] & 0x80:
+        report.suppressed += 1
+
+    if sid == 0x22:
+        if len(body) % 2:
+            report.add(line_no, "ERROR", f"0x22 needs whole 2-byte DIDs, got {len(body)} byte(s)")
+            return
+        if generic and report.name in IDENTIFIER_SCRIPTS:
+            for i in range(0, len(body), 2):
+                did = f"{body[i]:02X}{body[i + 1]:02X}"
+                if did not in generic:
+                    report.add(line_no, "WARN", f"DID {did} not in {profile.generic_module}, "
+                                                f"will be reported as 'Unknown DID'")
+
+    elif sid == 0x2E and expected_len is not None:
+        did, payload = f"{body[0]:02X}{body[1]:02X}", body[2:]
+        if len(payload) != expected_len:
+            report.add(line_no, "ERROR", f"write to {did} has {len(payload)} data byte(s), "
+                                         f"{profile.condition_modules[report.name]} expects {expected_len}")
+            return
+        position = next((i for i, b in enumerate(payload) if b), -1)
+        if position >= 0 and not profile.conditions_at(report.name, position):
+            report.add(line_no, "WARN", f"write to {did} changes byte {position}, which has no condition "
+                                        f"(parsed as 'Unknown Condition')")
+
+
+class Command:
+    """One non-comment line of a .script file; `data` holds the request bytes of a send."""
+
+    def __init__(self, line_no: int, cmd: str, args: List[str], data: Optional[List[int]] = None):
+        self.line_no = line_no
+        self.cmd = cmd
+        self.args = args
+        self.data = data
+
+    def __repr__(self):
+        return f"Command({self.line_no}, {self.cmd!r}, {self.args!r})"
+
+
+def parse_script(path: Path) -> List[Command]:
+    commands = []
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for line_no, raw in enumerate(f, start=1):
+            line = raw.strip()
+            if not line or line.startswith("#"):
+                continue
+            cmd, *args = line.split()
+            data = parse_bytes(line[len(cmd):]) if cmd.lower() == "send" else None
+            commands.append(Command(line_no, cmd.lower(), args, data))
+    return commands
+
+
+def lint_script(path: Path, profile: Optional[Profile] = None) -> ScriptReport:
+    report = ScriptReport(path)
+    expected_len = _expected_lengths(profile, report.name) if profile else None
+    generic = profile.generic_conditions() if profile else {}
+
+    linedelay = 0
+    extended_session = False
+    for c in parse_script(path):
+        line_no, cmd, args, data = c.line_no, c.cmd, c.args, c.data
+        if cmd == "send":
+            if not data:
+                report.add(line_no, "ERROR", f"bad request bytes: {' '.join(args) or 'nothing'}")
+                continue
+            report.sends += 1
+            report.linedelay_ms += linedelay
+            _check_send(report, line_no, data, profile, expected_len, generic)
+            if data[0] == 0x10 and len(data) > 1:
+                extended_session = (data[1] & 0x7F) != 0x01
+            elif data[0] == 0x11:
+                extended_session = False
+        elif cmd == "sleep":
+            ms = _parse_ms(report, line_no, cmd, args)
+            if ms is not None:
+                report.sleep_ms += ms
+                if ms > SLEEP_WARN_MS:
+                    report.add(line_no, "WARN", f"sleep {ms} ms (over {SLEEP_WARN_MS} ms)")
+        elif cmd == "linedelay":
+            ms = _parse_ms(report, line_no, cmd, args)
+            if ms is not None:
+                linedelay = ms
+                if ms > LINEDELAY_WARN_MS:
+                    report.add(line_no, "WARN", f"linedelay {ms} ms (over {LINEDELAY_WARN_MS} ms, "
+                                                f"applies to every following request)")
+        elif cmd == "tester":
+            if len(args) != 1 or args[0].lower() not in ("on", "off"):
+                report.add(line_no, "ERROR", f"'tester' needs on/off, got {' '.join(args) or 'nothing'}")
+        elif cmd == "security":
+            if len(args) != 1 or not args[0].isdigit():
+                report.add(line_no, "ERROR", f"'security' needs a level, got {' '.join(args) or 'nothing'}")
+                continue
+            report.security += 1
+            report.linedelay_ms += linedelay
+            if not extended_session:
+                report.add(line_no, "WARN", "security access in the default session (no 10 02/03 before it)")
+        else:
+            report.add(line_no, "ERROR", f"unknown command '{cmd}'")
+    return report
+
+
+def count_no_response(profile: Profile, reports: List[ScriptReport], db_path: Path = DB_PATH) -> None:
+    """Fill `no_response` from the last stored run of the profile's device (if any)."""
+    if not Path(db_path).is_file():
+        return
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        rows = conn.execute(
+            "SELECT script, COUNT(*) FROM records WHERE status = ? AND run_id = "
+            "(SELECT MAX(id) FROM runs WHERE device = ?) GROUP BY script",
+            (STATUS_NO_RESPONSE, profile.device)).fetchall()
+    except sqlite3.Error:
+        return
+    finally:
+        conn.close()
+    counts = dict(rows)
+    for r in reports:
+        r.no_response = counts.get(r.name, 0)
+
+
+def lint_scripts(paths: List[Path], profile: Optional[Profile] = None, use_store: bool = True) -> List[ScriptReport]:
+    reports = [lint_script(p, profile) for p in paths]
+    if profile and use_store:
+        count_no_response(profile, reports)
+    return reports
+
+
+def print_reports(reports: List[ScriptReport], budget: int = BUDGET_SECONDS) -> None:
+    measured = load_durations()
+    for r in reports:
+        for issue in r.issues:
+            print(f"[{issue.level}] {r.path.name} {issue}")
+
+    total = sum(r.total_seconds for r in reports)
+    print(f"\n{'Script':<26}{'est s':>8}{'last s':>8}{'sleep':>8}{'delay':>8}{'req':>7}{'P2':>6}{'budget':>8}")
+    for r in sorted(reports, key=lambda x: x.total_seconds, reverse=True):
+        last = measured.get(r.name)
+        print(f"{r.name:<26}{r.total_seconds:>8.1f}{'-' if last is None else f'{last:.0f}':>8}"
+              f"{r.sleep_ms / 1000:>8.1f}{r.linedelay_ms / 1000:>8.1f}{r.sends + r.security:>7}"
+              f"{r.suppressed + r.no_response:>6}{100 * r.total_seconds / budget:>7.1f}%")
+    errors = sum(len(r.errors) for r in reports)
+    warnings = sum(len(r.warnings) for r in reports)
+    print(f"{'TOTAL':<26}{total:>8.1f}  of {budget} s budget ({100 * total / budget:.1f}%), "
+          f"{errors} error(s), {warnings} warning(s)")
+
+
+def _main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Lint .script files and estimate their run time")
+    ap.add_argument("scripts", nargs="*", type=Path, help="Default: the profile's script list")
+    ap.add_argument("--project", choices=sorted(PROFILES), required=True)
+    ap.add_argument("--budget", type=int, default=BUDGET_SECONDS, help="Run budget in seconds")
+    ap.add_argument("--no-store", action="store_true", help="Ignore 'No response' counts from the results store")
+    args = ap.parse_args(argv)
+
+    profile = PROFILES[args.project]
+    paths = args.scripts or profile.script_paths()
+    missing = [str(p) for p in paths if not p.is_file()]
+    if missing:
+        print("[ERROR] Missing .script file(s):\n  " + "\n  ".join(missing))
+        return 1
+    reports = lint_scripts(paths, profile, use_store=not args.no_store)
+    print_reports(reports, args.budget)
+    return 1 if any(r.errors for r in reports) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(_main())
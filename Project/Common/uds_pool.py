@@ -0,0 +1,293 @@
+# uds_pool.py
+"""
+Read the same DIDs / DTCs from many ECUs at once.
+
+The DTC tools talk to one hard-coded ECU (UPP 0x7D0/0x7D8, NewGen
+0x1CFFFEF9/0x1CFFF9FE). A vehicle-level bench has several MCUs on different
+IDs or CAN channels, and reading them one after another costs the sum of
+their response times.
+
+UdsPool opens one UdsSession (uds_session.py) per ECU: its own ISO-TP stack
+on its address, sharing one bus + notifier per channel, each with its own
+TesterPresent. A snapshot runs every ECU's request sequence concurrently
+(asyncio.gather); requests to one ECU stay in order. The blocking ISO-TP
+calls run in a thread pool sized for the fleet, so a snapshot takes about as
+long as the slowest ECU, not the sum.
+
+ECUs file (JSON); tx_id / rx_id default to the device profile's can_ids:
+    [
+      {"name": "MCU_front", "device": "UPP",    "channel": "PCAN_USBBUS1"},
+      {"name": "MCU_rear",  "device": "UPP",    "channel": "PCAN_USBBUS1", "tx_id": "0x7D1", "rx_id": "0x7D9"},
+      {"name": "NG",        "device": "NewGen", "channel": "PCAN_USBBUS2"}
+    ]
+
+    python -m Project.Common.uds_pool --ecus ecus.json --session 03 --read F195 F18C --dtc
+    python -m Project.Common.uds_pool --fake 6 --read F195 F18C --out snapshot.json
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from Project.Common.profiles import PROFILES
+from Project.Common.uds_session import (CAN_INTERFACE, BITRATE, KEEPALIVE_S, FakeEcu, IsoTpTransport, UdsError,
+                                        UdsSession, can)
+
+# =========================
+# ======  CONFIG  =========
+# =========================
+
+# Response time of the --fake ECUs (s)
+FAKE_LATENCY_S = 0.02
+
+
+class EcuTarget:
+    def __init__(self, name: str, device: str, channel: str, tx_id: int, rx_id: int):
+        self.name = name
+        self.device = device
+        self.channel = channel
+        self.tx_id = tx_id
+        self.rx_id = rx_id
+
+    def __repr__(self):
+        return f"EcuTarget({self.name!r}, {self.channel}, 0x{self.tx_id:X}/0x{self.rx_id:X})"
+
+
+def _can_id(value) -> int:
+    return int(value, 16) if isinstance(value, str) else int(value)
+
+
+def load_ecus(path: Path) -> List[EcuTarget]:
+    with open(path, "r", encoding="utf-8") as f:
+        entries = json.load(f)
+    if not isinstance(entries, list) or not entries:
+        raise ValueError(f"{path}: expected a non-empty JSON list of ECUs")
+
+    targets = []
+    for i, e in enumerate(entries):
+        missing = [k for k in ("device", "channel") if not e.get(k)]
+        if missing:
+            raise ValueError(f"ECU #{i + 1} is missing: {', '.join(missing)}")
+        profile = PROFILES.get(e["device"])
+        if profile is None:
+            raise ValueError(f"ECU #{i + 1}: unknown device '{e['device']}' (expected one of {', '.join(PROFILES)})")
+        tx_id = _can_id(e.get("tx_id", profile.can_ids[0]))
+        rx_id = _can_id(e.get("rx_id", profile.can_ids[1]))
+        targets.append(EcuTarget(e.get("name") or f"{e['device']}_{tx_id:X}", e["device"], str(e["channel"]),
+                                 tx_id, rx_id))
+    names = [t.name for t in targets]
+    dupes = {n for n in names if names.count(n) > 1}
+    if dupes:
+        raise ValueError(f"{path}: duplicate ECU name(s): {', '.join(sorted(dupes))}")
+    return targets
+
+
+def fake_targets(n: int) -> List[EcuTarget]:
+    return [EcuTarget(f"FAKE{i}", "UPP", "fake", 0x7D0 + i, 0x7D8 + i) for i in range(1, n + 1)]
+
+
+# =========================
+# ========= POOL ==========
+# =========================
+
+class UdsPool:
+    """One UdsSession per ECU; every fleet call runs all ECUs concurrently."""
+
+    def __init__(self, targets: List[EcuTarget], fake: bool = False, keepalive_s: float = KEEPALIVE_S):
+        self.targets = targets
+        self.fake = fake
+        self.keepalive_s = keepalive_s
+        self.sessions: Dict[str, UdsSession] = {}
+        # name -> wall time of that ECU's part of the last fleet call (s)
+        self.elapsed: Dict[str, float] = {}
+        self.last_call_s = 0.0
+        self._buses: Dict[str, tuple] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    async def open(self) -> "UdsPool":
+        # Every ECU can have a blocking send/recv in flight at the same time
+        self._executor = ThreadPoolExecutor(max_workers=2 * len(self.targets) + 4, thread_name_prefix="uds")
+        asyncio.get_running_loop().set_default_executor(self._executor)
+        for t in self.targets:
+            self.sessions[t.name] = UdsSession(self._transport(t), keepalive_s=self.keepalive_s)
+        await asyncio.gather(*(s.open() for s in self.sessions.values()))
+        return self
+
+    def _transport(self, t: EcuTarget):
+        if self.fake:
+            return FakeEcu(dids={0xF195: b"03.02.02", 0xF18C: f"SN{t.tx_id:05X}".encode()},
+                           latency=FAKE_LATENCY_S)
+        if t.channel not in self._buses:
+            if can is None:
+                raise UdsError("python-can / can-isotp are not installed (use --fake for a dry run)")
+            bus = can.Bus(interface=CAN_INTERFACE, channel=t.channel, bitrate=BITRATE)
+            self._buses[t.channel] = (bus, can.Notifier(bus, []))
+        bus, notifier = self._buses[t.channel]
+        return IsoTpTransport(channel=t.channel, tx_id=t.tx_id, rx_id=t.rx_id, bus=bus, notifier=notifier,
+                              device=t.device)
+
+    async def close(self) -> None:
+        await asyncio.gather(*(s.close() for s in self.sessions.values()), return_exceptions=True)
+        for bus, notifier in self._buses.values():
+            notifier.stop()
+            bus.shutdown()
+        self._buses.clear()
+
+    async def __aenter__(self):
+        return await self.open()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def each(self, fn) -> Dict[str, object]:
+        """fn(session) on every ECU concurrently -> {name: result or the exception it raised}."""
+        async def timed(name, session):
+            start = time.perf_counter()
+            try:
+                return await fn(session)
+            finally:
+                self.elapsed[name] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(timed(n, s) for n, s in self.sessions.items()), return_exceptions=True)
+        self.last_call_s = time.perf_counter() - start
+        return dict(zip(self.sessions, results))
+
+    async def change_session(self, session: int) -> Dict[str, object]:
+        return await self.each(lambda s: s.change_session(session))
+
+    async def read_dids(self, dids: List[int]) -> Dict[str, Dict[int, object]]:
+        """{ECU: {DID: data bytes or UdsError}}; one ECU failing a DID does not stop the rest."""
+        async def read_all(session):
+            out = {}
+            for did in dids:
+                try:
+                    out[did] = await session.read_did(did)
+                except UdsError as e:
+                    out[did] = e
+            return out
+
+        return await self.each(read_all)
+
+    async def read_dtcs(self, mask: int = 0xFF) -> Dict[str, object]:
+        return await self.each(lambda s: s.read_dtcs(mask))
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Per-ECU request latency (ms) over everything sent so far."""
+        out = {}
+        for name, session in self.sessions.items():
+            lat = sorted(x * 1000 for x in session.latencies)
+            if not lat:
+                out[name] = {"requests": 0}
+                continue
+            out[name] = {
+                "requests": len(lat),
+                "min_ms": round(lat[0], 1),
+                "median_ms": round(statistics.median(lat), 1),
+                "p95_ms": round(lat[min(len(lat) - 1, int(0.95 * len(lat)))], 1),
+                "max_ms": round(lat[-1], 1),
+            }
+        return out
+
+
+# =========================
+# ======  REPORTS  ========
+# =========================
+
+def _show(value) -> str:
+    if isinstance(value, Exception):
+        return f"ERR {value}"
+    text = bytes(value).rstrip(b"\x00")
+    if text and all(32 <= b <= 126 for b in text):
+        return text.decode("ascii")
+    return bytes(value).hex(" ").upper()
+
+
+def print_snapshot(pool: UdsPool, dids: Dict[str, object]) -> None:
+    names = list(pool.sessions)
+    for name in names:
+        result = dids[name]
+        if isinstance(result, Exception):
+            print(f"[ERROR] {name}: {result}")
+            continue
+        print(f"[INFO] {name}: " + ", ".join(f"{did:04X}={_show(v)}" for did, v in result.items()))
+    slowest = max(pool.elapsed.values(), default=0.0)
+    total = sum(pool.elapsed.values())
+    print(f"[INFO] Snapshot of {len(names)} ECU(s): {pool.last_call_s:.3f}s "
+          f"(slowest ECU {slowest:.3f}s, one after another ~{total:.3f}s)")
+
+
+def print_stats(pool: UdsPool) -> None:
+    print(f"\n{'ECU':<16}{'req':>6}{'min':>9}{'median':>9}{'p95':>9}{'max':>9}   (ms)")
+    for name, st in pool.stats().items():
+        if not st["requests"]:
+            print(f"{name:<16}{0:>6}")
+            continue
+        print(f"{name:<16}{st['requests']:>6}{st['min_ms']:>9}{st['median_ms']:>9}{st['p95_ms']:>9}{st['max_ms']:>9}")
+
+
+def _jsonable(value):
+    if isinstance(value, Exception):
+        return {"error": str(value)}
+    if isinstance(value, (bytes, bytearray)):
+        return bytes(value).hex(" ").upper()
+    if isinstance(value, dict):
+        return {(f"{k:04X}" if isinstance(k, int) else str(k)): _jsonable(v) for k, v in value.items()}
+    return value
+
+
+# =========================
+# ========= CLI ===========
+# =========================
+
+async def _run(args) -> int:
+    targets = fake_targets(args.fake) if args.fake else load_ecus(args.ecus)
+    snapshot = {}
+    async with UdsPool(targets, fake=bool(args.fake)) as pool:
+        if args.session:
+            for name, r in (await pool.change_session(args.session)).items():
+                if isinstance(r, Exception):
+                    print(f"[ERROR] {name}: session 0x{args.session:02X}: {r}")
+        if args.read:
+            snapshot["dids"] = await pool.read_dids(args.read)
+            print_snapshot(pool, snapshot["dids"])
+        if args.dtc:
+            snapshot["dtcs"] = await pool.read_dtcs()
+            for name, r in snapshot["dtcs"].items():
+                if isinstance(r, Exception):
+                    print(f"[ERROR] {name}: {r}")
+                else:
+                    print(f"[INFO] {name}: {len(r)} DTC(s) " + " ".join(f"{d:06X}/0x{s:02X}" for d, s in r.items()))
+        print_stats(pool)
+        snapshot["latency"] = pool.stats()
+    if args.out:
+        args.out.write_text(json.dumps(_jsonable(snapshot), indent=2), encoding="utf-8")
+        print(f"[INFO] Snapshot written to {args.out}")
+    return 0
+
+
+def _main(argv: Optional[List[str]] = None) -> int:
+    hex_int = lambda s: int(s, 16)
+    ap = argparse.ArgumentParser(description="Read DIDs / DTCs from many ECUs concurrently")
+    src = ap.add_mutually_exclusive_group(required=True)
+    src.add_argument("--ecus", type=Path, help="JSON list of ECUs")
+    src.add_argument("--fake", type=int, metavar="N", help="N fake ECUs (dry run)")
+    ap.add_argument("--session", type=hex_int, help="enter this session on every ECU first (e.g. 03)")
+    ap.add_argument("--read", nargs="*", type=hex_int, default=[], help="DIDs to read (hex)")
+    ap.add_argument("--dtc", action="store_true", help="read 19 02 FF from every ECU")
+    ap.add_argument("--out", type=Path, help="write the snapshot + latency stats as JSON")
+    args = ap.parse_args(argv)
+    try:
+        return asyncio.run(_run(args))
+    except (UdsError, ValueError) as e:
+        print(f"[ERROR] {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(_main())
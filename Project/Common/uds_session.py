@@ -0,0 +1,449 @@
+# uds_session.py
+"""
+asyncio UDS session for the Python-side tools, with a background TesterPresent.
+
+UdsClient_CL keeps the extended session alive with `tester on`; Python code
+that talks to the ECU itself (DTC polling, measurement loops, parameter
+sweeps) had nothing, so every pause longer than S3 (5 s) dropped the ECU back
+to the default session and locked it again.
+
+UdsSession runs a keepalive task next to the request traffic:
+
+  * 3E 80 (TesterPresent, suppress positive response) every KEEPALIVE_S,
+    scheduled against fixed deadlines on the loop clock, so a slow request
+    or a busy loop delays one tick instead of shifting every later one
+  * a tick that finds a request in flight is skipped; that request restarts
+    S3 on the ECU anyway
+  * paused() stops it around flashing or resets; reset() pauses by itself
+
+Requests are serialised with an asyncio.Lock; the blocking ISO-TP calls run
+in a worker thread (asyncio.to_thread), so the loop stays free for the
+keepalive and the caller's own tasks. 0x78 (response pending) extends the
+wait to P2*.
+
+    async with UdsSession(IsoTpTransport()) as uds:
+        await uds.change_session(0x03)
+        while measuring:
+            data = await uds.read_did(0xF1D3)
+            await asyncio.sleep(10)        # session stays open
+
+    python -m Project.Common.uds_session --fake --session 03 --read F195 F18C
+    python -m Project.Common.uds_session --session 03 --poll-dtc 120 --interval 10
+
+IsoTpTransport needs python-can and can-isotp (requirements.txt); FakeEcu
+answers like a bench ECU, including the S3 fallback, for dry runs.
+"""
+import argparse
+import asyncio
+import queue
+import sys
+import time
+from contextlib import asynccontextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+try:
+    import can
+    import isotp
+except ImportError:  # only the fake ECU is usable without python-can / can-isotp
+    can = isotp = None
+
+# =========================
+# ======  CONFIG  =========
+# =========================
+
+CAN_INTERFACE = "pcan"
+CAN_CHANNEL = "PCAN_USBBUS1"
+BITRATE = 500000
+
+# Physical request / response IDs (UPP, as in DTC/DTCTest.py); IDs above 0x7FF use 29-bit addressing
+TX_ID = 0x7D0
+RX_ID = 0x7D8
+
+# Fill byte of short frames (always DLC 8) unless the profile's ISO-TP tuning says otherwise
+TX_PADDING = 0x00
+
+# TesterPresent period; S3 on the ECU is 5 s
+KEEPALIVE_S = 2.0
+
+# Response timeouts: P2 (normal), P2* (after 0x78 response pending)
+P2_S = 1.0
+P2_STAR_S = 5.0
+
+# Time the ECU needs after 11 xx before it answers again
+RESET_WAIT_S = 1.0
+
+S3_S = 5.0
+DEFAULT_SESSION = 0x01
+TESTER_PRESENT = b"\x3E\x80"
+
+# Services whose first byte is a sub-function (bit 7 = suppress positive response)
+SUBFUNCTION_SERVICES = {0x10, 0x11, 0x19, 0x27, 0x28, 0x31, 0x3E, 0x83, 0x85}
+
+NRC_RESPONSE_PENDING = 0x78
+
+
+class UdsError(RuntimeError):
+    """No (valid) response from the ECU."""
+
+
+class NegativeResponse(UdsError):
+    def __init__(self, sid: int, nrc: int):
+        super().__init__(f"Negative response to 0x{sid:02X}: NRC 0x{nrc:02X}")
+        self.sid = sid
+        self.nrc = nrc
+
+
+# =========================
+# =====  TRANSPORTS  ======
+# =========================
+
+class IsoTpTransport:
+    """
+    Blocking ISO-TP link over python-can (one request / response at a time).
+    Several transports on one channel share its bus and notifier (uds_pool.py);
+    a transport only shuts down a bus it opened itself.
+    """
+
+    def __init__(self, interface: str = CAN_INTERFACE, channel: str = CAN_CHANNEL, bitrate: int = BITRATE,
+                 tx_id: int = TX_ID, rx_id: int = RX_ID, bus=None, notifier=None,
+                 params: Optional[Dict] = None, device: str = "UPP"):
+        if params is None:
+            # Per-profile sweep result (isotp_tuning.py); empty for untuned profiles
+            from Project.Common.isotp_tuning import tuned_params
+            params = tuned_params(device)
+        self.params = params
+        self.interface = interface
+        self.channel = channel
+        self.bitrate = bitrate
+        self.tx_id = tx_id
+        self.rx_id = rx_id
+        self.bus = bus
+        self.notifier = notifier
+        self._own_bus = bus is None
+        self.stack = None
+
+    def open(self) -> None:
+        if can is None or isotp is None:
+            raise UdsError("python-can / can-isotp are not installed (use --fake for a dry run)")
+        if self.bus is None:
+            self.bus = can.Bus(interface=self.interface, channel=self.channel, bitrate=self.bitrate)
+            self.notifier = can.Notifier(self.bus, [])
+        mode = isotp.AddressingMode.Normal_29bits if max(self.tx_id, self.rx_id) > 0x7FF \
+            else isotp.AddressingMode.Normal_11bits
+        address = isotp.Address(mode, txid=self.tx_id, rxid=self.rx_id)
+        self.stack = isotp.NotifierBasedCanStack(self.bus, self.notifier, address=address,
+                                                 params={"tx_padding": TX_PADDING, **self.params,
+                                                         "blocking_send": True})
+        self.stack.start()
+
+    def close(self) -> None:
+        if self.stack is not None:
+            self.stack.stop()
+            self.stack = None
+        if not self._own_bus:
+            return
+        if self.notifier is not None:
+            self.notifier.stop()
+            self.notifier = None
+        if self.bus is not None:
+            self.bus.shutdown()
+            self.bus = None
+
+    def send(self, payload: bytes) -> None:
+        self.stack.send(payload, send_timeout=P2_S)
+
+    def recv(self, timeout: float) -> Optional[bytes]:
+        data = self.stack.recv(block=True, timeout=timeout)
+        return bytes(data) if data is not None else None
+
+
+class FakeEcu:
+    """
+    Stand-in for IsoTpTransport that answers like the bench ECU: sessions with
+    an S3 fallback, seed/key security, ECU reset with a reboot time, 22 from
+    `dids`, 19 02 from `dtcs`. `requests` keeps (time, payload) of everything sent.
+    `pending` 0x78 (response pending) frames precede every answer but TesterPresent's.
+    """
+
+    def __init__(self, dids: Optional[Dict[int, bytes]] = None, dtcs: Optional[Dict[int, int]] = None,
+                 s3: float = S3_S, reboot: float = 0.5, latency: float = 0.0, pending: int = 0):
+        self.dids = dict(dids or {0xF195: b"03.02.02", 0xF18C: b"SN12345\x00"})
+        self.dtcs = dict(dtcs or {})
+        self.s3 = s3
+        self.reboot = reboot
+        self.latency = latency          # response time of every answer (s)
+        self.pending = pending
+        self.session = DEFAULT_SESSION
+        self.unlocked = None
+        self.requests: List[Tuple[float, bytes]] = []
+        self._last = time.monotonic()
+        self._booting_until = 0.0
+        self._responses: "queue.Queue[Tuple[float, bytes]]" = queue.Queue()
+
+    def open(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def send(self, payload: bytes) -> None:
+        now = time.monotonic()
+        self.requests.append((now, payload))
+        if now < self._booting_until:
+            return
+        if self.session != DEFAULT_SESSION and now - self._last > self.s3:
+            self.session, self.unlocked = DEFAULT_SESSION, None
+        self._last = now
+        response = self._answer(payload)
+        suppressed = payload[0] in SUBFUNCTION_SERVICES and len(payload) > 1 and payload[1] & 0x80
+        if response is not None and not (suppressed and response[0] != 0x7F):
+            if payload[0] != 0x3E:
+                for _ in range(self.pending):
+                    self._responses.put((now + self.latency, bytes([0x7F, payload[0], NRC_RESPONSE_PENDING])))
+            self._responses.put((now + self.latency, response))
+
+    def recv(self, timeout: float) -> Optional[bytes]:
+        try:
+            ready, response = self._responses.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        time.sleep(max(0.0, ready - time.monotonic()))
+        return response
+
+    def _answer(self, payload: bytes) -> Optional[bytes]:
+        sid = payload[0]
+        sub = payload[1] & 0x7F if len(payload) > 1 else None
+        if sid == 0x3E:
+            return bytes([0x7E, sub or 0])
+        if sid == 0x10:
+            self.session, self.unlocked = sub, None
+            return bytes([0x50, sub, 0x00, 0x32, 0x01, 0xF4])
+        if sid == 0x11:
+            self.session, self.unlocked = DEFAULT_SESSION, None
+            self._booting_until = time.monotonic() + self.reboot
+            return bytes([0x51, sub])
+        if sid == 0x27:
+            if self.session == DEFAULT_SESSION:
+                return bytes([0x7F, sid, 0x7F])
+            if sub % 2:
+                return bytes([0x67, sub, 0x12, 0x34, 0x56, 0x78])
+            self.unlocked = sub - 1
+            return bytes([0x67, sub])
+        if sid == 0x22:
+            out = bytearray([0x62])
+            for i in range(1, len(payload) - 1, 2):
+                did = int.from_bytes(payload[i:i + 2], "big")
+                if did in self.dids:
+                    out += payload[i:i + 2] + self.dids[did]
+            return bytes(out) if len(out) > 1 else bytes([0x7F, sid, 0x31])
+        if sid == 0x19 and sub == 0x02:
+            mask = payload[2] if len(payload) > 2 else 0xFF
+            out = bytearray([0x59, 0x02, 0xFF])
+            for dtc, status in self.dtcs.items():
+                if status & mask:
+                    out += dtc.to_bytes(3, "big") + bytes([status])
+            return bytes(out)
+        return bytes([0x7F, sid, 0x11])
+
+
+# =========================
+# ======  SESSION  ========
+# =========================
+
+class UdsSession:
+    """One ECU connection: serialised requests plus the TesterPresent task."""
+
+    def __init__(self, transport, keepalive_s: float = KEEPALIVE_S, p2_s: float = P2_S, p2_star_s: float = P2_STAR_S):
+        self.transport = transport
+        self.keepalive_s = keepalive_s
+        self.p2_s = p2_s
+        self.p2_star_s = p2_star_s
+        self.session = DEFAULT_SESSION
+        # Keepalive statistics: ticks sent / skipped (request in flight), worst lateness
+        self.keepalive_sent = 0
+        self.keepalive_skipped = 0
+        self.keepalive_late_max = 0.0
+        # Request -> final response times (s), for the pool's latency stats
+        self.latencies: List[float] = []
+        self._lock = asyncio.Lock()
+        self._paused = 0
+        self._resumed = asyncio.Event()
+        self._resumed.set()
+        self._task: Optional[asyncio.Task] = None
+
+    async def open(self) -> "UdsSession":
+        await asyncio.to_thread(self.transport.open)
+        self._task = asyncio.create_task(self._keepalive(), name="tester-present")
+        return self
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await asyncio.to_thread(self.transport.close)
+
+    async def __aenter__(self):
+        return await self.open()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    # ---- keepalive ----
+    async def _keepalive(self) -> None:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.keepalive_s
+        while True:
+            await asyncio.sleep(max(0.0, deadline - loop.time()))
+            if not self._resumed.is_set():
+                await self._resumed.wait()
+                # First tick one full period after the pause, not a burst of missed ones
+                deadline = loop.time() + self.keepalive_s
+                continue
+            self.keepalive_late_max = max(self.keepalive_late_max, loop.time() - deadline)
+            if self._lock.locked():
+                self.keepalive_skipped += 1
+            else:
+                async with self._lock:
+                    await asyncio.to_thread(self.transport.send, TESTER_PRESENT)
+                self.keepalive_sent += 1
+            deadline += self.keepalive_s
+            if deadline < loop.time():
+                # Fell behind by more than a period (blocked loop): realign instead of catching up
+                deadline = loop.time() + self.keepalive_s
+
+    @asynccontextmanager
+    async def paused(self):
+        """No TesterPresent inside the block (flashing, resets, power cycles)."""
+        self._paused += 1
+        self._resumed.clear()
+        # Let a TesterPresent that is being sent finish first
+        async with self._lock:
+            pass
+        try:
+            yield self
+        finally:
+            self._paused -= 1
+            if not self._paused:
+                self._resumed.set()
+
+    # ---- requests ----
+    async def request(self, payload: bytes, timeout: Optional[float] = None) -> Optional[bytes]:
+        """
+        Send one request and return the positive response (None for a
+        suppressed one). Raises NegativeResponse / UdsError.
+        """
+        payload = bytes(payload)
+        sid = payload[0]
+        suppressed = sid in SUBFUNCTION_SERVICES and len(payload) > 1 and payload[1] & 0x80
+        async with self._lock:
+            start = time.perf_counter()
+            await asyncio.to_thread(self.transport.send, payload)
+            response = None if suppressed else await self._response(sid, payload, timeout or self.p2_s)
+            if response is not None:
+                self.latencies.append(time.perf_counter() - start)
+        if sid == 0x10:
+            self.session = payload[1] & 0x7F
+        return response
+
+    async def _response(self, sid: int, payload: bytes, wait: float) -> bytes:
+        """Final positive response to `payload`; 0x78 extends the wait to P2*."""
+        while True:
+            response = await asyncio.to_thread(self.transport.recv, wait)
+            if response is None:
+                raise UdsError(f"No response from ECU to {payload[:3].hex(' ').upper()}")
+            if response[0] == 0x7F and len(response) >= 3 and response[1] == sid:
+                if response[2] == NRC_RESPONSE_PENDING:
+                    wait = self.p2_star_s
+                    continue
+                raise NegativeResponse(sid, response[2])
+            if response[0] == sid + 0x40:
+                return response
+            # Late answer to an earlier request: not ours
+
+    async def change_session(self, session: int) -> bytes:
+        return await self.request(bytes([0x10, session]))
+
+    async def security_access(self, level: int, compute_key: Callable[[bytes], bytes]) -> None:
+        """Seed/key exchange for odd `level`; compute_key(seed) -> key."""
+        seed = (await self.request(bytes([0x27, level])))[2:]
+        if any(seed):
+            await self.request(bytes([0x27, level + 1]) + compute_key(seed))
+
+    async def read_did(self, did: int) -> bytes:
+        """Data of one DID (without the DID)."""
+        response = await self.request(bytes([0x22]) + did.to_bytes(2, "big"))
+        return response[3:]
+
+    async def read_dtcs(self, mask: int = 0xFF) -> Dict[int, int]:
+        """19 02 <mask> -> {DTC: status byte}."""
+        response = await self.request(bytes([0x19, 0x02, mask]))
+        records = response[3:]
+        return {int.from_bytes(records[i:i + 3], "big"): records[i + 3] for i in range(0, len(records) - 3, 4)}
+
+    async def reset(self, kind: int = 0x01, wait_s: float = RESET_WAIT_S) -> None:
+        """ECU reset with the keepalive paused until the ECU is back (default session)."""
+        async with self.paused():
+            await self.request(bytes([0x11, kind]))
+            await asyncio.sleep(wait_s)
+            self.session = DEFAULT_SESSION
+
+
+# =========================
+# ========= CLI ===========
+# =========================
+
+async def _run(args) -> int:
+    transport = FakeEcu() if args.fake else IsoTpTransport(channel=args.channel, tx_id=args.txid, rx_id=args.rxid)
+    async with UdsSession(transport) as uds:
+        if args.session:
+            await uds.change_session(args.session)
+            print(f"[INFO] Session 0x{args.session:02X}")
+        for did in args.read:
+            try:
+                data = await uds.read_did(did)
+                print(f"[INFO] {did:04X}: {data.hex(' ').upper()}")
+            except UdsError as e:
+                print(f"[ERROR] {did:04X}: {e}")
+        if args.poll_dtc:
+            loop = asyncio.get_running_loop()
+            end = loop.time() + args.poll_dtc
+            last: Dict[int, int] = {}
+            while loop.time() < end:
+                dtcs = await uds.read_dtcs()
+                for dtc, status in dtcs.items():
+                    if last.get(dtc) != status:
+                        print(f"[INFO] DTC {dtc:06X} status 0x{status:02X}")
+                for dtc in last.keys() - dtcs.keys():
+                    print(f"[INFO] DTC {dtc:06X} cleared")
+                last = dtcs
+                await asyncio.sleep(args.interval)
+        print(f"[INFO] TesterPresent: {uds.keepalive_sent} sent, {uds.keepalive_skipped} skipped, "
+              f"worst {uds.keepalive_late_max * 1000:.1f} ms late")
+    return 0
+
+
+def _main(argv: Optional[List[str]] = None) -> int:
+    hex_int = lambda s: int(s, 16)
+    ap = argparse.ArgumentParser(description="UDS requests with a background TesterPresent")
+    ap.add_argument("--fake", action="store_true", help="talk to FakeEcu instead of the CAN bus")
+    ap.add_argument("--channel", default=CAN_CHANNEL)
+    ap.add_argument("--txid", type=hex_int, default=TX_ID)
+    ap.add_argument("--rxid", type=hex_int, default=RX_ID)
+    ap.add_argument("--session", type=hex_int, help="enter this session first (e.g. 03)")
+    ap.add_argument("--read", nargs="*", type=hex_int, default=[], help="DIDs to read (hex)")
+    ap.add_argument("--poll-dtc", type=float, default=0, metavar="SECONDS", help="poll 19 02 FF for this long")
+    ap.add_argument("--interval", type=float, default=5.0, help="DTC poll interval (s)")
+    args = ap.parse_args(argv)
+    try:
+        return asyncio.run(_run(args))
+    except UdsError as e:
+        print(f"[ERROR] {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(_main())
@@ -0,0 +1,229 @@
+# version_diff.py
+"""
+Firmware-version diff built from the results store.
+
+Two runs (usually old and new firmware on the same bench) are compared record
+by record, keyed by (script, DID, condition), with the store's own
+changed_records() query. Every difference is classified:
+
+    newly_failing   passed / read OK before, fails (FAIL, NRC, no response) now
+    newly_passing   failed before, passes now
+    value_changed   same status, different converted value
+    new_did         only in the new run
+    missing_did     only in the old run
+
+The result is written as a compact xlsx (one sheet, coloured by class) and/or
+a standalone HTML page.
+
+    python -m Project.Common.version_diff --device UPP 03.02.00 03.02.02 --xlsx diff.xlsx --html diff.html
+"""
+import argparse
+import html
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from Project.Common.results_store import DB_PATH, changed_records, connect, latest_run_id
+
+FAILING = {"FAIL", "NRC", "NO_RESPONSE"}
+
+# Report order and colours (xlsx fill / html background)
+CLASSES: List[Tuple[str, str]] = [
+    ("newly_failing", "FFC7CE"),
+    ("newly_passing", "C6EFCE"),
+    ("value_changed", "FFEB9C"),
+    ("new_did", "DDEBF7"),
+    ("missing_did", "D9D9D9"),
+]
+
+COLUMNS = ["Class", "Script", "DID", "Condition", "Old value", "Old status", "New value", "New status"]
+
+
+def classify(old, new) -> Optional[str]:
+    """Class of one (old_row, new_row) pair, None when nothing changed."""
+    if old is None:
+        return "new_did"
+    if new is None:
+        return "missing_did"
+    old_bad, new_bad = old["status"] in FAILING, new["status"] in FAILING
+    if new_bad and not old_bad:
+        return "newly_failing"
+    if old_bad and not new_bad:
+        return "newly_passing"
+    if old["value"] != new["value"]:
+        return "value_changed"
+    return None
+
+
+def diff_runs(conn, old_run_id: int, new_run_id: int) -> List[Dict]:
+    rank = {name: i for i, (name, _) in enumerate(CLASSES)}
+    rows = []
+    for key, a, b in changed_records(conn, old_run_id, new_run_id):
+        # A status change within pass or within fail (PASS -> READ, FAIL -> NRC) is not reported
+        cls = classify(a, b)
+        if cls is None:
+            continue
+        rows.append({
+            "class": cls, "script": key[0], "did": key[1], "condition": key[2],
+            "old_value": a["value"] if a else None, "old_status": a["status"] if a else None,
+            "new_value": b["value"] if b else None, "new_status": b["status"] if b else None,
+        })
+    rows.sort(key=lambda r: (rank[r["class"]], r["script"], r["did"], r["condition"]))
+    return rows
+
+
+def previous_run_id(conn, device: str, run_id: int) -> Optional[int]:
+    """Latest run of `device` before `run_id` that has a different version."""
+    row = conn.execute(
+        "SELECT MAX(id) FROM runs WHERE device = ? AND id < ? AND version IS NOT NULL "
+        "AND version != (SELECT version FROM runs WHERE id = ?)",
+        (device, run_id, run_id)).fetchone()
+    return row[0] if row else None
+
+
+def run_label(conn, run_id: int) -> str:
+    r = conn.execute("SELECT device, version, started FROM runs WHERE id = ?", (run_id,)).fetchone()
+    return f"{r['device']} {r['version'] or '?'} (run {run_id}, {r['started']})"
+
+
+def summarize(rows: List[Dict]) -> Dict[str, int]:
+    counts = {name: 0 for name, _ in CLASSES}
+    for r in rows:
+        counts[r["class"]] += 1
+    return counts
+
+
+def _cells(r: Dict) -> List:
+    return [r["class"], r["script"], r["did"], r["condition"],
+            r["old_value"], r["old_status"], r["new_value"], r["new_status"]]
+
+
+# =========================
+# ======  REPORTS  ========
+# =========================
+
+def write_xlsx(rows: List[Dict], out_file: Path, old_label: str, new_label: str) -> Path:
+    from openpyxl import Workbook
+    from openpyxl.styles import PatternFill, Font
+
+    fills = {name: PatternFill(start_color=c, end_color=c, fill_type="solid") for name, c in CLASSES}
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Version diff"
+    ws.append([f"Old: {old_label}"])
+    ws.append([f"New: {new_label}"])
+    ws.append(["  ".join(f"{k}={v}" for k, v in summarize(rows).items())])
+    ws.append([])
+    ws.append(COLUMNS)
+    for cell in ws[ws.max_row]:
+        cell.font = Font(bold=True)
+    for r in rows:
+        ws.append(_cells(r))
+        for cell in ws[ws.max_row]:
+            cell.fill = fills[r["class"]]
+    for col, width in zip("ABCDEFGH", (15, 24, 8, 40, 30, 12, 30, 12)):
+        ws.column_dimensions[col].width = width
+    ws.freeze_panes = "A6"
+    out_file = Path(out_file)
+    out_file.parent.mkdir(parents=True, exist_ok=True)
+    wb.save(out_file)
+    return out_file
+
+
+def write_html(rows: List[Dict], out_file: Path, old_label: str, new_label: str) -> Path:
+    colours = dict(CLASSES)
+    counts = summarize(rows)
+    esc = lambda v: "" if v is None else html.escape(str(v))
+    parts = [
+        "<!DOCTYPE html><html><head><meta charset='utf-8'><title>Version diff</title>",
+        "<style>body{font-family:Segoe UI,Arial,sans-serif;font-size:13px}"
+        "table{border-collapse:collapse}td,th{border:1px solid #999;padding:2px 6px}"
+        "th{background:#D3D3D3}</style></head><body>",
+        f"<h2>Version diff</h2><p>Old: {esc(old_label)}<br>New: {esc(new_label)}<br>"
+        f"Generated {datetime.now():%Y-%m-%d %H:%M:%S}</p><p>",
+        " &nbsp; ".join(f"<span style='background:#{colours[k]}'>&nbsp;{k}: {v}&nbsp;</span>"
+                        for k, v in counts.items()),
+        "</p><table><tr>" + "".join(f"<th>{c}</th>" for c in COLUMNS) + "</tr>",
+    ]
+    for r in rows:
+        parts.append(f"<tr style='background:#{colours[r['class']]}'>"
+                     + "".join(f"<td>{esc(v)}</td>" for v in _cells(r)) + "</tr>")
+    parts.append("</table></body></html>")
+    out_file = Path(out_file)
+    out_file.parent.mkdir(parents=True, exist_ok=True)
+    out_file.write_text("\n".join(parts), encoding="utf-8")
+    return out_file
+
+
+def write_diff_against_previous(device: str, run_id: Optional[int], out_dir: str,
+                                db_path: Path = DB_PATH) -> Optional[Path]:
+    """
+    After a parse: diff `run_id` against the previous stored version of the same
+    device and drop version_diff_<old>_to_<new>.xlsx/.html into `out_dir`.
+    """
+    if run_id is None:
+        return None
+    conn = connect(db_path)
+    try:
+        old_id = previous_run_id(conn, device, run_id)
+        if old_id is None:
+            print(f"[INFO] No earlier {device} version in the results store, no diff report.")
+            return None
+        rows = diff_runs(conn, old_id, run_id)
+        old_v = conn.execute("SELECT version FROM runs WHERE id = ?", (old_id,)).fetchone()[0]
+        new_v = conn.execute("SELECT version FROM runs WHERE id = ?", (run_id,)).fetchone()[0]
+        old_label, new_label = run_label(conn, old_id), run_label(conn, run_id)
+    finally:
+        conn.close()
+
+    # Versions contain dots, so no with_suffix() here
+    base = f"version_diff_{old_v}_to_{new_v}"
+    out = write_html(rows, Path(out_dir) / f"{base}.html", old_label, new_label)
+    try:
+        out = write_xlsx(rows, Path(out_dir) / f"{base}.xlsx", old_label, new_label)
+    except ImportError:
+        print("[WARN] openpyxl not installed, version diff written as HTML only.")
+    print(f"[INFO] Version diff {old_v} -> {new_v}: "
+          + ", ".join(f"{k}={v}" for k, v in summarize(rows).items()))
+    return out
+
+
+def _main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Diff two firmware versions from the results store")
+    ap.add_argument("old_version")
+    ap.add_argument("new_version")
+    ap.add_argument("--device", required=True, help="UPP / NewGen")
+    ap.add_argument("--db", type=Path, default=DB_PATH)
+    ap.add_argument("--xlsx", type=Path, default=None)
+    ap.add_argument("--html", type=Path, default=None)
+    args = ap.parse_args(argv)
+
+    t0 = time.perf_counter()
+    conn = connect(args.db)
+    try:
+        ids = [latest_run_id(conn, args.device, v) for v in (args.old_version, args.new_version)]
+        if None in ids:
+            print(f"[ERROR] No stored {args.device} run for "
+                  f"{args.old_version if ids[0] is None else args.new_version}")
+            return 1
+        rows = diff_runs(conn, *ids)
+        labels = [run_label(conn, i) for i in ids]
+    finally:
+        conn.close()
+    elapsed = (time.perf_counter() - t0) * 1000
+
+    for r in rows:
+        print(f"{r['class']:<14} {r['script']:<24} {r['did']:<6} {r['condition'][:30]:<30} "
+              f"{r['old_value']} [{r['old_status']}] -> {r['new_value']} [{r['new_status']}]")
+    print(", ".join(f"{k}={v}" for k, v in summarize(rows).items()) + f"  ({elapsed:.1f} ms)")
+    if args.xlsx:
+        print(f"[INFO] xlsx report: {write_xlsx(rows, args.xlsx, *labels)}")
+    if args.html:
+        print(f"[INFO] HTML report: {write_html(rows, args.html, *labels)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(_main())
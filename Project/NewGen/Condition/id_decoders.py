@@ -0,0 +1,35 @@
+#id_decoders.py
+# Typed decoders for the reports (see Project/Common/decoders.py).
+# Only the identifier strings are typed so far; the B1xx calibration DIDs
+# keep the old guess until their layouts are taken over from the SRD
+# (Documents/New Gen D-6 Microcontroller UDS DIDs.xlsx).
+
+DID_DECODERS = {
+    "F180": ("ascii", 1, ""),
+    "F181": ("ascii", 1, ""),
+    "F182": ("ascii", 1, ""),
+    "F18A": ("ascii", 1, ""),
+    "F18B": ("ascii", 1, ""),
+    "F18C": ("ascii", 1, ""),
+    "F190": ("ascii", 1, ""),
+    "F191": ("ascii", 1, ""),
+    "F192": ("ascii", 1, ""),
+    "F193": ("ascii", 1, ""),
+    "F194": ("ascii", 1, ""),
+    "F195": ("ascii", 1, ""),
+    "F197": ("ascii", 1, ""),
+    "F198": ("ascii", 1, ""),
+    "F199": ("ascii", 1, ""),
+    "F19B": ("ascii", 1, ""),
+    "F19C": ("ascii", 1, ""),
+    "F19D": ("ascii", 1, ""),
+    "F19E": ("ascii", 1, ""),
+    "F186": ("u8", 1, ""),
+    "0200": ("u8", 1, ""),
+    "0201": ("hex", 1, ""),
+    "0304": ("hex", 1, ""),
+}
+
+# DID -> {first data byte of the field: (type, scale, unit)}
+FIELD_DECODERS = {
+}
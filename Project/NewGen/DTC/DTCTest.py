@@ -1,10 +1,12 @@
-import can
-import isotp
-from udsoncan.connections import PythonIsoTpConnection
-from udsoncan.client import Client
-from udsoncan import configs
+import asyncio
 import pandas as pd
 from tabulate import tabulate
+import sys
+from pathlib import Path
+
+# UdsSession: TesterPresent in the background, ISO-TP params tuned per profile
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+from Project.Common.uds_session import IsoTpTransport, UdsSession
 
 
 # CAN interface setup
@@ -13,11 +15,12 @@ channel = 'PCAN_USBBUS1'
 tx_id = 0x1CFFFEF9
 rx_id = 0x1CFFF9FE
 
-# ISO-TP addressing
-tp_addr = isotp.Address(isotp.AddressingMode.Normal_29bits, txid=tx_id, rxid=rx_id)
-bus = can.Bus(channel=channel, interface=can_interface, bitrate=500000)
-stack = isotp.CanStack(bus=bus, address=tp_addr)
-conn = PythonIsoTpConnection(stack)
+
+async def read_dtc_information(status_mask):
+    """19 02 <mask> -> {DTC: status byte}, with TesterPresent running while the session is open."""
+    transport = IsoTpTransport(interface=can_interface, channel=channel, tx_id=tx_id, rx_id=rx_id, device="NewGen")
+    async with UdsSession(transport) as uds:
+        return await uds.read_dtcs(status_mask)
 
 # Ordered list of status flags (bit 0 to bit 7)
 status_flags = [
@@ -88,42 +91,37 @@ GREEN_CHECK = "\033[1;92m✓\033[0m"  # Bold bright green ✓
 RED_CROSS = "\033[1;91m✗\033[0m"    # Bold bright red ✗
 
 try:
-    with Client(conn, request_timeout=1, config=configs.default_client_config) as client:
-        print("Sending ReadDTCInformation (subfunction 0x02 with mask 0xFF)...")
-        response = client.read_dtc_information(subfunction=0x02, status_mask=0x27)
-
-        print(f"\nNumber of DTCs: {response.service_data.dtc_count}")
-
-        rows = []
-        for dtc in response.service_data.dtcs:
-            dtc_id = f"{dtc.id:06X}"
-            fault_name = dtc_names.get(dtc_id, "(Unknown)")
-            row = {
-                "DTC Code": dtc_id,
-                "Fault Name": fault_name
-            }
-            status = dtc.status
-            for flag in reversed(status_flags):
-                row[flag] = GREEN_CHECK if getattr(status, flag) else " "
-            rows.append(row)
-
-        df = pd.DataFrame(rows)
-
-        # Convert all to string
-        df = df.astype(str)
-
-        # Build alignment list
-        colalign = []
-        for col in df.columns:
-            if col in ["DTC Code", "Fault Name"]:
-                colalign.append("left")
-            else:
-                colalign.append("center")
-
-        print(tabulate(df, headers="keys", tablefmt="fancy_grid", showindex=False, colalign=colalign))
+    print("Sending ReadDTCInformation (subfunction 0x02 with mask 0xFF)...")
+    dtcs = asyncio.run(read_dtc_information(0x27))
+
+    print(f"\nNumber of DTCs: {len(dtcs)}")
+
+    rows = []
+    for dtc, status in dtcs.items():
+        dtc_id = f"{dtc:06X}"
+        fault_name = dtc_names.get(dtc_id, "(Unknown)")
+        row = {
+            "DTC Code": dtc_id,
+            "Fault Name": fault_name
+        }
+        for bit, flag in reversed(list(enumerate(status_flags))):
+            row[flag] = GREEN_CHECK if status >> bit & 1 else " "
+        rows.append(row)
+
+    df = pd.DataFrame(rows)
+
+    # Convert all to string
+    df = df.astype(str)
+
+    # Build alignment list
+    colalign = []
+    for col in df.columns:
+        if col in ["DTC Code", "Fault Name"]:
+            colalign.append("left")
+        else:
+            colalign.append("center")
+
+    print(tabulate(df, headers="keys", tablefmt="fancy_grid", showindex=False, colalign=colalign))
 
 except Exception as e:
     print(f"❌ Error communicating with ECU: {e}")
-
-finally:
-    bus.shutdown()
\ No newline at end of file
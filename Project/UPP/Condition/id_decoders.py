@@ -0,0 +1,223 @@
+#id_decoders.py
+# Typed decoders for the reports (see Project/Common/decoders.py).
+# Field offsets, scales and signedness follow the "(Default D, Scale S)" notes
+# in Scripts/*.script; units follow the field names. Check against the SRD
+# (Documents/HD-UP-ICD-242601-UDID.xlsx) when it changes.
+
+DID_DECODERS = {
+    "F180": ("ascii", 1, ""),
+    "F181": ("ascii", 1, ""),
+    "F182": ("ascii", 1, ""),
+    "F187": ("ascii", 1, ""),
+    "F18A": ("ascii", 1, ""),
+    "F18B": ("ascii", 1, ""),
+    "F18C": ("ascii", 1, ""),
+    "F190": ("ascii", 1, ""),
+    "F193": ("ascii", 1, ""),
+    "F194": ("ascii", 1, ""),
+    "F195": ("ascii", 1, ""),
+    "F197": ("ascii", 1, ""),
+    "F198": ("ascii", 1, ""),
+    "F199": ("ascii", 1, ""),
+    "F19D": ("ascii", 1, ""),
+    "F1F0": ("ascii", 1, ""),
+    "0100": ("ascii", 1, ""),
+    "0101": ("hex", 1, ""),
+    "0102": ("hex", 1, ""),
+    "0200": ("u8", 1, ""),
+    "0201": ("hex", 1, ""),
+    "0303": ("u8", 1, ""),
+    "0304": ("hex", 1, ""),
+    "078E": ("hex", 1, ""),
+    "1500": ("uint", 1, ""),
+    "F186": ("u8", 1, ""),
+    "F1B0": ("uint", 1, ""),
+    "F1B1": ("uint", 1, ""),
+    "F1B2": ("uint", 1, ""),
+    "F1B3": ("uint", 1, ""),
+    "F1B4": ("uint", 1, ""),
+    "F1B5": ("uint", 1, ""),
+    "F1B6": ("uint", 1, ""),
+    "F1B9": ("hex", 1, ""),
+    "F1D4": ("u8", 1, ""),
+    "23F9": ("u16", 1, ""),
+    "23FA": ("u16", 1, ""),
+    "23FB": ("u16", 1, ""),
+    "23FC": ("u16", 1, ""),
+    "249C": ("hex", 1, ""),
+}
+
+# DID -> {first data byte of the field: (type, scale, unit)}
+FIELD_DECODERS = {
+    "0790": {  # TrueDriveManager
+        0: ("u16", 0.0054945, "deg"),   # AngleOffset
+        2: ("u16", 0.0054945, "deg"),   # AngleOffsetDelay
+        4: ("s8", 1, "degC"),           # MotorTempMinCut
+        5: ("s8", 1, "degC"),           # MotorTempMinStart
+        6: ("u8", 1, "degC"),           # MotorTempMaxStart
+        7: ("u8", 1, "degC"),           # MotorTempMaxCut
+        8: ("s8", 1, "degC"),           # ControllerTempMinCut
+        9: ("s8", 1, "degC"),           # ControllerTempMinStart
+        10: ("u8", 1, "degC"),          # ControllerTempMaxStart
+        11: ("u8", 1, "degC"),          # ControllerTempMaxCut
+        12: ("s8", 1, "degC"),          # CoolingPlateTempMinCut
+        13: ("s8", 1, "degC"),          # CoolingPlateTempMinStart
+        14: ("u8", 1, "degC"),          # CoolingPlateTempMaxStart
+        15: ("u8", 1, "degC"),          # CoolingPlateTempMaxCut
+        16: ("u16", 1, "V"),            # BusVoltageMinCut
+        18: ("u16", 1, "V"),            # BusVoltageMinStart
+        20: ("u16", 1, "V"),            # BusVoltageMaxStart
+        22: ("u16", 1, "V"),            # BusVoltageMaxCut
+        24: ("u8", 1, ""),              # MaxBusCurrentLimitActivation
+        25: ("u8", 2, "A"),             # MaxBusCurrentLimit
+        26: ("u8", 1, ""),              # MinBusCurrentLimitActivation
+        27: ("s16", 2, "A"),            # MinBusCurrentLimit
+        29: ("u8", 1, ""),              # MaxBusVoltageLimitActivation
+        30: ("u8", 2, "V"),             # MaxBusVoltageLimit
+        31: ("u8", 1, ""),              # MinBusVoltageLimitActivation
+        32: ("u8", 2, "V"),             # MinBusVoltageLimit
+        33: ("u16", 1, "A"),            # BatteryMaximumCurrent
+        35: ("u16", 1, "V"),            # Bus_Under_Voltage
+        37: ("u16", 1, "V"),            # Bus_Over_Voltage
+    },
+    "0103": {  # CanConfig_103
+        0: ("u8", 1, ""),               # CANWakeupFeatureEnable
+        1: ("u8", 1, ""),               # NMDriveCnttoClearDTC
+        2: ("u8", 10, "ms"),            # BusoffFastRecoveryTime
+        3: ("u8", 1, ""),               # FastBusoffRecoveryCount
+        4: ("u8", 10, "ms"),            # BusoffSlowRecoveryTime
+        5: ("u8", 10, "ms"),            # NM IGN On Startup Delay (not in use)
+        6: ("u8", 10, "ms"),            # NMRestartDlyTimeAfterUnderVolRecovery
+        7: ("u8", 10, "ms"),            # NMRestartDlyTimeAfterOverVolRecovery
+        8: ("u8", 10, "ms"),            # NM Restart Dly Time After Bus Off recovery
+    },
+    "078F": {  # Faults_Configuration
+        0: ("u16", 10, "ms"),           # MotorOverTempDetection
+        2: ("u8", 1, "degC"),           # LowTemperatureFaultsHealingHysteresisUdsOnly
+        3: ("u16", 10, "ms"),           # MotorLowTempDetection
+        5: ("u16", 10, "ms"),           # MotorLowTempHealing
+        7: ("u16", 10, "ms"),           # McuOverTempDetection
+        9: ("u16", 10, "ms"),           # McuLowTempDetection
+        11: ("u16", 10, "ms"),          # McuLowTempHealing
+        13: ("u16", 10, "ms"),          # CoolingPlateOverTempDetection
+        15: ("u16", 10, ""),            # CoolingPlateSensorFault
+        17: ("u8", 1, "degC"),          # MicroControllerHighTemp
+        18: ("u16", 10, "ms"),          # MicroControllerOverTempDetection
+        20: ("u16", 10, "ms"),          # McuTempSensorsPlausibilityDetection
+        22: ("u16", 10, "A"),           # MaxPhaseCurrentPeak
+        24: ("u8", 10, "A"),            # MaxPhaseCurrentDeviation
+        25: ("u16", 20, "ms"),          # PhaseOverCurrentDetection
+        27: ("u16", 10, ""),            # PhaseSensorInvalid
+        29: ("u16", 20, "ms"),          # PhaseDisconnectedDetection
+        31: ("u16", 10, "ms"),          # ActiveShortCircuitDetection
+        33: ("u16", 10, "ms"),          # ActiveShortCircuitHealing
+        35: ("u16", 10, "ms"),          # GateDriverActiveCbitDetection
+        37: ("u16", 10, "ms"),          # GateDriverActiveCbitHealing
+        39: ("u16", 10, "ms"),          # GateDriverInactiveCbitDetection
+        41: ("u16", 10, "ms"),          # GateDriverInactiveCbitHealing
+        43: ("u16", 10, "A"),           # MaxBatteryCurrent
+        45: ("u16", 10, "ms"),          # MaxBatDischargeCurrentSettling
+        47: ("u16", 10, "ms"),          # BatOverCurrentFaultChargeCurrentDeclarationSettlingTimeUdsOnly
+        49: ("u8", 100, "ms"),          # BatOverCurrentDetection
+        50: ("u8", 1, "ms"),            # BatCurrentSensorInvaldDetection
+        51: ("u8", 1, "ms"),            # BatLowVoltageDetection
+        52: ("u8", 1, "ms"),            # BatHighVoltageDetection
+        53: ("u16", 1, ""),             # BatUnderVoltageFaultDeclarationThresholdUdsOnly
+        55: ("u8", 100, "ms"),          # BatUnderVoltageDetection
+        56: ("u16", 1, "V"),            # BatteryOvervoltageUdsOnly
+        58: ("u8", 100, "ms"),          # BatOverVoltageDetection
+        59: ("u8", 1, "ms"),            # BatVoltagePlausibilityDetection
+        60: ("u16", 10, "ms"),          # ActiveDischargeFeedbackCbitDetection
+        62: ("u16", 10, "ms"),          # ActiveDischargeFeedbackCbitHealing
+        64: ("u16", 10, "ms"),          # ActiveDischargeTimeoutDetection
+        66: ("u16", 10, "ms"),          # ActiveDischargeTimeoutHealing
+        68: ("u16", 10, "ms"),          # GateDriverUnderVoltageDetection
+        70: ("u16", 20, "ms"),          # GateDriverFaultDetection
+        72: ("u16", 10, "ms"),          # Kl30UnderVoltageDetection
+        74: ("u16", 10, "ms"),          # Kl30UnderVoltageHealing
+        76: ("u16", 10, "ms"),          # Kl30OverVoltageDetection
+        78: ("u16", 10, "ms"),          # Kl30OverVoltageHealing
+        80: ("u16", 10, "ms"),          # Kl30LosDetection
+        82: ("u16", 20, "ms"),          # MotorPositionSensorFaultDetection
+        84: ("u16", 10, "ms"),          # MotorSpeedFalutDetection
+        86: ("u16", 10, ""),            # OverSpeedThreshold
+        88: ("u16", 100, "rpm"),        # SpeedUpperLimitPositive
+        90: ("u8", 0.05, ""),           # OverSpeedPositiveMargin
+        91: ("u16", 100, "rpm"),        # SpeedLowerLimitNegative
+        93: ("u8", 0.05, ""),           # OverSpeedNegativeMargin
+        94: ("u16", 100, "ms"),         # MotorOverSpeedDetection
+        96: ("u8", 1, "ms"),            # MotorStallTimeout
+        97: ("u8", 10, "ms"),           # IoExpenderConfigDetection
+        98: ("u16", 10, "ms"),          # IoExpenderConfigHealing
+        100: ("u16", 10, "ms"),         # CanTransceiverModeDetection
+        102: ("u16", 10, "ms"),         # CanTransceiverModeHealing
+        104: ("u16", 10, "ms"),         # Sensors5vFaultDetection
+    },
+    "F1D5": {  # Network_F1D5
+        0: ("u8", 1, ""),               # Network Management Enable
+        1: ("u8", 10, "ms"),            # CriticalCANSignalInvalidTime
+        2: ("u16", 10, "ms"),           # MainCANBusOffHealingTime
+        4: ("u16", 20, "ms"),           # CANTimeoutSincePowerup
+    },
+    "F1D3": {  # Network_Missmatch_F1D3
+        0: ("u8", 1, ""),               # VCU_100 DLC Mismatch Threshold
+        1: ("u8", 1, ""),               # VCU_100 DLC Parity Mismatch Threshold
+        2: ("u8", 1, ""),               # VCU_100 DLC Mismatch Healing Threshold
+        3: ("u8", 1, ""),               # VCU_100 DLC Parity Mismatch Healing Threshold
+        4: ("u8", 1, ""),               # VCU3_100 DLC Mismatch Threshold
+        5: ("u8", 1, ""),               # VCU3_100 CRC Mismatch Threshold
+        6: ("u8", 1, ""),               # VCU3_100 Parity Mismatch Threshold
+        7: ("u8", 1, ""),               # VCU3_100 DLC Mismatch Healing Threshold
+        8: ("u8", 1, ""),               # VCU3_100 CRC Mismatch Healing Threshold
+        9: ("u8", 1, ""),               # VCU3_100 Parity Mismatch Healing Threshold
+        10: ("u8", 1, ""),              # VCU5_500 DLC Mismatch Threshold
+        11: ("u8", 1, ""),              # VCU5_500 Parity Mismatch Threshold
+        12: ("u8", 1, ""),              # VCU5_500 DLC Mismatch Healing Threshold
+        13: ("u8", 1, ""),              # VCU5_500 Parity Mismatch Healing Threshold
+        14: ("u8", 1, ""),              # VCU8_10 DLC Mismatch Threshold
+        15: ("u8", 1, ""),              # VCU8_10 Parity Mismatch Threshold
+        16: ("u8", 1, ""),              # VCU8_10 DLC Mismatch Healing Threshold
+        17: ("u8", 1, ""),              # VCU8_10 Parity Mismatch Healing Threshold
+        18: ("u8", 1, ""),              # VCU9_10 DLC Mismatch Threshold
+        19: ("u8", 1, ""),              # VCU9_10 CRC Mismatch Threshold
+        20: ("u8", 1, ""),              # VCU9_10 Parity Mismatch Threshold
+        21: ("u8", 1, ""),              # VCU9_10 DLC Mismatch Healing Threshold
+        22: ("u8", 1, ""),              # VCU9_10 CRC Mismatch Healing Threshold
+        23: ("u8", 1, ""),              # VCU9_10 Parity Mismatch Healing Threshold
+        24: ("u8", 1, ""),              # VCU14_20 DLC Mismatch Threshold
+        25: ("u8", 1, ""),              # VCU14_20 Parity Mismatch Threshold
+        26: ("u8", 1, ""),              # VCU14_20 DLC Mismatch Healing Threshold
+        27: ("u8", 1, ""),              # VCU14_20 Parity Mismatch Healing Threshold
+        28: ("u8", 1, ""),              # VCU17_500 DLC Mismatch Threshold
+        29: ("u8", 1, ""),              # VCU17_500 CRC Mismatch Threshold
+        30: ("u8", 1, ""),              # VCU17_500 Parity Mismatch Threshold
+        31: ("u8", 1, ""),              # VCU17_500 DLC Mismatch Healing Threshold
+        32: ("u8", 1, ""),              # VCU17_500 CRC Mismatch Healing Threshold
+        33: ("u8", 1, ""),              # VCU17_500 Parity Mismatch Healing Threshold
+        34: ("u8", 1, ""),              # VCU3_100 Alive Counter Threshold
+        35: ("u8", 1, ""),              # VCU3_100 Alive Counter Healing Threshold
+        36: ("u8", 1, ""),              # VCU9_10 Alive Counter Threshold
+        37: ("u8", 1, ""),              # VCU9_10 Alive Counter Healing Threshold
+        38: ("u8", 1, ""),              # VCU17_500 Alive Counter Threshold
+        39: ("u8", 1, ""),              # VCU17_500 Alive Counter Healing Threshold
+    },
+    "F1D2": {  # Network_TimeOut_F1D2
+        0: ("u8", 20, "ms"),            # VCU_100 TimeOut
+        1: ("u8", 20, "ms"),            # VCU_100  TimeOut Healing Time
+        2: ("u8", 20, "ms"),            # VCU3_100  TimeOut
+        3: ("u8", 10, "ms"),            # VCU3_100  TimeOut Healing Time
+        4: ("u8", 50, "ms"),            # VCU5_500  TimeOut
+        5: ("u8", 50, "ms"),            # VCU5_500  Healing Time
+        6: ("u8", 10, "ms"),            # VCU8_10  TimeOut
+        7: ("u8", 10, "ms"),            # VCU8_10  Healing Time
+        8: ("u8", 10, "ms"),            # VCU9_10  TimeOut
+        9: ("u8", 10, "ms"),            # VCU9_10  Healing Time
+        10: ("u8", 10, "ms"),           # VCU14_20  TimeOut
+        11: ("u8", 10, "ms"),           # VCU14_20  Healing Time
+        12: ("u8", 50, "ms"),           # VCU17_500  TimeOut
+        13: ("u8", 50, "ms"),           # VCU17_500  Healing Time
+        18: ("u8", 10, "ms"),           # BMS5_10 Timeout
+        19: ("u8", 10, "ms"),           # BMS5_10 Timeout Healing Time
+        20: ("u8", 10, "ms"),           # BMS6_10 Timeout Healing Time (commented out in the script)
+    },
+}
@@ -1,15 +1,17 @@
 import os
-import can
-import isotp
-from udsoncan.connections import PythonIsoTpConnection
-from udsoncan.client import Client
-from udsoncan import configs
+import asyncio
 import pandas as pd
 from tabulate import tabulate
 from datetime import datetime
 import pytz
 from openpyxl.styles import Alignment
 from openpyxl import load_workbook
+import sys
+from pathlib import Path
+
+# UdsSession: TesterPresent in the background, ISO-TP params tuned per profile
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+from Project.Common.uds_session import IsoTpTransport, UdsSession
 
 # CAN interface setup
 can_interface = 'pcan'
@@ -17,11 +19,12 @@ channel = 'PCAN_USBBUS1'
 tx_id = 0x7D0
 rx_id = 0x7D8
 
-# ISO-TP addressing
-tp_addr = isotp.Address(isotp.AddressingMode.Normal_11bits, txid=tx_id, rxid=rx_id)
-bus = can.Bus(channel=channel, interface=can_interface, bitrate=500000)
-stack = isotp.CanStack(bus=bus, address=tp_addr)
-conn = PythonIsoTpConnection(stack)
+
+async def read_dtc_information(status_mask):
+    """19 02 <mask> -> {DTC: status byte}, with TesterPresent running while the session is open."""
+    transport = IsoTpTransport(interface=can_interface, channel=channel, tx_id=tx_id, rx_id=rx_id, device="UPP")
+    async with UdsSession(transport) as uds:
+        return await uds.read_dtcs(status_mask)
 
 # Ordered list of status flags (bit 0 to bit 7)
 status_flags = [
@@ -68,69 +71,64 @@ GREEN_CHECK = "\033[1;92m✓\033[0m"  # console (ANSI colored)
 PLAIN_CHECK = "✓"                   # Excel (plain)
 
 try:
-    with Client(conn, request_timeout=1, config=configs.default_client_config) as client:
-        print("Sending ReadDTCInformation (subfunction 0x02 with mask 0xFF)...")
-        response = client.read_dtc_information(subfunction=0x02, status_mask=0xFF)
-
-        print(f"\nNumber of DTCs: {response.service_data.dtc_count}")
-
-        # ---- Build rows for console (with ANSI color) ----
-        rows_console = []
-        # Also build rows for excel (plain checkmark) in parallel
-        rows_excel = []
-
-        for dtc in response.service_data.dtcs:
-            dtc_id = f"{dtc.id:06X}"
-            fault_name = dtc_names.get(dtc_id, "(Unknown)")
-
-            row_console = {"DTC Code": dtc_id, "Fault Name": fault_name}
-            row_excel   = {"DTC Code": dtc_id, "Fault Name": fault_name}
-
-            status = dtc.status
-            # Use the exact same column order as your console (reversed flags)
-            for flag in reversed(status_flags):
-                val = bool(getattr(status, flag))
-                row_console[flag] = GREEN_CHECK if val else " "
-                row_excel[flag]   = PLAIN_CHECK if val else ""
-            rows_console.append(row_console)
-            rows_excel.append(row_excel)
-
-        df_console = pd.DataFrame(rows_console).astype(str)
-        df_excel   = pd.DataFrame(rows_excel).astype(str)
-
-        # ---- Console table (as before) ----
-        colalign = []
-        for col in df_console.columns:
-            colalign.append("left" if col in ["DTC Code", "Fault Name"] else "center")
-        print(tabulate(df_console, headers="keys", tablefmt="fancy_grid", showindex=False, colalign=colalign))
-
-        # ---- Save to Excel (timestamped name) ----
-        tz = pytz.timezone("Israel")
-        stamp = datetime.now(tz).strftime("%Y%m%d_%H%M%S")
-        out_dir = os.path.join("C:\\", "Users", os.environ.get("USERNAME", ""), "Documents")
-        os.makedirs(out_dir, exist_ok=True)
-        out_path = os.path.join(out_dir, f"dtc_{stamp}.xlsx")
-
-        with pd.ExcelWriter(out_path, engine="openpyxl") as xw:
-            df_excel.to_excel(xw, index=False, sheet_name="DTCs")
-            ws = xw.book["DTCs"]
-
-            # widths
-            ws.column_dimensions['A'].width = 12   # DTC Code
-            ws.column_dimensions['B'].width = 28   # Fault Name
-            # center all flag columns
-            for col_idx in range(3, 3 + len(status_flags)):
-                col_letter = ws.cell(row=1, column=col_idx).column_letter
-                ws.column_dimensions[col_letter].width = 30  # wide like your console screenshot
-                for row_idx in range(1, ws.max_row + 1):
-                    ws.cell(row=row_idx, column=col_idx).alignment = Alignment(horizontal="center", vertical="center")
-
-            ws.freeze_panes = "A2"  # freeze header
-
-        print(f"\nExcel saved to: {out_path}")
+    print("Sending ReadDTCInformation (subfunction 0x02 with mask 0xFF)...")
+    dtcs = asyncio.run(read_dtc_information(0xFF))
+
+    print(f"\nNumber of DTCs: {len(dtcs)}")
+
+    # ---- Build rows for console (with ANSI color) ----
+    rows_console = []
+    # Also build rows for excel (plain checkmark) in parallel
+    rows_excel = []
+
+    for dtc, status in dtcs.items():
+        dtc_id = f"{dtc:06X}"
+        fault_name = dtc_names.get(dtc_id, "(Unknown)")
+
+        row_console = {"DTC Code": dtc_id, "Fault Name": fault_name}
+        row_excel   = {"DTC Code": dtc_id, "Fault Name": fault_name}
+
+        # Use the exact same column order as your console (reversed flags)
+        for bit, flag in reversed(list(enumerate(status_flags))):
+            val = bool(status >> bit & 1)
+            row_console[flag] = GREEN_CHECK if val else " "
+            row_excel[flag]   = PLAIN_CHECK if val else ""
+        rows_console.append(row_console)
+        rows_excel.append(row_excel)
+
+    df_console = pd.DataFrame(rows_console).astype(str)
+    df_excel   = pd.DataFrame(rows_excel).astype(str)
+
+    # ---- Console table (as before) ----
+    colalign = []
+    for col in df_console.columns:
+        colalign.append("left" if col in ["DTC Code", "Fault Name"] else "center")
+    print(tabulate(df_console, headers="keys", tablefmt="fancy_grid", showindex=False, colalign=colalign))
+
+    # ---- Save to Excel (timestamped name) ----
+    tz = pytz.timezone("Israel")
+    stamp = datetime.now(tz).strftime("%Y%m%d_%H%M%S")
+    out_dir = os.path.join("C:\\", "Users", os.environ.get("USERNAME", ""), "Documents")
+    os.makedirs(out_dir, exist_ok=True)
+    out_path = os.path.join(out_dir, f"dtc_{stamp}.xlsx")
+
+    with pd.ExcelWriter(out_path, engine="openpyxl") as xw:
+        df_excel.to_excel(xw, index=False, sheet_name="DTCs")
+        ws = xw.book["DTCs"]
+
+        # widths
+        ws.column_dimensions['A'].width = 12   # DTC Code
+        ws.column_dimensions['B'].width = 28   # Fault Name
+        # center all flag columns
+        for col_idx in range(3, 3 + len(status_flags)):
+            col_letter = ws.cell(row=1, column=col_idx).column_letter
+            ws.column_dimensions[col_letter].width = 30  # wide like your console screenshot
+            for row_idx in range(1, ws.max_row + 1):
+                ws.cell(row=row_idx, column=col_idx).alignment = Alignment(horizontal="center", vertical="center")
+
+        ws.freeze_panes = "A2"  # freeze header
+
+    print(f"\nExcel saved to: {out_path}")
 
 except Exception as e:
     print(f"❌ Error communicating with ECU: {e}")
-
-finally:
-    bus.shutdown()
@@ -1,5 +1,4 @@
 import argparse
-import shutil
 import subprocess
 from pathlib import Path
 import openpyxl
@@ -8,6 +7,11 @@ import os
 import sys
 import re
 
+# share_sync.py and result_bundle.py live in the repo root
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from share_sync import sync_files, sync_tree
+from result_bundle import pack_run, BUNDLE_SUFFIX
+
 
 
 
@@ -22,6 +26,8 @@ Logs_folder = os.path.join(base_log_dir, "Logs")
 os.makedirs(Logs_folder, exist_ok=True)
 #####################################
 LOGS_DIR=Path(r"C:\temp3")
+# UPLOAD_BUNDLE=1: send one compressed bundle (result_bundle.py) instead of loose files
+UPLOAD_BUNDLE = os.environ.get("UPLOAD_BUNDLE", "0") == "1"
 
 print(base_log_dir)
 
@@ -676,45 +682,25 @@ def compare_and_generate_report(srd_services, srd_original_names, srd_details, l
         raise
 def copy_tree(src: Path, dst: Path, last_n: int | None = None):
     """
-    Copy files/dirs from src to dst.
+    Copy files/dirs from src to dst (incremental, see share_sync.py).
 
-    - If last_n is None → recursive copy of full tree (previous behavior).
+    - If last_n is None → recursive copy of full tree.
     - If last_n is an int → copy only the last N files in src (non-recursive).
+    Files already on the destination with the same size/mtime/hash are skipped.
     """
-    if not src.exists():
-        print(f"[copy_tree] Source does not exist, skipping: {src}")
-        return
-
-    # Mode 1: only last N files in this folder (non-recursive)
     if last_n is not None:
-        files = [p for p in src.iterdir() if p.is_file()]
-        if not files:
-            print(f"[copy_tree] No files found in {src}")
-            return
-
-        files_sorted = sorted(files, key=lambda p: p.stat().st_mtime)
-        to_copy = files_sorted[-last_n:]
-
-        dst.mkdir(parents=True, exist_ok=True)
-        print(f"[copy_tree] Copying last {len(to_copy)} file(s) from {src} to {dst}")
-        for src_file in to_copy:
-            dst_file = dst / src_file.name
-            shutil.copy2(src_file, dst_file)
-            print(f"  Copied {src_file} -> {dst_file}")
-        return
+        print(f"[copy_tree] Copying last {last_n} file(s) from {src} to {dst}")
+    sync_tree(src, dst, last_n=last_n)
 
-    # Mode 2: full recursive tree copy (original behavior)
-    for root, dirs, files in os.walk(src):
-        root_path = Path(root)
-        rel = root_path.relative_to(src)
-        target_root = dst / rel
-        target_root.mkdir(parents=True, exist_ok=True)
 
-        for name in files:
-            src_file = root_path / name
-            dst_file = target_root / name
-            shutil.copy2(src_file, dst_file)
-            print(f"  Copied {src_file} -> {dst_file}")
+def upload_bundle(final_root: Path):
+    """Pack the last 2 raw logs + Logs/<result_folder> into one bundle and sync it."""
+    src_logs_dir = Path(base_log_dir) / "Logs" / result_folder
+    raw_logs = sorted((p for p in LOGS_DIR.glob("*.uds.txt")), key=lambda p: p.stat().st_mtime)[-2:]
+    bundle_dir = Path(base_log_dir) / "Bundles"
+    bundle = bundle_dir / f"UPP_{result_folder}{BUNDLE_SUFFIX}"
+    pack_run(bundle, raw_logs + [src_logs_dir], {"device": "UPP", "f195": result_folder})
+    sync_files([bundle], bundle_dir, final_root)
 
 
 def copying_files():
@@ -744,6 +730,11 @@ def copying_files():
         print("  ❌ mkdir failed:", type(e).__name__, e)
         return
 
+    if UPLOAD_BUNDLE:
+        upload_bundle(final_root)
+        print("✅ Copy to external disk completed.")
+        return
+
     # 1) Copy ONLY the last 2 files from C:\temp3 -> ...\Client logs
     temp3_dst = final_root / "Client logs"
     print(f"  - Copying last 2 raw logs from {LOGS_DIR} to {temp3_dst}")
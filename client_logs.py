@@ -0,0 +1,122 @@
+# client_logs.py
+"""
+Per-target UdsClient_CL logs for flash runs that share one client log folder.
+
+UdsClient_CL always writes its *.uds.txt to C:\\temp3, so flash targets running
+at the same time (flash_orchestrator.py) would mix their client logs there.
+A ClientLogClaim tells them apart: the client is started while holding a lock
+file in that folder, and the lock is kept until the new log has appeared, so
+the file that showed up belongs to this target. After the step the claimed
+files are moved into the target's own logs folder.
+
+    claim = ClientLogClaim(CLIENT_LOGS_DIR, LOGS_DIR)
+    with claim.starting():
+        process = subprocess.Popen(...)
+        claim.wait_for_log(process)
+    ...
+    process.wait()
+    claim.collect()
+
+With the target folder equal to the client folder (single manual run) it does
+nothing.
+"""
+import os
+import shutil
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import List, Optional, Set
+
+# =========================
+# ======  CONFIG  =========
+# =========================
+
+# Where UdsClient_CL writes its logs (set in the tool, not on its command line)
+CLIENT_LOGS_DIR = Path(r"C:\temp3")
+CLIENT_LOG_PATTERN = "*.uds.txt"
+
+LOCK_NAME = ".client_start.lock"
+LOCK_POLL = 0.2           # seconds between attempts to take the lock
+LOCK_STALE = 300          # a lock older than this was left by a killed process (s)
+LOG_WAIT = 30             # max seconds for the client to create its log
+
+
+class ClientLogClaim:
+    def __init__(self, client_dir: Path, target_dir: Path, pattern: str = CLIENT_LOG_PATTERN):
+        self.client_dir = Path(client_dir)
+        self.target_dir = Path(target_dir)
+        self.pattern = pattern
+        self.claimed: List[Path] = []
+        self._before: Set[str] = set()
+
+    @property
+    def active(self) -> bool:
+        return self.client_dir.resolve() != self.target_dir.resolve()
+
+    def _logs(self) -> Set[str]:
+        try:
+            return {p.name for p in self.client_dir.glob(self.pattern)}
+        except OSError:
+            return set()
+
+    @contextmanager
+    def starting(self, timeout: float = LOCK_STALE):
+        """Hold the start lock of the client folder while the client starts."""
+        if not self.active:
+            yield self
+            return
+        lock = self.client_dir / LOCK_NAME
+        self.client_dir.mkdir(parents=True, exist_ok=True)
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                os.close(os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                break
+            except FileExistsError:
+                try:
+                    if time.time() - lock.stat().st_mtime > LOCK_STALE:
+                        lock.unlink()
+                        continue
+                except OSError:
+                    continue
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"Client log lock {lock} held for more than {timeout:.0f}s")
+                time.sleep(LOCK_POLL)
+        try:
+            self._before = self._logs()
+            yield self
+        finally:
+            try:
+                lock.unlink()
+            except OSError:
+                pass
+
+    def wait_for_log(self, process, timeout: float = LOG_WAIT) -> Optional[Path]:
+        """Inside starting(): wait until the client's new log exists (or it exits) and claim it."""
+        if not self.active:
+            return None
+        deadline = time.monotonic() + timeout
+        while True:
+            new = sorted(self._logs() - self._before)
+            if new:
+                self.claimed = [self.client_dir / name for name in new]
+                return self.claimed[0]
+            if process.poll() is not None or time.monotonic() > deadline:
+                print(f"[WARN] No new client log in {self.client_dir} after starting UdsClient_CL; "
+                      f"it stays there")
+                return None
+            time.sleep(LOCK_POLL)
+
+    def collect(self) -> List[Path]:
+        """Move the claimed logs into the target folder; returns their new paths."""
+        moved = []
+        for src in self.claimed:
+            dst = self.target_dir / src.name
+            try:
+                self.target_dir.mkdir(parents=True, exist_ok=True)
+                shutil.move(str(src), str(dst))
+                moved.append(dst)
+            except OSError as e:
+                print(f"[WARN] Could not move client log {src} to {self.target_dir}: {e}")
+        self.claimed = []
+        return moved
@@ -0,0 +1,324 @@
+# combined_writes.py
+"""
+Combined-write test mode for the parameter-table scripts.
+
+Faults_Configuration.script and Network_Missmatch_F1D3.script write one
+parameter per `send 2E`, each followed by a `send 22` readback: 2N requests
+(plus their line delays) for N parameters. Every 2E carries the whole record
+anyway, so this tool writes all parameters of a DID in one request and reads
+back once. The engine checks every written position against the condition
+index (record_check.py), so one PASS/FAIL per parameter still comes out.
+
+Each position gets a distinct value (the script's value, nudged by the
+smallest step that is not used yet and not the documented default), so a
+value landing at the wrong offset cannot pass.
+
+Only when a combined write fails (a mismatch, an NRC or no answer) does the
+runner bisect: the failing group is split in halves, written again, and so
+on until the failing parameters are written on their own, like in the
+original script.
+
+    python combined_writes.py --project UPP            # plan + run-time estimate
+    python combined_writes.py --project UPP --write    # combined_variants/UPP/Scripts/*.script
+
+The runner uses the combined variants and bisects with UDS_COMBINED_WRITES=1.
+Parameters no condition covers keep their own write/read pair.
+"""
+import argparse
+import re
+import sqlite3
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+from Project.Common.profiles import PROFILES, Profile
+from Project.Common.results_store import DB_PATH, STATUS_PASS
+from Project.Common.script_lint import lint_script, parse_script
+
+# =========================
+# ======  CONFIG  =========
+# =========================
+
+BASE_DIR = Path(__file__).resolve().parent
+VARIANTS_ROOT = BASE_DIR / "combined_variants"
+
+# Scripts run in combined mode (one 2E per parameter, each followed by a 22)
+COMBINED_SCRIPTS = ("Faults_Configuration", "Network_Missmatch_F1D3")
+
+# Bisection rounds after the combined run; 2**7 > the largest table (078F, 60 parameters)
+MAX_ROUNDS = 7
+
+NOTE_RE = re.compile(r"\((?:Default\s*)?(-?[\d.]+)[^)]*?[Ss]cale[d]?\s*(-?[\d.]+)")
+
+
+# =========================
+# ======  PLANNING  =======
+# =========================
+
+class Parameter:
+    """One `send 2E` of the table: the non-zero bytes it writes."""
+
+    def __init__(self, did: str, values: Dict[int, int], label: str, line_no: int,
+                 default_raw: Optional[int], record_len: int):
+        self.did = did
+        self.values = values            # position -> byte
+        self.label = label              # comment above the send
+        self.line_no = line_no
+        self.default_raw = default_raw
+        self.record_len = record_len
+        self.conditions: List[str] = []
+
+    def __repr__(self):
+        return f"Parameter({self.did}, line {self.line_no}, {self.label!r})"
+
+
+def _default_raw(note: str) -> Optional[int]:
+    """Raw default from '(Default 100, Scale 10)' -> 10; None if not given or not whole."""
+    m = NOTE_RE.search(note)
+    if not m:
+        return None
+    raw = float(m.group(1)) / float(m.group(2))
+    return int(raw) if raw.is_integer() else None
+
+
+def read_parameters(script: Path, profile: Profile):
+    """
+    (preamble lines, parameters, loose lines). The preamble is everything up to
+    the first 2E that writes a non-zero byte; loose lines are the write/read
+    pairs of parameters no condition covers, kept as they are.
+    """
+    lines = script.read_text(encoding="utf-8", errors="replace").splitlines()
+    commands = parse_script(script)
+    name = script.stem
+    preamble_end = None
+    params: List[Parameter] = []
+    loose: List[str] = []
+    for i, c in enumerate(commands):
+        if c.cmd != "send" or not c.data or c.data[0] != 0x2E or len(c.data) < 4:
+            continue
+        did = f"{c.data[1]:02X}{c.data[2]:02X}"
+        record = c.data[3:]
+        values = {pos: b for pos, b in enumerate(record) if b}
+        if not values:
+            continue
+        if preamble_end is None:
+            preamble_end = c.line_no - 1
+        note = lines[c.line_no - 2].strip() if c.line_no >= 2 else ""
+        p = Parameter(did, values, note, c.line_no, _default_raw(note), len(record))
+        p.conditions = sorted({cond for pos in values for cond in profile.conditions_at(name, pos)})
+        if p.conditions:
+            params.append(p)
+            continue
+        # Nothing to verify it by name: keep its own pair (the 2E and the 22 after it)
+        loose.append(lines[c.line_no - 1])
+        nxt = commands[i + 1] if i + 1 < len(commands) else None
+        if nxt and nxt.cmd == "send" and nxt.data and nxt.data[0] == 0x22:
+            loose.append(lines[nxt.line_no - 1])
+    if preamble_end is None:
+        preamble_end = len(lines)
+    # Drop the comment heading the first table entry
+    preamble = lines[:preamble_end]
+    while preamble and (not preamble[-1].strip() or preamble[-1].lstrip().startswith("#")):
+        preamble.pop()
+    return preamble, params, loose
+
+
+def group_parameters(params: List[Parameter]) -> List[List[Parameter]]:
+    """One group per DID; a parameter overlapping a group's positions starts another group."""
+    groups: List[List[Parameter]] = []
+    taken: List[Set[int]] = []
+    for p in params:
+        for g, positions in zip(groups, taken):
+            if g[0].did == p.did and not positions & p.values.keys():
+                g.append(p)
+                positions.update(p.values)
+                break
+        else:
+            groups.append([p])
+            taken.append(set(p.values))
+    return groups
+
+
+def combined_record(group: List[Parameter]) -> bytes:
+    """
+    The group's record in one write. Single-byte parameters get distinct values:
+    the script's value or the nearest unused one that is not the default.
+    """
+    record = bytearray(max(p.record_len for p in group))
+    used: Set[int] = set()
+    for p in group:
+        if len(p.values) == 1:
+            (pos, value), = p.values.items()
+            for step in range(256):
+                for candidate in (value - step, value + step):
+                    if 1 <= candidate <= 255 and candidate not in used and candidate != p.default_raw:
+                        break
+                else:
+                    continue
+                break
+            else:
+                candidate = value
+            record[pos] = candidate
+            used.add(candidate)
+        else:
+            for pos, value in p.values.items():
+                record[pos] = value
+    return bytes(record)
+
+
+class CombinedPlan:
+    """The groups of one script for one bench round."""
+
+    def __init__(self, script: Path, preamble: List[str], groups: List[List[Parameter]],
+                 loose: Optional[List[str]] = None, round_no: int = 0):
+        self.script = script
+        self.name = script.stem
+        self.preamble = preamble
+        self.groups = groups
+        self.loose = loose or []
+        self.round_no = round_no
+        self.failed: List[Parameter] = []     # failed when written on their own
+
+    def render(self) -> str:
+        out = list(self.preamble)
+        title = "Combined writes" if self.round_no == 0 else f"Bisection round {self.round_no}"
+        for n, group in enumerate(self.groups, start=1):
+            did = group[0].did
+            lines = f"line {group[0].line_no}" if len(group) == 1 else f"lines {group[0].line_no}-{group[-1].line_no}"
+            out += ["", f"#{title} {n}/{len(self.groups)}: {len(group)} parameter(s), script {lines}",
+                    f"send 2E {did} " + combined_record(group).hex(" ").upper(),
+                    f"send 22 {did}"]
+        if self.loose:
+            out += ["", "#Parameters without a condition, written on their own"] + self.loose
+        return "\n".join(out) + "\n"
+
+    def write(self, out_dir: Path) -> Path:
+        """<out_dir>/<script name>.script; out_dir must be a ...\\Scripts folder (variant_dir)
+        so the engine still finds the condition table."""
+        out_dir.mkdir(parents=True, exist_ok=True)
+        path = out_dir / self.script.name
+        path.write_text(self.render(), encoding="utf-8")
+        return path
+
+    def failed_groups(self, statuses: Dict[str, Set[str]]) -> List[List[Parameter]]:
+        """
+        Groups with a condition that has no PASS (FAIL, or no record at all: NRC /
+        no answer). Only a condition's own write can pass it; a FAIL next to a PASS
+        comes from another group's readback (e.g. the record left by an earlier
+        write after a rejected one).
+        """
+        return [g for g in self.groups
+                if any(STATUS_PASS not in statuses.get(c, ()) for p in g for c in p.conditions)]
+
+    def bisect(self, statuses: Dict[str, Set[str]]) -> "CombinedPlan":
+        """Next round: failing groups split in halves; failing single parameters are final."""
+        nxt = CombinedPlan(self.script, self.preamble, [], round_no=self.round_no + 1)
+        nxt.failed = list(self.failed)
+        for g in self.failed_groups(statuses):
+            if len(g) == 1:
+                nxt.failed.append(g[0])
+            else:
+                half = len(g) // 2
+                nxt.groups += [g[:half], g[half:]]
+        return nxt
+
+
+def plan_script(script: Path, profile: Profile) -> CombinedPlan:
+    preamble, params, loose = read_parameters(script, profile)
+    return CombinedPlan(script, preamble, group_parameters(params), loose)
+
+
+def variant_dir(project: str, round_no: int = 0) -> Path:
+    """combined_variants/<P>/Scripts, bisection rounds under Bisect<N>/Scripts: the engine
+    only takes the script name from a path ending in \\Scripts\\<name>.script."""
+    if round_no == 0:
+        return VARIANTS_ROOT / project / "Scripts"
+    return VARIANTS_ROOT / project / f"Bisect{round_no}" / "Scripts"
+
+
+# =========================
+# ======  RESULTS  ========
+# =========================
+
+def latest_statuses(profile: Profile, script_name: str, db_path: Path = DB_PATH) -> Dict[str, Set[str]]:
+    """condition -> statuses in the last stored run of the profile's device, for one script."""
+    if not Path(db_path).is_file():
+        return {}
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        rows = conn.execute(
+            "SELECT condition, status FROM records WHERE script = ? AND run_id = "
+            "(SELECT MAX(id) FROM runs WHERE device = ?)",
+            (script_name, profile.device)).fetchall()
+    except sqlite3.Error:
+        return {}
+    finally:
+        conn.close()
+    statuses: Dict[str, Set[str]] = {}
+    for condition, status in rows:
+        statuses.setdefault(condition, set()).add(status)
+    return statuses
+
+
+def run_bisection(plans: List[CombinedPlan], profile: Profile, run_scripts, parse) -> List[Parameter]:
+    """
+    After the combined run has been parsed: re-write the failing groups in
+    halves until every failure is down to single parameters. `run_scripts(paths)`
+    runs UdsClient_CL, `parse()` stores the new log in the results store.
+    Returns the parameters that failed on their own.
+    """
+    for round_no in range(1, MAX_ROUNDS + 1):
+        plans = [p.bisect(latest_statuses(profile, p.name)) for p in plans]
+        pending = [p for p in plans if p.groups]
+        if not pending:
+            break
+        print(f"\n[INFO] Bisection round {round_no}: "
+              + ", ".join(f"{p.name} {len(p.groups)} group(s)" for p in pending))
+        run_scripts([p.write(variant_dir(profile.name, round_no)) for p in pending])
+        parse()
+    else:
+        plans = [p.bisect(latest_statuses(profile, p.name)) for p in plans]
+    failed = [param for p in plans for param in p.failed]
+    for p in plans:
+        for param in p.failed:
+            print(f"[ERROR] {p.name}: line {param.line_no} {param.label} fails when written on its own")
+        for g in p.groups:
+            print(f"[WARN] {p.name}: {len(g)} parameter(s) still failing together after {MAX_ROUNDS} rounds")
+    return failed
+
+
+# =========================
+# ========= CLI ===========
+# =========================
+
+def _main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Plan combined 2E writes for the parameter-table scripts")
+    ap.add_argument("--project", default="UPP", choices=sorted(PROFILES))
+    ap.add_argument("--scripts", nargs="*", default=list(COMBINED_SCRIPTS),
+                    help="script names (default: %(default)s)")
+    ap.add_argument("--write", action="store_true", help="write combined_variants/<project>/Scripts/*.script")
+    args = ap.parse_args(argv)
+
+    profile = PROFILES[args.project]
+    for name in args.scripts:
+        script = profile.scripts_dir / f"{name}.script"
+        if not script.is_file():
+            print(f"[WARN] {script} not found")
+            continue
+        plan = plan_script(script, profile)
+        params = sum(len(g) for g in plan.groups)
+        before = lint_script(script, profile).total_seconds
+        line = (f"[INFO] {name}: {params} parameter(s) in {len(plan.groups)} write(s), "
+                f"{len(plan.loose) // 2} on their own")
+        with tempfile.TemporaryDirectory() as tmp:
+            after = lint_script(plan.write(Path(tmp)), profile).total_seconds
+        line += f", est {before:.0f}s -> {after:.0f}s"
+        if args.write:
+            line += f" ({plan.write(variant_dir(profile.name))})"
+        print(line)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(_main())
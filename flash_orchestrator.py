@@ -0,0 +1,245 @@
+# flash_orchestrator.py
+"""
+Run flash rounds on several benches at once.
+
+Each target is (channel, device, old folder, new folder). Targets on the same
+CAN channel run one after another in a single worker; different channels run
+concurrently. Every target runs its device flash script (UPP_flash.py /
+NewGen_flash.py) as its own process, so a failure on one bench never stops the
+others. Console output, telemetry and the target's UdsClient_CL logs
+(claimed in C:\\temp3, see client_logs.py) are kept in its own log folder,
+named after the target, and a combined summary is printed and written as JSON
+at the end.
+
+Targets file (JSON):
+    [
+      {"channel": "51", "device": "UPP",    "old": "C:\\\\Jenkins\\\\NewVersion\\\\UPP_v3.02.00",
+                                            "new": "C:\\\\Jenkins\\\\NewVersion\\\\UPP_v3.02.02"},
+      {"channel": "52", "device": "NewGen", "old": "...", "new": "..."}
+    ]
+
+Usage:
+    python flash_orchestrator.py --targets targets.json
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+# ---- Console safety: avoid charmap/encoding crashes everywhere ----
+try:
+    sys.stdout.reconfigure(encoding='utf-8', errors='replace')
+    sys.stderr.reconfigure(encoding='utf-8', errors='replace')
+except Exception:
+    pass
+
+# =========================
+# ======  CONFIG  =========
+# =========================
+
+BASE_DIR = Path(__file__).resolve().parent
+
+# Same mapping as the Jenkins 'Environment' stage
+FLASH_SCRIPTS = {
+    "UPP": BASE_DIR / "UPP_flash.py",
+    "NewGen": BASE_DIR / "NewGen_flash.py",
+}
+
+LOGS_DIR = Path(r"C:\temp3")
+
+_print_lock = threading.Lock()
+
+
+# =========================
+# ======  HELPERS  ========
+# =========================
+
+def load_targets(path: Path) -> List[Dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        targets = json.load(f)
+    if not isinstance(targets, list) or not targets:
+        raise ValueError(f"{path}: expected a non-empty JSON list of targets")
+
+    for i, t in enumerate(targets):
+        missing = [k for k in ("channel", "device", "old", "new") if not t.get(k)]
+        if missing:
+            raise ValueError(f"Target #{i + 1} is missing: {', '.join(missing)}")
+        t["channel"] = str(t["channel"])
+        if t["device"] not in FLASH_SCRIPTS:
+            raise ValueError(f"Target #{i + 1}: unknown device '{t['device']}' "
+                             f"(expected one of {', '.join(FLASH_SCRIPTS)})")
+        t.setdefault("name", f"{t['device']}_ch{t['channel']}")
+
+    # The name is the target's log folder: two targets must not share one
+    names = [t["name"] for t in targets]
+    dupes = sorted({n for n in names if names.count(n) > 1})
+    if dupes:
+        raise ValueError(f"{path}: duplicate target name(s) {', '.join(dupes)}; "
+                         f"give each target its own \"name\"")
+    return targets
+
+
+def group_by_channel(targets: List[Dict]) -> Dict[str, List[Dict]]:
+    groups: Dict[str, List[Dict]] = {}
+    for t in targets:
+        groups.setdefault(t["channel"], []).append(t)
+    return groups
+
+
+def clear_logs_dir(logs_dir: Path) -> None:
+    """Empty the shared logs folder once, before any worker starts."""
+    if not logs_dir.exists():
+        return
+    for entry in logs_dir.iterdir():
+        try:
+            if entry.is_file() or entry.is_symlink():
+                entry.unlink()
+            elif entry.is_dir():
+                shutil.rmtree(entry)
+        except OSError as e:
+            print(f"   ! Failed removing {entry}: {e}")
+
+
+# =========================
+# ======  WORKERS  ========
+# =========================
+
+def run_target(target: Dict, logs_root: Path, no_copy: bool, timeout: int) -> Dict:
+    """Run one target's flash script in its own process; never raises."""
+    name = target["name"]
+    target_logs = logs_root / name
+    target_logs.mkdir(parents=True, exist_ok=True)
+    console_log = target_logs / "flash_console.log"
+
+    cmd = [
+        sys.executable, "-X", "utf8", "-u", str(FLASH_SCRIPTS[target["device"]]),
+        "--old", target["old"],
+        "--new", target["new"],
+        "--channel", target["channel"],
+        "--logs-dir", str(target_logs),
+        "--no-clean",
+    ]
+    if no_copy:
+        cmd.append("--no-copy")
+
+    env = os.environ.copy()
+    env["PYTHONIOENCODING"] = "utf-8"
+    env["ROUND_INDEX"] = f"{name}"
+
+    result = {"name": name, "channel": target["channel"], "device": target["device"],
+              "log": str(console_log), "returncode": None, "error": None}
+    start = time.time()
+    try:
+        with open(console_log, "w", encoding="utf-8") as log:
+            proc = subprocess.Popen(
+                cmd, cwd=str(BASE_DIR), env=env,
+                stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                text=True, encoding="utf-8", errors="replace", bufsize=1,
+            )
+            killer = threading.Timer(timeout, proc.kill)
+            killer.start()
+            try:
+                for line in proc.stdout:
+                    log.write(line)
+                    # Progress redraws (ANSI clear-line) are only useful in the per-target log
+                    if "\x1b[2K" not in line:
+                        with _print_lock:
+                            sys.stdout.write(f"[{name}] {line}")
+                proc.wait()
+            finally:
+                killer.cancel()
+        result["returncode"] = proc.returncode
+        if proc.returncode != 0:
+            result["error"] = f"exit code {proc.returncode}"
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+
+    result["duration_s"] = round(time.time() - start, 1)
+    result["ok"] = result["error"] is None
+    return result
+
+
+def run_channel(channel: str, targets: List[Dict], logs_root: Path,
+                no_copy: bool, timeout: int) -> List[Dict]:
+    """One worker per CAN channel: its targets run strictly in sequence."""
+    results = []
+    for t in targets:
+        with _print_lock:
+            print(f"\n=== [{t['name']}] starting on channel {channel} ===")
+        res = run_target(t, logs_root, no_copy, timeout)
+        with _print_lock:
+            status = "OK" if res["ok"] else f"FAILED ({res['error']})"
+            print(f"=== [{t['name']}] {status} in {res['duration_s']} sec ===")
+        results.append(res)
+    return results
+
+
+def print_summary(results: List[Dict], total_s: float) -> None:
+    print("\n----------------------------------------")
+    print("MULTI-BENCH FLASH SUMMARY")
+    print("----------------------------------------")
+    for r in results:
+        status = "OK" if r["ok"] else "FAILED"
+        print(f"{r['name']:<20} ch={r['channel']:<4} {status:<7} "
+              f"{r['duration_s']:>8}s  {r['error'] or ''}")
+    failed = sum(1 for r in results if not r["ok"])
+    print("----------------------------------------")
+    print(f"Targets: {len(results)}, failed: {failed}, wall time: {int(total_s)} sec")
+
+
+# =========================
+# ========= main ==========
+# =========================
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Flash several benches concurrently")
+    ap.add_argument("--targets", required=True, help="JSON file with the list of targets")
+    ap.add_argument("--logs-dir", default=str(LOGS_DIR), help="Root for per-target logs (default %(default)s)")
+    ap.add_argument("--no-clean", action="store_true", help="Do not empty the logs root first")
+    ap.add_argument("--no-copy", action="store_true", help="Do not copy logs to the external disk")
+    ap.add_argument("--timeout", type=int, default=3 * 3600, help="Per-target timeout in seconds")
+    args = ap.parse_args()
+
+    try:
+        targets = load_targets(Path(args.targets))
+    except (OSError, ValueError) as e:
+        print(f"\nERROR: {e}", file=sys.stderr)
+        return 1
+
+    logs_root = Path(args.logs_dir)
+    logs_root.mkdir(parents=True, exist_ok=True)
+    if not args.no_clean:
+        print(f"🧹 Cleaning {logs_root} ...")
+        clear_logs_dir(logs_root)
+
+    groups = group_by_channel(targets)
+    print(f"[INFO] {len(targets)} target(s) on {len(groups)} channel(s): {', '.join(groups)}")
+
+    start = time.time()
+    results: List[Dict] = []
+    with ThreadPoolExecutor(max_workers=len(groups)) as pool:
+        futures = [pool.submit(run_channel, ch, ts, logs_root, args.no_copy, args.timeout)
+                   for ch, ts in groups.items()]
+        for fut in futures:
+            results.extend(fut.result())
+    total = time.time() - start
+
+    print_summary(results, total)
+    summary_path = logs_root / f"multi_flash_summary_{datetime.now():%Y%m%d_%H%M%S}.json"
+    with open(summary_path, "w", encoding="utf-8") as f:
+        json.dump({"wall_time_s": round(total, 1), "targets": results}, f, indent=2)
+    print(f"[INFO] Summary written to {summary_path}")
+
+    return 0 if all(r["ok"] for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,248 @@
+# flash_telemetry.py
+"""
+Progress/timing telemetry for one UdsClient_CL flash step.
+
+run_flash() feeds every percent line it parses into a FlashTelemetry. The
+object keeps timestamped samples, computes throughput from the hex image size,
+and a watchdog thread kills the client when the percentage has not moved for
+`stall_timeout` seconds. Before the first percent line (connect, session,
+erase) only `start_timeout` applies, so a slow erase is not taken for a
+stall. At the end of the step a CSV (samples) and a JSON (summary) are
+written next to the other flashing logs.
+"""
+import csv
+import json
+import math
+import re
+import subprocess
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# Default: abort when no percent change for this many seconds
+STALL_TIMEOUT = 180
+# Default: abort when the first percent line has not come after this many seconds
+START_TIMEOUT = 600
+
+
+class FlashTelemetry:
+    def __init__(self, step: str, target: str, file_path: Path,
+                 image_size: Optional[int] = None, stall_timeout: float = STALL_TIMEOUT,
+                 start_timeout: float = START_TIMEOUT):
+        self.step = step
+        self.target = target
+        self.file_path = Path(file_path)
+        self.image_size = image_size
+        self.stall_timeout = stall_timeout
+        self.start_timeout = start_timeout
+        self.started_at = datetime.now()
+        self.t0 = time.monotonic()
+        self.samples: List[Tuple[float, int]] = []   # (seconds since start, percent)
+        self.last_change = self.t0
+        self.last_pct: Optional[int] = None
+        self.stalled = False
+        self.stall_message = ""
+        self.returncode: Optional[int] = None
+        self.ended: Optional[float] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    # ---- sampling ----
+    def sample(self, pct: int, now: Optional[float] = None) -> None:
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self.samples.append((round(now - self.t0, 3), pct))
+            if pct != self.last_pct:
+                self.last_pct = pct
+                self.last_change = now
+
+    def seconds_since_progress(self) -> float:
+        with self._lock:
+            return time.monotonic() - self.last_change
+
+    def stall_reason(self, now: Optional[float] = None) -> Optional[str]:
+        """Why the flash counts as stalled at `now` (monotonic), None while it is within its timeout."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            idle, pct = now - self.last_change, self.last_pct
+        if pct is None:
+            if idle > self.start_timeout:
+                return f"no flash progress {self.start_timeout:.0f}s after start"
+        elif idle > self.stall_timeout:
+            return f"no flash progress for {self.stall_timeout:.0f}s (last {pct}%)"
+        return None
+
+    # ---- stall watchdog ----
+    def watch(self, process: subprocess.Popen, poll: float = 1.0) -> threading.Thread:
+        """Start a daemon thread that kills `process` if progress stalls."""
+        def _run():
+            while not self._stop.wait(poll):
+                if process.poll() is not None:
+                    return
+                reason = self.stall_reason()
+                if reason:
+                    self.stalled = True
+                    self.stall_message = reason
+                    print(f"\n[ERROR] {reason[0].upper()}{reason[1:]} – aborting {self.target}")
+                    process.kill()
+                    return
+
+        t = threading.Thread(target=_run, name=f"stall-watch-{self.step}", daemon=True)
+        t.start()
+        return t
+
+    def finish(self, returncode: Optional[int]) -> None:
+        self._stop.set()
+        self.returncode = returncode
+        self.ended = time.monotonic()
+
+    # ---- results ----
+    def summary(self) -> Dict:
+        duration = (self.ended or time.monotonic()) - self.t0
+        first_t = self.samples[0][0] if self.samples else None
+        last_t = self.samples[-1][0] if self.samples else None
+        final_pct = self.last_pct or 0
+
+        throughput = None
+        if self.image_size and self.samples and last_t and last_t > first_t:
+            done = self.image_size * (final_pct - self.samples[0][1]) / 100.0
+            throughput = round(done / (last_t - first_t), 1)
+
+        max_gap = 0.0
+        for (t_prev, _), (t_cur, _) in zip(self.samples, self.samples[1:]):
+            max_gap = max(max_gap, t_cur - t_prev)
+
+        return {
+            "step": self.step,
+            "target": self.target,
+            "file": str(self.file_path),
+            "image_size": self.image_size,
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "duration_s": round(duration, 2),
+            "time_to_first_progress_s": first_t,
+            "transfer_s": None if first_t is None else round(last_t - first_t, 2),
+            "final_pct": final_pct,
+            "throughput_bps": throughput,
+            "max_progress_gap_s": round(max_gap, 2),
+            "samples": len(self.samples),
+            "stalled": self.stalled,
+            "returncode": self.returncode,
+        }
+
+    def write(self, out_dir: Path) -> Optional[Path]:
+        """Write <step>_<time>.csv and .json into out_dir; returns the JSON path."""
+        out_dir = Path(out_dir)
+        try:
+            out_dir.mkdir(parents=True, exist_ok=True)
+            safe_step = re.sub(r"[^A-Za-z0-9_.-]+", "_", self.step) or "flash"
+            stem = f"flash_telemetry_{safe_step}_{self.started_at:%Y%m%d_%H%M%S}"
+            csv_path = out_dir / f"{stem}.csv"
+            json_path = out_dir / f"{stem}.json"
+
+            with open(csv_path, "w", newline="", encoding="utf-8") as f:
+                w = csv.writer(f)
+                w.writerow(["t_s", "percent"])
+                w.writerows(self.samples)
+            with open(json_path, "w", encoding="utf-8") as f:
+                json.dump(self.summary(), f, indent=2)
+            return json_path
+        except OSError as e:
+            print(f"[WARN] Could not write flash telemetry to {out_dir}: {e}")
+            return None
+
+    def print_summary(self) -> None:
+        s = self.summary()
+        rate = f"{s['throughput_bps'] / 1024:.1f} KiB/s" if s["throughput_bps"] else "n/a"
+        print(f"[INFO] Telemetry {s['step']}: {s['duration_s']}s total, "
+              f"{s['final_pct']}% reached, throughput {rate}, "
+              f"max gap {s['max_progress_gap_s']}s{' (STALLED)' if s['stalled'] else ''}")
+
+
+def _percentile(sorted_vals: List[float], pct: float) -> float:
+    """Nearest-rank percentile on an already sorted list."""
+    if not sorted_vals:
+        return 0.0
+    k = max(0, min(len(sorted_vals) - 1, math.ceil(pct / 100.0 * len(sorted_vals)) - 1))
+    return sorted_vals[k]
+
+
+class LoopStatistics:
+    """Per-step duration distribution and failure counts across flash rounds."""
+
+    def __init__(self, device: str, loops: int):
+        self.device = device
+        self.loops = loops
+        self.started_at = datetime.now()
+        self.rounds_done = 0
+        self.rounds_failed = 0
+        self.durations: Dict[str, List[float]] = {}
+        self.throughputs: Dict[str, List[float]] = {}
+        self.failures: Dict[str, int] = {}
+        self.errors: List[Dict] = []
+
+    def record_step(self, round_no: int, step: str, duration: float,
+                    ok: bool, summary: Optional[Dict] = None, error: str = "") -> None:
+        self.durations.setdefault(step, [])
+        self.failures.setdefault(step, 0)
+        if ok:
+            self.durations[step].append(duration)
+            if summary and summary.get("throughput_bps"):
+                self.throughputs.setdefault(step, []).append(summary["throughput_bps"])
+        else:
+            self.failures[step] += 1
+            self.errors.append({"round": round_no, "step": step, "error": error})
+
+    def record_round(self, ok: bool) -> None:
+        self.rounds_done += 1
+        if not ok:
+            self.rounds_failed += 1
+
+    def summary(self) -> Dict:
+        steps = {}
+        for step, vals in self.durations.items():
+            s = sorted(vals)
+            tp = self.throughputs.get(step, [])
+            steps[step] = {
+                "ok": len(s),
+                "failed": self.failures.get(step, 0),
+                "min_s": round(s[0], 1) if s else None,
+                "median_s": round(_percentile(s, 50), 1) if s else None,
+                "p95_s": round(_percentile(s, 95), 1) if s else None,
+                "max_s": round(s[-1], 1) if s else None,
+                "mean_throughput_bps": round(sum(tp) / len(tp), 1) if tp else None,
+            }
+        return {
+            "device": self.device,
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "loops_requested": self.loops,
+            "rounds_done": self.rounds_done,
+            "rounds_failed": self.rounds_failed,
+            "steps": steps,
+            "errors": self.errors,
+        }
+
+    def print_summary(self) -> None:
+        s = self.summary()
+        print("\n----------------------------------------")
+        print(f"FLASH LOOP STATISTICS ({s['device']})")
+        print("----------------------------------------")
+        print(f"Rounds: {s['rounds_done']}/{s['loops_requested']}, failed: {s['rounds_failed']}")
+        print(f"{'step':<16}{'ok':>5}{'fail':>6}{'min':>8}{'median':>8}{'p95':>8}{'max':>8}")
+        for step, st in s["steps"].items():
+            cols = [st[k] if st[k] is not None else "-" for k in ("min_s", "median_s", "p95_s", "max_s")]
+            print(f"{step:<16}{st['ok']:>5}{st['failed']:>6}" + "".join(f"{c:>8}" for c in cols))
+        print("----------------------------------------")
+
+    def write(self, out_dir: Path) -> Optional[Path]:
+        out_dir = Path(out_dir)
+        path = out_dir / f"flash_loop_summary_{self.started_at:%Y%m%d_%H%M%S}.json"
+        try:
+            out_dir.mkdir(parents=True, exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(self.summary(), f, indent=2)
+            return path
+        except OSError as e:
+            print(f"[WARN] Could not write loop summary to {out_dir}: {e}")
+            return None
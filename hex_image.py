@@ -0,0 +1,270 @@
+# hex_image.py
+"""
+Streaming Intel HEX reader used to validate firmware images before flashing.
+
+A truncated or corrupt .hex is otherwise only discovered when UdsClient_CL
+fails in the middle of a flash. `inspect_hex` walks the file once, checks every
+record checksum, and collects the image CRC, address ranges, size and any
+embedded version strings. Results are cached by the SHA-256 of the file, so
+re-checking the same image on the next round/loop is a single hash + lookup.
+"""
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+import zlib
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# =========================
+# ======  CONFIG  =========
+# =========================
+
+# Cache file lives next to the flash scripts (kept out of git via .gitignore)
+CACHE_FILE = Path(__file__).resolve().parent / "hex_cache.json"
+
+# Bump when the metadata layout changes so stale cache entries are ignored
+CACHE_VERSION = 1
+
+# Printable ASCII runs that look like a version (3.02.00, v03.02.02, UPP_v3.2.0 ...)
+VERSION_RE = re.compile(rb"[ -~]{0,24}[vV]?\d{1,3}\.\d{1,3}\.\d{1,3}[ -~]{0,24}")
+NON_PRINTABLE_RE = re.compile(rb"[^ -~]")
+MIN_ASCII_RUN = 6
+MAX_VERSION_STRINGS = 16
+
+# Intel HEX record types
+REC_DATA = 0x00
+REC_EOF = 0x01
+REC_EXT_SEGMENT = 0x02
+REC_START_SEGMENT = 0x03
+REC_EXT_LINEAR = 0x04
+REC_START_LINEAR = 0x05
+
+
+# In-process memo keyed by (path, size, mtime) so flash loops do not re-hash
+_MEMO: Dict[tuple, Dict] = {}
+
+
+class HexImageError(ValueError):
+    """Raised when a .hex file is not a valid Intel HEX image."""
+
+
+# =========================
+# ======  HELPERS  ========
+# =========================
+
+def file_sha256(path: Path, chunk_size: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _merge_ranges(ranges: List[List[int]]) -> List[List[int]]:
+    """Merge [start, end) ranges that touch or overlap."""
+    if not ranges:
+        return []
+    ranges = sorted(ranges)
+    merged = [list(ranges[0])]
+    for start, end in ranges[1:]:
+        last = merged[-1]
+        if start <= last[1]:
+            last[1] = max(last[1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def _scan_ascii(tail: bytes, found: List[str]) -> None:
+    """Pick version-looking strings out of printable ASCII runs."""
+    for run in re.findall(rb"[ -~]{%d,}" % MIN_ASCII_RUN, tail):
+        for m in VERSION_RE.finditer(run):
+            text = m.group(0).decode("ascii").strip()
+            if text and text not in found and len(found) < MAX_VERSION_STRINGS:
+                found.append(text)
+
+
+# =========================
+# ======  PARSER  =========
+# =========================
+
+def parse_hex(path: Path) -> Dict:
+    """
+    Parse and validate an Intel HEX file in a single streaming pass.
+
+    Raises HexImageError on the first malformed record, bad checksum, or if the
+    file ends without an EOF record (typical of a truncated copy).
+    Returns a metadata dict (JSON-serialisable).
+    """
+    crc = 0
+    size = 0
+    records = 0
+    base = 0
+    ranges: List[List[int]] = []
+    versions: List[str] = []
+    ascii_tail = b""
+    start_address: Optional[int] = None
+    eof_seen = False
+
+    with open(path, "rb") as f:
+        for lineno, raw in enumerate(f, start=1):
+            line = raw.strip()
+            if not line:
+                continue
+            if eof_seen:
+                raise HexImageError(f"{path.name}:{lineno}: data after EOF record")
+            if line[:1] != b":":
+                raise HexImageError(f"{path.name}:{lineno}: record does not start with ':'")
+            try:
+                rec = bytes.fromhex(line[1:].decode("ascii"))
+            except (ValueError, UnicodeDecodeError):
+                raise HexImageError(f"{path.name}:{lineno}: non-hex characters in record")
+            if len(rec) < 5 or len(rec) != rec[0] + 5:
+                raise HexImageError(f"{path.name}:{lineno}: record length mismatch (truncated?)")
+            if sum(rec) & 0xFF:
+                raise HexImageError(f"{path.name}:{lineno}: checksum error")
+
+            count = rec[0]
+            offset = (rec[1] << 8) | rec[2]
+            rtype = rec[3]
+            data = rec[4:4 + count]
+            records += 1
+
+            if rtype == REC_DATA:
+                addr = base + offset
+                crc = zlib.crc32(data, crc)
+                size += count
+                if ranges and ranges[-1][1] == addr:
+                    ranges[-1][1] = addr + count
+                else:
+                    ranges.append([addr, addr + count])
+                # Scan in chunks, cutting at the last non-printable byte so a
+                # string split across records is still seen in one piece
+                ascii_tail += data
+                if len(ascii_tail) > 4096:
+                    cut = NON_PRINTABLE_RE.search(ascii_tail[::-1])
+                    cut = len(ascii_tail) - cut.start() if cut else len(ascii_tail)
+                    _scan_ascii(ascii_tail[:cut], versions)
+                    ascii_tail = ascii_tail[cut:]
+            elif rtype == REC_EOF:
+                eof_seen = True
+            elif rtype == REC_EXT_SEGMENT:
+                base = int.from_bytes(data, "big") << 4
+            elif rtype == REC_EXT_LINEAR:
+                base = int.from_bytes(data, "big") << 16
+            elif rtype in (REC_START_SEGMENT, REC_START_LINEAR):
+                start_address = int.from_bytes(data, "big")
+            else:
+                raise HexImageError(f"{path.name}:{lineno}: unknown record type 0x{rtype:02X}")
+
+    if not eof_seen:
+        raise HexImageError(f"{path.name}: missing EOF record (file truncated?)")
+    if size == 0:
+        raise HexImageError(f"{path.name}: no data records")
+
+    _scan_ascii(ascii_tail, versions)
+    merged = _merge_ranges(ranges)
+    return {
+        "records": records,
+        "size": size,
+        "crc32": f"{crc & 0xFFFFFFFF:08X}",
+        "ranges": [[f"0x{s:08X}", f"0x{e - 1:08X}"] for s, e in merged],
+        "start_address": None if start_address is None else f"0x{start_address:08X}",
+        "versions": versions,
+    }
+
+
+# =========================
+# ======  CACHE  ==========
+# =========================
+
+def _load_cache(cache_file: Path) -> Dict:
+    try:
+        with open(cache_file, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if cache.get("version") != CACHE_VERSION:
+        return {}
+    return cache
+
+
+def _save_cache(cache_file: Path, cache: Dict) -> None:
+    cache["version"] = CACHE_VERSION
+    tmp = cache_file.with_suffix(".tmp")
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(cache, f, indent=1)
+        os.replace(tmp, cache_file)
+    except OSError as e:
+        print(f"[WARN] Could not write hex cache {cache_file}: {e}")
+
+
+def inspect_hex(path: Path, cache_file: Path = CACHE_FILE) -> Dict:
+    """
+    Return metadata for `path`, using the hash cache when possible.
+
+    The returned dict always contains 'valid' (bool) and 'sha256'; invalid
+    images also carry 'error'. Corrupt files are cached too, so a bad image is
+    rejected on the next run without re-parsing.
+    """
+    path = Path(path)
+    st = path.stat()
+    memo_key = (str(path.resolve()), st.st_size, st.st_mtime_ns)
+    if memo_key in _MEMO:
+        return dict(_MEMO[memo_key], cached=True)
+
+    sha = file_sha256(path)
+    cache = _load_cache(cache_file)
+    images = cache.setdefault("images", {})
+
+    meta = images.get(sha)
+    if meta is not None:
+        meta = dict(meta, cached=True)
+    else:
+        t0 = time.perf_counter()
+        try:
+            meta = parse_hex(path)
+            meta["valid"] = True
+        except HexImageError as e:
+            meta = {"valid": False, "error": str(e)}
+        meta["parse_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+        meta["sha256"] = sha
+        images[sha] = meta
+        _save_cache(cache_file, cache)
+        meta = dict(meta, cached=False)
+
+    meta["file"] = str(path)
+    _MEMO[memo_key] = meta
+    return meta
+
+
+def require_valid_hex(path: Path, cache_file: Path = CACHE_FILE) -> Dict:
+    """inspect_hex() that raises HexImageError for invalid images and prints a summary."""
+    meta = inspect_hex(path, cache_file)
+    if not meta["valid"]:
+        raise HexImageError(f"Invalid hex image {path}: {meta['error']}")
+    src = "cache" if meta["cached"] else f"parsed in {meta['parse_ms']} ms"
+    ranges = ", ".join(f"{s}-{e}" for s, e in meta["ranges"])
+    print(f"[INFO] HEX OK: {Path(path).name} ({src})")
+    print(f"       size={meta['size']} bytes, CRC32={meta['crc32']}, ranges={ranges}")
+    if meta["versions"]:
+        print(f"       embedded versions: {', '.join(meta['versions'])}")
+    return meta
+
+
+if __name__ == "__main__":
+    # Usage: python hex_image.py <file.hex> [<file.hex> ...]
+    rc = 0
+    for arg in sys.argv[1:]:
+        info = inspect_hex(Path(arg))
+        print(json.dumps(info, indent=2))
+        if not info["valid"]:
+            rc = 1
+    sys.exit(rc)
@@ -1,41 +1,217 @@
 # relay_power_UPP.py
+import atexit
+import datetime
 import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Optional
 
-import serial
-import time, datetime
+try:
+    import serial
+except ImportError:  # only the fake backend is usable without pyserial
+    serial = None
 
+BAUD = 9600
 
+# Relay board command bytes
+RELAY1_ON = 0x65    # relay 1 energised -> power OFF
+RELAY1_OFF = 0x6F   # relay 1 released  -> power ON
+READ_STATE = 0x5B   # board answers with one state byte (bit 0 = relay 1, not yet confirmed on the board)
+RELAY1_MASK = 0x01
 
-def power_cycle_relay(port: str = "COM3", off_time: float = 10.0):
+# UDS_RELAY_VERIFY=1: a state byte that disagrees after all retries aborts the power cycle.
+# Off until the bit mapping is confirmed on hardware; then a mismatch is only a warning.
+VERIFY_STATE = os.environ.get("UDS_RELAY_VERIFY") == "1"
+
+
+class RelayError(RuntimeError):
+    """Relay did not reach the commanded state after all retries."""
+
+
+class FakeSerial:
     """
-    Turn relay 1 ON (power off), wait `off_time` seconds,
-    then turn relay 1 OFF (power on again).
+    Minimal stand-in for serial.Serial that behaves like the relay board.
+    `drop_commands` makes the next N switch commands get lost, to exercise retries.
     """
-    BAUD = 9600
 
-    ser = serial.Serial(port, BAUD, timeout=1)
-    time.sleep(0.2)  # small pause after open
+    def __init__(self, port: str = "FAKE", baudrate: int = BAUD, timeout: float = 1, drop_commands: int = 0):
+        self.port = port
+        self.baudrate = baudrate
+        self.timeout = timeout
+        self.is_open = True
+        self.state = 0x00
+        self.drop_commands = drop_commands
+        self.written = []
+        self._pending = b""
+
+    def write(self, data: bytes) -> int:
+        for b in data:
+            self.written.append(b)
+            if b in (RELAY1_ON, RELAY1_OFF) and self.drop_commands > 0:
+                self.drop_commands -= 1
+                continue
+            if b == RELAY1_ON:
+                self.state |= RELAY1_MASK
+            elif b == RELAY1_OFF:
+                self.state &= ~RELAY1_MASK
+            elif b == READ_STATE:
+                self._pending += bytes([self.state])
+        return len(data)
+
+    def read(self, size: int = 1) -> bytes:
+        out, self._pending = self._pending[:size], self._pending[size:]
+        return out
+
+    def reset_input_buffer(self) -> None:
+        self._pending = b""
+
+    def close(self) -> None:
+        self.is_open = False
+
+
+class RelayController:
+    """
+    Keeps the relay serial port open for a whole session, checks the relay
+    state after each command (raising on a mismatch only with verify=True),
+    and can run a power cycle in the background.
+
+        with RelayController("COM3") as relay:
+            job = relay.power_cycle_async(off_time=10)
+            ...                      # other work while the ECU is off
+            job.result()             # wait for power to be back on
+    """
+
+    def __init__(self, port: str = "COM3", baud: int = BAUD, retries: int = 3,
+                 serial_factory: Optional[Callable] = None, settle: float = 0.05,
+                 verify: bool = VERIFY_STATE):
+        self.port = port
+        self.baud = baud
+        self.retries = retries
+        self.verify = verify
+        self.settle = settle
+        self.serial_factory = serial_factory
+        self.ser = None
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    # ---- port handling ----
+    def open(self) -> "RelayController":
+        if self.ser is not None and self.ser.is_open:
+            return self
+        if self.serial_factory is not None:
+            self.ser = self.serial_factory(self.port, self.baud, timeout=1)
+        else:
+            if serial is None:
+                raise RelayError("pyserial is not installed")
+            self.ser = serial.Serial(self.port, self.baud, timeout=1)
+            time.sleep(0.2)  # small pause after open (board resets on DTR)
+        return self
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        if self.ser is not None:
+            try:
+                self.ser.close()
+            finally:
+                self.ser = None
 
-    def send_byte(b):
-        if isinstance(b, int):
-            b = bytes([b])
-        ser.write(b)
+    def __enter__(self):
+        return self.open()
 
-    # Relay 1 ON (power off)
-    send_byte(0x65)
-    print("Relay 1 ON, power off: ", datetime.datetime.now())
-    time.sleep(off_time)
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
 
-    # Relay 1 OFF (power on)
-    send_byte(0x6F)
-    print("Relay 1 ON, power on: " , datetime.datetime.now())
+    # ---- low level ----
+    def _send_byte(self, b: int) -> None:
+        self.ser.write(bytes([b]))
 
-    # optional: read state
-    send_byte(0x5B)
-    state = ser.read(1)
-    print("State byte:", state, "int:", state[0] if state else None)
+    def read_state(self) -> Optional[int]:
+        """Return the board state byte, or None if it did not answer."""
+        with self._lock:
+            self.open()
+            if hasattr(self.ser, "reset_input_buffer"):
+                self.ser.reset_input_buffer()
+            self._send_byte(READ_STATE)
+            state = self.ser.read(1)
+        return state[0] if state else None
 
-    ser.close()
+    def set_relay1(self, energised: bool) -> Optional[int]:
+        """Switch relay 1 and check it via the state byte; retries on mismatch, returns the last state."""
+        cmd = RELAY1_ON if energised else RELAY1_OFF
+        last_state = None
+        for attempt in range(1, self.retries + 1):
+            with self._lock:
+                self.open()
+                self._send_byte(cmd)
+            time.sleep(self.settle)
+            last_state = self.read_state()
+            if last_state is not None and bool(last_state & RELAY1_MASK) == energised:
+                return last_state
+            print(f"[WARN] Relay 1 state check failed (attempt {attempt}/{self.retries}), "
+                  f"state byte: {last_state}")
+        message = (f"Relay 1 did not switch {'ON' if energised else 'OFF'} on {self.port} "
+                   f"after {self.retries} attempts (last state: {last_state})")
+        if self.verify:
+            raise RelayError(message)
+        print(f"[WARN] {message}; continuing (state check not enforced, UDS_RELAY_VERIFY=1 to enforce)")
+        return last_state
+
+    # ---- power helpers ----
+    def power_off(self) -> None:
+        state = self.set_relay1(True)
+        print("Relay 1 ON, power off: ", datetime.datetime.now(), _state_text(state))
+
+    def power_on(self) -> None:
+        state = self.set_relay1(False)
+        print("Relay 1 OFF, power on: ", datetime.datetime.now(), _state_text(state))
+
+    def power_cycle(self, off_time: float = 10.0) -> None:
+        """Blocking power cycle: off, wait `off_time`, on."""
+        self.power_off()
+        try:
+            time.sleep(off_time)
+        finally:
+            self.power_on()
+
+    def power_cycle_async(self, off_time: float = 10.0) -> Future:
+        """Run power_cycle() in a background thread; returns a Future."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="relay")
+        return self._executor.submit(self.power_cycle, off_time)
+
+
+def _state_text(state: Optional[int]) -> str:
+    return "(no state byte)" if state is None else f"(state 0x{state:02X})"
+
+
+# One open controller per port for the whole process (flash loops reuse it)
+_controllers: Dict[str, RelayController] = {}
+
+
+def get_relay(port: str = "COM3") -> RelayController:
+    relay = _controllers.get(port)
+    if relay is None:
+        relay = _controllers[port] = RelayController(port)
+    return relay.open()
+
+
+@atexit.register
+def _close_all() -> None:
+    for relay in _controllers.values():
+        relay.close()
+    _controllers.clear()
+
+
+def power_cycle_relay(port: str = "COM3", off_time: float = 10.0):
+    """
+    Turn relay 1 ON (power off), wait `off_time` seconds,
+    then turn relay 1 OFF (power on again).
+    The port stays open between calls; the state is checked after each switch.
+    """
+    get_relay(port).power_cycle(off_time)
 
 
 if __name__ == "__main__":
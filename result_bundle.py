@@ -0,0 +1,226 @@
+# result_bundle.py
+"""
+Pack one UDS run (raw client logs, per-script logs, reports, compliance
+matrix) into a single compressed bundle with an index manifest.
+
+The bundle is a zip: every member is compressed on its own (LZMA for text
+logs, stored as-is for .xlsx which are already zip files), and the zip
+central directory gives random access, so a single log can be read without
+unpacking the rest. A bundle_index.json member lists every file with
+its category, size and SHA-256 plus run metadata (device, F195 version).
+
+    python result_bundle.py pack run.udsb Logs/03.02.02 C:/temp3/x.uds.txt --device UPP
+    python result_bundle.py list run.udsb
+    python result_bundle.py cat run.udsb raw/x.uds.txt
+    python result_bundle.py extract run.udsb raw/x.uds.txt out_dir
+"""
+import argparse
+import fnmatch
+import hashlib
+import io
+import json
+import sys
+import zipfile
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# =========================
+# ======  CONFIG  =========
+# =========================
+
+BUNDLE_SUFFIX = ".udsb"
+INDEX_NAME = "bundle_index.json"
+INDEX_VERSION = 1
+
+# Already-compressed formats: recompressing only costs time
+STORED_SUFFIXES = {".xlsx", ".xlsm", ".zip", ".png", ".jpg", ".udsb"}
+
+# (glob on the file name, category) - first match wins
+CATEGORIES: List[Tuple[str, str]] = [
+    ("*.uds.txt", "raw"),
+    ("*compliance*", "compliance"),
+    ("extracted_srd_data*.xlsx", "srd"),
+    ("*_report.xlsx", "report"),
+    ("*.log", "script_log"),
+    ("*.json", "telemetry"),
+    ("*.csv", "telemetry"),
+]
+
+
+class BundleError(ValueError):
+    """Raised for a missing/invalid bundle or an unknown member."""
+
+
+def categorize(name: str) -> str:
+    lower = name.lower()
+    for pattern, category in CATEGORIES:
+        if fnmatch.fnmatch(lower, pattern):
+            return category
+    return "other"
+
+
+def _sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+# =========================
+# ======  PACK  ===========
+# =========================
+
+def collect(sources: List[Path]) -> List[Tuple[Path, str]]:
+    """(file, archive name) pairs. Raw *.uds.txt go under raw/, folders keep their tree."""
+    out: List[Tuple[Path, str]] = []
+    for src in map(Path, sources):
+        if src.is_dir():
+            for p in sorted(src.rglob("*")):
+                if p.is_file():
+                    out.append((p, f"{src.name}/{p.relative_to(src).as_posix()}"))
+        elif src.is_file():
+            prefix = "raw/" if categorize(src.name) == "raw" else ""
+            out.append((src, prefix + src.name))
+        else:
+            print(f"[WARN] Bundle source does not exist, skipping: {src}")
+    return out
+
+
+def pack_run(bundle_path: Path, sources: List[Path], meta: Optional[Dict] = None) -> Path:
+    """Write `sources` (files and/or folders) into a new bundle; returns its path."""
+    bundle_path = Path(bundle_path)
+    files = collect(sources)
+    if not files:
+        raise BundleError("Nothing to bundle")
+
+    index = {
+        "version": INDEX_VERSION,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "meta": meta or {},
+        "files": [],
+    }
+    bundle_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = bundle_path.with_name(bundle_path.name + ".tmp")
+    with zipfile.ZipFile(tmp, "w") as zf:
+        for path, arcname in files:
+            stored = path.suffix.lower() in STORED_SUFFIXES
+            zf.write(path, arcname, compress_type=zipfile.ZIP_STORED if stored else zipfile.ZIP_LZMA)
+            info = zf.getinfo(arcname)
+            index["files"].append({
+                "name": arcname,
+                "category": categorize(path.name),
+                "size": info.file_size,
+                "compressed": info.compress_size,
+                "sha256": _sha256(path),
+            })
+        zf.writestr(INDEX_NAME, json.dumps(index, indent=1), compress_type=zipfile.ZIP_DEFLATED)
+    tmp.replace(bundle_path)
+
+    raw = sum(f["size"] for f in index["files"])
+    packed = bundle_path.stat().st_size
+    print(f"[INFO] Bundle {bundle_path.name}: {len(files)} file(s), "
+          f"{raw} -> {packed} bytes ({100 * packed / max(raw, 1):.0f}%)")
+    return bundle_path
+
+
+# =========================
+# ======  READ  ===========
+# =========================
+
+def _open(bundle_path: Path) -> zipfile.ZipFile:
+    try:
+        return zipfile.ZipFile(bundle_path, "r")
+    except (OSError, zipfile.BadZipFile) as e:
+        raise BundleError(f"Cannot open bundle {bundle_path}: {e}")
+
+
+def read_index(bundle_path: Path) -> Dict:
+    with _open(bundle_path) as zf:
+        try:
+            index = json.loads(zf.read(INDEX_NAME))
+        except KeyError:
+            raise BundleError(f"{bundle_path} has no {INDEX_NAME}")
+    if index.get("version") != INDEX_VERSION:
+        raise BundleError(f"{bundle_path}: unsupported index version {index.get('version')}")
+    return index
+
+
+def read_member(bundle_path: Path, name: str) -> bytes:
+    """Decompress only `name` from the bundle."""
+    with _open(bundle_path) as zf:
+        try:
+            return zf.read(name)
+        except KeyError:
+            raise BundleError(f"{name} not found in {bundle_path}")
+
+
+def iter_members(bundle_path: Path, category: Optional[str] = None,
+                 pattern: str = "*") -> Iterator[Tuple[str, io.TextIOWrapper]]:
+    """
+    Yield (name, text stream) for the members matching `category`/`pattern`,
+    one at a time - this is how log parsers consume a bundle.
+    """
+    index = read_index(bundle_path)
+    with _open(bundle_path) as zf:
+        for entry in index["files"]:
+            if category and entry["category"] != category:
+                continue
+            if not fnmatch.fnmatch(entry["name"], pattern):
+                continue
+            with zf.open(entry["name"]) as raw:
+                yield entry["name"], io.TextIOWrapper(raw, encoding="utf-8", errors="replace")
+
+
+def extract_member(bundle_path: Path, name: str, out_dir: Path) -> Path:
+    out = Path(out_dir) / Path(name).name
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_bytes(read_member(bundle_path, name))
+    return out
+
+
+def _main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="UDS run bundles")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("pack", help="Pack files/folders into a bundle")
+    p.add_argument("bundle", type=Path)
+    p.add_argument("sources", type=Path, nargs="+")
+    p.add_argument("--device", default=None)
+    p.add_argument("--version", dest="f195", default=None, help="F195 software version of the run")
+
+    p = sub.add_parser("list", help="Show the bundle index")
+    p.add_argument("bundle", type=Path)
+
+    p = sub.add_parser("cat", help="Print one member to stdout")
+    p.add_argument("bundle", type=Path)
+    p.add_argument("name")
+
+    p = sub.add_parser("extract", help="Extract one member")
+    p.add_argument("bundle", type=Path)
+    p.add_argument("name")
+    p.add_argument("out_dir", type=Path, nargs="?", default=Path("."))
+
+    args = ap.parse_args(argv)
+    try:
+        if args.cmd == "pack":
+            meta = {k: v for k, v in (("device", args.device), ("f195", args.f195)) if v}
+            pack_run(args.bundle, args.sources, meta)
+        elif args.cmd == "list":
+            index = read_index(args.bundle)
+            print(f"created {index['created']}  {json.dumps(index['meta'])}")
+            for f in index["files"]:
+                print(f"  {f['category']:<11} {f['size']:>10} {f['compressed']:>10}  {f['name']}")
+        elif args.cmd == "cat":
+            sys.stdout.buffer.write(read_member(args.bundle, args.name))
+        elif args.cmd == "extract":
+            print(extract_member(args.bundle, args.name, args.out_dir))
+    except BundleError as e:
+        print(f"[ERROR] {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(_main())
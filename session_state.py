@@ -0,0 +1,249 @@
+# session_state.py
+"""
+Skip session / security / reset steps that the previous script already left in place.
+
+Nearly every script starts the same way:
+
+    tester on
+    send 10 03
+    security 1
+    send 11 03
+    sleep 1000
+    send 10 03
+    security 1
+    sleep 500
+
+UdsClient_CL runs the whole batch (or shard) in one process, so the ECU
+arrives at script N in whatever state script N-1 left it. This tool replays
+the batch in order and tracks that state:
+
+    session     last 10 xx (a reset or an S3 timeout without tester present -> 0x01)
+    security    level unlocked in this session (any 10 xx or reset locks it)
+    clean       no write / routine / DTC clear since the last reset
+
+and comments out the steps that are already satisfied:
+
+  * `send 10 xx` when already in session xx. A real 10 xx would lock
+    security again, so only when security is locked, or the next step
+    unlocks the same level again anyway.
+  * `security n` when level n is still unlocked.
+  * `send 11 xx` before the script's first test request, when nothing was
+    written since the last reset and the script goes back to the current
+    session right after it. Resets after test requests (to apply a
+    configuration) always stay.
+  * a `sleep` that only waited for a skipped step.
+
+The first script of a batch starts from an unknown state and runs unchanged.
+`tester on/off` and `linedelay` lines are never touched.
+
+    python session_state.py --project UPP            # plan + time saved
+    python session_state.py --project UPP --write    # session_variants/UPP/batch/Scripts/*.script
+
+The runner uses the variants with UDS_SESSION_ELISION=1 (per shard when sharded).
+"""
+import argparse
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from Project.Common.profiles import PROFILES, Profile
+from Project.Common.script_lint import Command, lint_script, parse_script
+
+# =========================
+# ======  CONFIG  =========
+# =========================
+
+BASE_DIR = Path(__file__).resolve().parent
+VARIANTS_ROOT = BASE_DIR / "session_variants"
+
+# Scripts whose resets are never skipped (they test the boot itself)
+KEEP_RESETS: Tuple[str, ...] = ()
+
+# S3 server timer: without tester present the ECU falls back to the default session (ms)
+S3_MS = 5000
+
+DEFAULT_SESSION = 0x01
+
+# Services that neither change the configuration nor need a reset to take effect
+CLEAN_SERVICES = {0x10, 0x11, 0x19, 0x22, 0x27, 0x3E}
+
+# Services of the setup steps; the first other request ends a script's preamble
+SETUP_SERVICES = {0x10, 0x11, 0x22, 0x27, 0x3E}
+
+
+# =========================
+# ======  STATE  ==========
+# =========================
+
+class EcuState:
+    """What the ECU is known to be in; session None = unknown (start of a batch)."""
+
+    __slots__ = ("session", "security", "clean", "tester")
+
+    def __init__(self):
+        self.session: Optional[int] = None
+        self.security: Optional[int] = None
+        self.clean = False
+        self.tester = False
+
+    def __repr__(self):
+        session = "?" if self.session is None else f"0x{self.session:02X}"
+        return f"EcuState(session={session}, security={self.security}, clean={self.clean})"
+
+    def enter(self, session: int) -> None:
+        self.session = session
+        self.security = None
+
+    def reset(self) -> None:
+        self.enter(DEFAULT_SESSION)
+        self.clean = True
+
+
+class Skip:
+    def __init__(self, line_no: int, text: str, reason: str):
+        self.line_no = line_no
+        self.text = text
+        self.reason = reason
+
+    def __str__(self):
+        return f"line {self.line_no}: {self.text} ({self.reason})"
+
+
+def _session_of(c: Command) -> Optional[int]:
+    if c.cmd == "send" and c.data and c.data[0] == 0x10 and len(c.data) > 1:
+        return c.data[1] & 0x7F
+    return None
+
+
+def _security_of(c: Command) -> Optional[int]:
+    return int(c.args[0]) if c.cmd == "security" and len(c.args) == 1 and c.args[0].isdigit() else None
+
+
+def _next_step(commands: List[Command], i: int) -> Optional[Command]:
+    """The next command after commands[i] that is not a sleep / linedelay / tester line."""
+    for c in commands[i + 1:]:
+        if c.cmd not in ("sleep", "linedelay", "tester"):
+            return c
+    return None
+
+
+def elide_script(script: Path, state: EcuState, keep_resets: bool = False) -> Tuple[List[str], List[Skip]]:
+    """(script lines with the skipped steps commented out, skips); `state` is advanced past the script."""
+    lines = script.read_text(encoding="utf-8", errors="replace").splitlines()
+    commands = parse_script(script)
+    skips: List[Skip] = []
+    in_preamble = True
+    after_skip = False                  # sleeps right after a skipped step go too
+    state.tester = False
+
+    for i, c in enumerate(commands):
+        reason = None
+        data = c.data or []
+        session = _session_of(c)
+        level = _security_of(c)
+        if c.cmd == "sleep":
+            if after_skip:
+                reason = "waited for a skipped step"
+            elif not state.tester and c.args and c.args[0].isdigit() and int(c.args[0]) >= S3_MS:
+                state.enter(DEFAULT_SESSION)
+        elif c.cmd == "tester":
+            state.tester = bool(c.args) and c.args[0].lower() == "on"
+        elif c.cmd == "linedelay":
+            pass
+        elif level is not None:
+            if state.session is not None and state.security == level:
+                reason = f"level {level} still unlocked"
+            else:
+                state.security = level
+        elif session is not None:
+            nxt = _next_step(commands, i)
+            relock_undone = state.security is None or (nxt is not None and _security_of(nxt) == state.security)
+            if state.session == session and relock_undone:
+                reason = f"already in session 0x{session:02X}"
+            else:
+                state.enter(session)
+        elif c.cmd == "send" and data and data[0] == 0x11:
+            nxt = _next_step(commands, i)
+            back_to = _session_of(nxt) if nxt is not None else None
+            if (in_preamble and not keep_resets and state.clean and state.session is not None
+                    and (back_to or DEFAULT_SESSION) == state.session):
+                reason = "nothing written since the last reset"
+            else:
+                state.reset()
+        elif c.cmd == "send" and data:
+            if data[0] not in SETUP_SERVICES:
+                in_preamble = False
+            if data[0] == 0x27:
+                state.security = -1     # raw seed/key: level unknown
+            elif data[0] not in CLEAN_SERVICES:
+                state.clean = False
+
+        if reason:
+            text = lines[c.line_no - 1].strip()
+            skips.append(Skip(c.line_no, text, reason))
+            lines[c.line_no - 1] = f"#[skipped: {reason}] {text}"
+            after_skip = True
+        elif c.cmd not in ("linedelay", "tester"):
+            after_skip = False
+    return lines, skips
+
+
+# =========================
+# ======  BATCHES  ========
+# =========================
+
+def variant_dir(project: str, tag: str = "batch") -> Path:
+    return VARIANTS_ROOT / project / tag / "Scripts"
+
+
+def elide_batch(scripts: List[Path], profile: Profile, tag: str = "batch",
+                write: bool = True) -> Tuple[List[Path], float]:
+    """
+    Replay `scripts` in run order; return the scripts to run (variants where a
+    step was skipped, written under variant_dir) and the estimated seconds saved.
+    """
+    state = EcuState()
+    result: List[Path] = []
+    skipped: Dict[str, List[Skip]] = {}
+    saved = 0.0
+    with tempfile.TemporaryDirectory() as tmp:
+        out_dir = variant_dir(profile.name, tag) if write else Path(tmp)
+        for script in scripts:
+            lines, skips = elide_script(script, state, keep_resets=script.stem in KEEP_RESETS)
+            if not skips:
+                result.append(script)
+                continue
+            out_dir.mkdir(parents=True, exist_ok=True)
+            variant = out_dir / script.name
+            variant.write_text("\n".join(lines) + "\n", encoding="utf-8")
+            saved += lint_script(script, profile).total_seconds - lint_script(variant, profile).total_seconds
+            skipped[script.stem] = skips
+            result.append(variant if write else script)
+
+    for name, skips in skipped.items():
+        print(f"[INFO] {tag} {name}: skipped " + "; ".join(f"{s.text} ({s.reason})" for s in skips))
+    print(f"[INFO] Session elision {tag}: {sum(len(s) for s in skipped.values())} step(s) skipped "
+          f"in {len(skipped)} of {len(scripts)} script(s), est {saved:.1f}s saved")
+    return result, saved
+
+
+# =========================
+# ========= CLI ===========
+# =========================
+
+def _main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Skip session/security steps already satisfied by the previous script")
+    ap.add_argument("--project", default="UPP", choices=sorted(PROFILES))
+    ap.add_argument("scripts", nargs="*", type=Path, help="Run order (default: the profile's script list)")
+    ap.add_argument("--write", action="store_true", help="write session_variants/<project>/batch/Scripts/*.script")
+    args = ap.parse_args(argv)
+
+    profile = PROFILES[args.project]
+    scripts = [p for p in (args.scripts or profile.script_paths()) if p.is_file()]
+    elide_batch(scripts, profile, write=args.write)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(_main())
@@ -0,0 +1,205 @@
+# share_sync.py
+"""
+Incremental copy of result folders to the Z: share.
+
+Every destination folder keeps a small manifest (.sync_manifest.json) with the
+size, mtime and SHA-256 of each file it received. On the next sync a file
+whose size+mtime still match, and whose copy is still on the destination with
+that size, is skipped without even being read; if only the mtime changed the
+hash decides. A file deleted or lost on the share is copied again. Changed files are copied in parallel and
+transient network errors (OSError on the share) are retried with backoff.
+
+    from share_sync import sync_tree
+    sync_tree(Path(r"C:\\temp3"), Path(r"Z:\\V&V\\UDS_Result\\UPP\\...\\Client logs"))
+
+Works the same with two local folders, which is how it is tested.
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+# =========================
+# ======  CONFIG  =========
+# =========================
+
+MANIFEST_NAME = ".sync_manifest.json"
+MANIFEST_VERSION = 1
+
+SYNC_WORKERS = 4          # parallel copies (SMB latency, not bandwidth, is the limit)
+RETRIES = 4               # attempts per file
+RETRY_BACKOFF = 1.0       # seconds, doubled after each failed attempt
+
+
+# =========================
+# ======  MANIFEST  =======
+# =========================
+
+def file_sha256(path: Path, chunk_size: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def load_manifest(dst: Path) -> Dict[str, Dict]:
+    try:
+        with open(dst / MANIFEST_NAME, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if data.get("version") != MANIFEST_VERSION:
+        return {}
+    return data.get("files", {})
+
+
+def save_manifest(dst: Path, files: Dict[str, Dict]) -> None:
+    tmp = dst / (MANIFEST_NAME + ".tmp")
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": MANIFEST_VERSION, "files": files}, f, indent=1, sort_keys=True)
+        os.replace(tmp, dst / MANIFEST_NAME)
+    except OSError as e:
+        print(f"[WARN] Could not write sync manifest in {dst}: {e}")
+
+
+# =========================
+# ======  COPY  ===========
+# =========================
+
+def copy_with_retry(src: Path, dst: Path, retries: int = RETRIES, backoff: float = RETRY_BACKOFF) -> None:
+    """copy2 via a .part file + rename, so a dropped connection never leaves a half file."""
+    part = dst.with_name(dst.name + ".part")
+    delay = backoff
+    for attempt in range(1, retries + 1):
+        try:
+            dst.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(src, part)
+            os.replace(part, dst)
+            return
+        except OSError as e:
+            # A vanished source is not transient; share hiccups are
+            if attempt == retries or not src.exists():
+                raise
+            print(f"[WARN] Copy {src.name} failed ({type(e).__name__}: {e}), "
+                  f"retry {attempt}/{retries - 1} in {delay:.0f}s")
+        time.sleep(delay)
+        delay *= 2
+
+
+def _size_on(path: Path) -> Optional[int]:
+    try:
+        return path.stat().st_size
+    except OSError:
+        return None
+
+
+def sync_files(files: Iterable[Path], src_root: Path, dst: Path,
+               workers: int = SYNC_WORKERS, verbose: bool = True) -> Dict:
+    """
+    Copy `files` (all under `src_root`) to the same relative paths under `dst`,
+    skipping the ones the destination manifest says are already there.
+    Returns counters: copied, skipped, failed, bytes, seconds, errors.
+    """
+    t0 = time.perf_counter()
+    src_root, dst = Path(src_root), Path(dst)
+    dst.mkdir(parents=True, exist_ok=True)
+    manifest = load_manifest(dst)
+    lock = threading.Lock()
+    stats = {"copied": 0, "skipped": 0, "failed": 0, "bytes": 0, "errors": []}
+
+    def _failed(src: Path, rel: str, e: OSError) -> None:
+        with lock:
+            stats["failed"] += 1
+            stats["errors"].append(f"{rel}: {e}")
+        print(f"[ERROR] Could not copy {src} -> {dst / rel}: {e}")
+
+    def _one(src: Path) -> None:
+        rel = src.relative_to(src_root).as_posix()
+        entry = manifest.get(rel)
+        # The manifest only counts if the copy is still there
+        if entry and _size_on(dst / rel) != entry["size"]:
+            entry = None
+        try:
+            st = src.stat()
+            if entry and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns:
+                with lock:
+                    stats["skipped"] += 1
+                return
+            digest = file_sha256(src)
+        except OSError as e:
+            # Source vanished or unreadable mid-sync: count it, keep the rest of the run
+            _failed(src, rel, e)
+            return
+        if entry and entry["size"] == st.st_size and entry["sha256"] == digest:
+            # Touched but identical: remember the new mtime, nothing to send
+            with lock:
+                manifest[rel] = dict(entry, mtime_ns=st.st_mtime_ns)
+                stats["skipped"] += 1
+            return
+        try:
+            copy_with_retry(src, dst / rel)
+        except OSError as e:
+            _failed(src, rel, e)
+            return
+        with lock:
+            manifest[rel] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": digest}
+            stats["copied"] += 1
+            stats["bytes"] += st.st_size
+        if verbose:
+            print(f"  Copied {src} -> {dst / rel}")
+
+    files = [Path(f) for f in files]
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="sync") as pool:
+        list(pool.map(_one, files))
+
+    save_manifest(dst, manifest)
+    stats["seconds"] = round(time.perf_counter() - t0, 2)
+    if verbose:
+        print(f"[sync] {src_root} -> {dst}: {stats['copied']} copied, {stats['skipped']} unchanged, "
+              f"{stats['failed']} failed ({stats['bytes']} bytes in {stats['seconds']}s)")
+    return stats
+
+
+def list_files(src: Path, recursive: bool = True, last_n: Optional[int] = None) -> List[Path]:
+    """Files to sync from `src`; with last_n only the N newest files of the top folder."""
+    if last_n is not None:
+        files = sorted((p for p in src.iterdir() if p.is_file()), key=lambda p: p.stat().st_mtime)
+        return files[-last_n:] if last_n > 0 else []
+    if not recursive:
+        return [p for p in src.iterdir() if p.is_file()]
+    return [p for p in src.rglob("*") if p.is_file()]
+
+
+def sync_tree(src: Path, dst: Path, recursive: bool = True, last_n: Optional[int] = None,
+              workers: int = SYNC_WORKERS, verbose: bool = True) -> Dict:
+    """Incrementally mirror `src` into `dst` (files are never deleted on the destination)."""
+    src, dst = Path(src), Path(dst)
+    if not src.exists():
+        print(f"[sync] Source does not exist, skipping: {src}")
+        return {"copied": 0, "skipped": 0, "failed": 0, "bytes": 0, "seconds": 0.0, "errors": []}
+    return sync_files(list_files(src, recursive, last_n), src, dst, workers, verbose)
+
+
+if __name__ == "__main__":
+    # Usage: python share_sync.py <src> <dst> [--last-n N] [--no-recursive] [--workers N]
+    ap = argparse.ArgumentParser(description="Incremental hash-based folder sync")
+    ap.add_argument("src", type=Path)
+    ap.add_argument("dst", type=Path)
+    ap.add_argument("--last-n", type=int, default=None, help="Only the N newest files of the top folder")
+    ap.add_argument("--no-recursive", action="store_true")
+    ap.add_argument("--workers", type=int, default=SYNC_WORKERS)
+    args = ap.parse_args()
+    result = sync_tree(args.src, args.dst, not args.no_recursive, args.last_n, args.workers)
+    sys.exit(1 if result["failed"] else 0)
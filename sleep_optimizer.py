@@ -0,0 +1,327 @@
+# sleep_optimizer.py
+"""
+Shorten the fixed `sleep` lines of .script files using measured ECU latency.
+
+UdsClient_CL does not timestamp its Tx/Rx lines, so the runner stamps every
+output line on arrival (TimingRecorder -> uds_timing/*.timing.txt). This tool
+reads those files, matches the Tx lines of every script section back to the
+`send` lines of the script (script_lint.parse_script), and for every sleep
+looks at the first request after it:
+
+  * answered normally            -> the ECU was ready within the gap
+  * busy NRC or no answer        -> the ECU was NOT ready at the gap
+  * slow answer                  -> the ECU got ready about (latency - usual
+                                    latency of that service) after the gap
+The largest "not ready" time seen is a lower bound for the sleep.
+
+Per sleep the proposal is
+  * lower bound seen:  lower bound * (1 + MARGIN)  (can be *more* than today)
+  * only clean runs:   STEP_DOWN * the gap that has MIN_RUNS clean runs,
+                       so the sleep walks down over a few runs and stops at
+                       the first sign of the ECU not being ready
+  * too few runs:      unchanged
+
+    python sleep_optimizer.py --project UPP                  # report
+    python sleep_optimizer.py --project UPP --write-variants # + sleep_variants/UPP/Scripts/*.script
+
+The runner executes the variants instead of the originals with
+UDS_SLEEP_VARIANTS=1; their timing files feed the next proposal.
+"""
+import argparse
+import math
+import re
+import statistics
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from Project.Common.profiles import PROFILES
+from Project.Common.script_lint import Command, parse_script
+
+# =========================
+# ======  CONFIG  =========
+# =========================
+
+BASE_DIR = Path(__file__).resolve().parent
+TIMING_DIR = BASE_DIR / "uds_timing"
+VARIANTS_ROOT = BASE_DIR / "sleep_variants"
+
+# Safety margin on a measured "not ready until" time
+MARGIN = 0.5
+
+# With only clean runs, propose this fraction of the proven gap
+STEP_DOWN = 0.7
+
+# Clean runs needed at a gap before going below it
+MIN_RUNS = 3
+
+# Never propose less than this (ms); resets get more room for the reboot
+FLOOR_MS = 50
+RESET_FLOOR_MS = 300
+
+# Request slower than the usual latency of its service by this much = ECU was busy (ms)
+EXCESS_MS = 100
+
+# NRCs that mean "not ready yet" rather than a real test result
+BUSY_NRCS = {"0x21", "0x22", "0x78"}
+
+SCRIPT_START_RE = re.compile(r">>>\s*Script Start:?.*?([^\\/]+)\.script")
+NRC_RE = re.compile(r"Negative Response", re.IGNORECASE)
+NO_RESPONSE_RE = re.compile(r"No response from ECU", re.IGNORECASE)
+HEX_RE = re.compile(r"0x[0-9A-Fa-f]{2}")
+
+
+# =========================
+# =====  RECORDING  =======
+# =========================
+
+class TimingRecorder:
+    """Feed client output lines; writes '<ms since start>\\t<line>' to uds_timing/."""
+
+    def __init__(self, tag: str, timing_dir: Path = TIMING_DIR):
+        timing_dir.mkdir(parents=True, exist_ok=True)
+        self.path = timing_dir / f"{datetime.now():%Y%m%d_%H%M%S}_{tag}.timing.txt"
+        self._f = open(self.path, "w", encoding="utf-8")
+        self._start = time.monotonic()
+
+    def feed(self, line: str) -> None:
+        self._f.write(f"{(time.monotonic() - self._start) * 1000:.0f}\t{line.rstrip()}\n")
+
+    def close(self) -> None:
+        self._f.close()
+
+
+# =========================
+# ======  ANALYSIS  =======
+# =========================
+
+class Exchange:
+    """One Tx line and the final answer to it."""
+
+    def __init__(self, tx_ms: float, service: str, values: List[str]):
+        self.tx_ms = tx_ms
+        self.service = service
+        self.values = values
+        self.end_ms: Optional[float] = None
+        self.outcome = "none"   # ok / nrc / busy / none
+
+    @property
+    def latency(self) -> Optional[float]:
+        return None if self.end_ms is None else self.end_ms - self.tx_ms
+
+
+def read_timing(path: Path) -> List[Tuple[str, List[Exchange]]]:
+    """(script name, exchanges) for every script section of one timing file."""
+    sections: List[Tuple[str, List[Exchange]]] = []
+    exchanges: Optional[List[Exchange]] = None
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for raw in f:
+            ms_text, _, line = raw.rstrip("\n").partition("\t")
+            try:
+                ms = float(ms_text)
+            except ValueError:
+                continue
+            m = SCRIPT_START_RE.search(line)
+            if m:
+                exchanges = []
+                sections.append((m.group(1), exchanges))
+                continue
+            if exchanges is None:
+                continue
+            if "<<< Script End" in line:
+                exchanges = None
+            elif line.startswith("Tx)"):
+                service, _, data = line[3:].partition(":")
+                exchanges.append(Exchange(ms, service.strip(), ["0x" + v[2:].upper() for v in HEX_RE.findall(data)]))
+            elif exchanges and exchanges[-1].end_ms is None:
+                last = exchanges[-1]
+                if NRC_RE.search(line):
+                    values = HEX_RE.findall(line.split(":", 1)[-1])
+                    nrc = values[1].lower() if len(values) > 1 else ""
+                    if nrc == "0x78":
+                        continue    # response pending, the real answer follows
+                    last.end_ms, last.outcome = ms, "busy" if nrc in BUSY_NRCS else "nrc"
+                elif line.startswith("Rx)"):
+                    last.end_ms, last.outcome = ms, "ok"
+                elif NO_RESPONSE_RE.search(line):
+                    last.end_ms, last.outcome = ms, "none"
+    return sections
+
+
+def match_sends(commands: List[Command], exchanges: List[Exchange], lookahead: int = 6) -> Dict[int, int]:
+    """Command index -> exchange index for the send lines found in the log, in order.
+    Security access and anything the client adds on its own are skipped over."""
+    matched: Dict[int, int] = {}
+    j = 0
+    for i, c in enumerate(commands):
+        if c.cmd != "send" or not c.data:
+            continue
+        want = [f"0x{b:02X}" for b in c.data[1:]]
+        for k in range(j, min(j + lookahead, len(exchanges))):
+            if exchanges[k].values == want:
+                matched[i] = k
+                j = k + 1
+                break
+    return matched
+
+
+class SleepSite:
+    """One `sleep` line of a script and what the logs say about it."""
+
+    def __init__(self, index: int, command: Command, trigger: Optional[Command]):
+        self.index = index
+        self.command = command
+        self.trigger = trigger
+        self.current = int(command.args[0])
+        self.gaps_clean: List[float] = []
+        self.lower_bound: Optional[float] = None
+        self.runs = 0
+
+    @property
+    def is_reset(self) -> bool:
+        return bool(self.trigger and self.trigger.data and self.trigger.data[0] == 0x11)
+
+    @property
+    def label(self) -> str:
+        if self.trigger is None:
+            return "start"
+        if self.trigger.cmd == "send" and self.trigger.data:
+            return "send " + " ".join(f"{b:02X}" for b in self.trigger.data[:4])
+        return " ".join([self.trigger.cmd] + self.trigger.args)
+
+    def observe(self, gap: float, exchange: Exchange, typical: Optional[float]) -> None:
+        self.runs += 1
+        latency = exchange.latency
+        slow = exchange.outcome == "ok" and typical is not None and latency - typical > EXCESS_MS
+        if exchange.outcome in ("busy", "none") or slow:
+            # Busy / no answer: not ready at the gap. Slow: ready about `excess` later.
+            ready = gap + latency - typical if slow else gap
+            self.lower_bound = max(self.lower_bound or 0, ready)
+        else:
+            self.gaps_clean.append(gap)
+
+    def proposal(self) -> Tuple[int, str]:
+        floor = RESET_FLOOR_MS if self.is_reset else FLOOR_MS
+        if self.lower_bound is not None:
+            ms = max(floor, _round_up(self.lower_bound * (1 + MARGIN)))
+            if ms > self.current:
+                return ms, f"ECU not ready at {self.lower_bound:.0f} ms - raise"
+            return ms, f"not ready at {self.lower_bound:.0f} ms (+{MARGIN:.0%})"
+        if len(self.gaps_clean) < MIN_RUNS:
+            return self.current, f"{len(self.gaps_clean)}/{MIN_RUNS} clean run(s)"
+        proven = sorted(self.gaps_clean)[MIN_RUNS - 1]
+        ms = min(self.current, max(floor, _round_up(proven * STEP_DOWN)))
+        return ms, f"clean down to {proven:.0f} ms gap"
+
+
+def _round_up(ms: float, step: int = 10) -> int:
+    return int(math.ceil(ms / step) * step)
+
+
+def sleep_sites(commands: List[Command]) -> List[Tuple[SleepSite, Optional[int]]]:
+    """Every valid sleep with the index of the next send command (None if none follows)."""
+    sites = []
+    trigger = None
+    for i, c in enumerate(commands):
+        if c.cmd == "sleep" and len(c.args) == 1 and c.args[0].isdigit():
+            nxt = next((k for k in range(i + 1, len(commands))
+                        if commands[k].cmd == "send" and commands[k].data), None)
+            sites.append((SleepSite(len(sites), c, trigger), nxt))
+        elif c.cmd in ("send", "security"):
+            trigger = c
+    return sites
+
+
+def analyse_script(script: Path, timing_files: List[Path]) -> List[SleepSite]:
+    commands = parse_script(script)
+    sites = sleep_sites(commands)
+    name = script.stem
+    for tf in timing_files:
+        for section_name, exchanges in read_timing(tf):
+            if section_name != name:
+                continue
+            typical: Dict[str, float] = {}
+            by_service: Dict[str, List[float]] = {}
+            for e in exchanges:
+                if e.outcome == "ok" and e.latency is not None:
+                    by_service.setdefault(e.service, []).append(e.latency)
+            for service, lat in by_service.items():
+                typical[service] = statistics.median(lat)
+
+            matched = match_sends(commands, exchanges)
+            for site, nxt in sites:
+                k = matched.get(nxt) if nxt is not None else None
+                if not k:   # not in the log, or first exchange (nothing before it)
+                    continue
+                prev = exchanges[k - 1]
+                if prev.end_ms is None:
+                    continue
+                site.observe(exchanges[k].tx_ms - prev.end_ms, exchanges[k], typical.get(exchanges[k].service))
+    return [s for s, _ in sites]
+
+
+def write_variant(script: Path, sites: List[SleepSite], out_dir: Path) -> Path:
+    """Copy of `script` with the proposed sleeps; same file name so the parser sees the same script."""
+    new_values = {s.command.line_no: s.proposal()[0] for s in sites}
+    lines = script.read_text(encoding="utf-8", errors="replace").splitlines(keepends=True)
+    for line_no, ms in new_values.items():
+        line = lines[line_no - 1]
+        end = "\n" if line.endswith("\n") else ""
+        lines[line_no - 1] = f"sleep {ms}{end}"
+    out_dir.mkdir(parents=True, exist_ok=True)
+    out = out_dir / script.name
+    out.write_text("".join(lines), encoding="utf-8")
+    return out
+
+
+def variant_path(script: Path, project: str) -> Path:
+    return VARIANTS_ROOT / project / "Scripts" / script.name
+
+
+def _main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Propose shorter sleeps from measured ECU latency")
+    ap.add_argument("scripts", nargs="*", type=Path, help="Default: the profile's script list")
+    ap.add_argument("--project", choices=sorted(PROFILES), required=True)
+    ap.add_argument("--timing-dir", type=Path, default=TIMING_DIR)
+    ap.add_argument("--last", type=int, default=20, help="Use the newest N timing files")
+    ap.add_argument("--write-variants", action="store_true",
+                    help=f"Write the proposed scripts to {VARIANTS_ROOT.name}/<project>/Scripts")
+    ap.add_argument("-v", "--verbose", action="store_true", help="One line per sleep")
+    args = ap.parse_args(argv)
+
+    profile = PROFILES[args.project]
+    scripts = args.scripts or profile.script_paths()
+    timing_files = sorted(args.timing_dir.glob("*.timing.txt"), key=lambda p: p.stat().st_mtime)[-args.last:]
+    if not timing_files:
+        print(f"[WARN] No timing files in {args.timing_dir}; run the bench once to record some.")
+    print(f"[INFO] {len(timing_files)} timing file(s), margin {MARGIN:.0%}, step-down {STEP_DOWN}, "
+          f"{MIN_RUNS} clean run(s) per step")
+
+    total_now = total_new = 0
+    print(f"\n{'Script':<26}{'sleeps':>7}{'now s':>8}{'new s':>8}{'saved s':>9}")
+    for script in scripts:
+        if not script.is_file():
+            print(f"[WARN] Missing {script}")
+            continue
+        sites = analyse_script(script, timing_files)
+        now = sum(s.current for s in sites)
+        new = sum(s.proposal()[0] for s in sites)
+        total_now, total_new = total_now + now, total_new + new
+        print(f"{script.stem:<26}{len(sites):>7}{now / 1000:>8.1f}{new / 1000:>8.1f}{(now - new) / 1000:>9.1f}")
+        if args.verbose:
+            for s in sites:
+                ms, why = s.proposal()
+                print(f"    line {s.command.line_no:<4} after {s.label:<18} {s.current:>6} -> {ms:<6} "
+                      f"runs={s.runs:<3} {why}")
+        if args.write_variants:
+            write_variant(script, sites, variant_path(script, profile.name).parent)
+    print(f"{'TOTAL':<26}{'':>7}{total_now / 1000:>8.1f}{total_new / 1000:>8.1f}{(total_now - total_new) / 1000:>9.1f}")
+    if args.write_variants:
+        print(f"[INFO] Variants written to {VARIANTS_ROOT / profile.name / 'Scripts'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(_main())
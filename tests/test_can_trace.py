@@ -0,0 +1,91 @@
+# test_can_trace.py
+"""CAN trace ring buffer (can_trace.py) and the request position the engine hands it."""
+import logging
+
+import pytest
+
+can = pytest.importorskip("can")
+
+from Project.Common.can_trace import TraceRing
+from Project.Common.engine import ScriptSectionSplitter, requests_after
+
+REQ = 0x7D0
+F1D3 = bytes.fromhex("F1D3")
+
+
+def _frame(ring, t, arb_id, data):
+    ring.on_message_received(can.Message(timestamp=t, arbitration_id=arb_id, is_extended_id=False,
+                                         data=bytes(data)))
+
+
+def _write_f1d3(ring, t):
+    # 2E F1 D3 + 20 data bytes: first frame, flow control, consecutive frames
+    _frame(ring, t, REQ, [0x10, 23, 0x2E, 0xF1, 0xD3, 1, 2, 3])
+    _frame(ring, t + 0.001, 0x7D8, [0x30, 0, 0, 0, 0, 0, 0, 0])
+    _frame(ring, t + 0.002, REQ, [0x21, 4, 5, 6, 7, 8, 9, 10])
+
+
+def _ring(writes=5, capacity=1000):
+    ring = TraceRing(capacity=capacity)
+    _frame(ring, 0.5, REQ, [0x02, 0x10, 0x03])
+    for k in range(writes):
+        _write_f1d3(ring, 1.0 + k)
+        _frame(ring, 1.5 + k, REQ, [0x03, 0x22, 0xF1, 0xD3])
+    return ring
+
+
+def _at(ring, did, back=None, start=0.0, end=100.0):
+    t = ring.find_request(REQ, did, start + ring.clock_offset, end + ring.clock_offset, back)
+    return None if t is None else round(t - ring.clock_offset, 3)
+
+
+def test_find_request_last_by_default():
+    assert _at(_ring(), F1D3) == 5.5
+
+
+def test_find_request_counts_back_from_the_newest():
+    ring = _ring()
+    assert _at(ring, F1D3, back=0) == 5.5       # last 22 read
+    assert _at(ring, F1D3, back=1) == 5.0       # the 2E before it
+    assert _at(ring, F1D3, back=9) == 1.0       # first 2E of the section
+    assert _at(ring, F1D3, back=10) is None
+
+
+def test_find_request_single_frame_and_time_window():
+    ring = _ring()
+    assert _at(ring, bytes.fromhex("1003")) is None     # 10 03 carries no DID
+    assert _at(ring, F1D3, end=2.9) == 2.5
+    assert _at(ring, bytes.fromhex("F195")) is None
+
+
+def test_ring_wraps_and_keeps_order():
+    ring = _ring(writes=50, capacity=20)
+    assert ring.received == 1 + 50 * 4
+    times = [round(m.timestamp, 3) for m in ring.messages(0, 1e12)]
+    assert len(times) == 20 and times == sorted(times)
+    assert times[-1] == 50.5
+    # Older requests are overwritten, counting back from the newest still works
+    assert _at(ring, F1D3, back=1) == 50.0
+    assert _at(ring, F1D3, back=20) is None
+
+
+def _section(lines):
+    splitter = ScriptSectionSplitter(logging.getLogger("test"), fix_routine_scripts=())
+    section = None
+    for line in [">>> Script Start:C:\\x\\Scripts\\Network_Missmatch_F1D3.script"] + lines + ["<<< Script End"]:
+        section = splitter.feed(line) or section
+    return section
+
+
+def test_requests_after_table_script():
+    write = "Tx) Write Data By Identifier     : 0xF1 0xD3 " + " ".join(["0x00"] * 20)
+    read = "Tx) Read Data By Identifier      : 0xF1 0xD3"
+    tx = _section([write, read, write, read, write, read])[1]
+    assert [requests_after(tx, f) for f in tx] == [5, 4, 3, 2, 1, 0]
+
+
+def test_requests_after_multi_did_read():
+    tx = _section(["Tx) Read Data By Identifier      : 0xF1 0x95 0xF1 0xB0",
+                   "Tx) Read Data By Identifier      : 0xF1 0x95"])[1]
+    assert [requests_after(tx, f) for f in tx] == [1, None, 0]
+    assert requests_after(tx, None) is None
@@ -0,0 +1,87 @@
+# test_client_logs.py
+"""Claiming per-target UdsClient_CL logs in the shared client folder (client_logs.py, flash_orchestrator.py)."""
+import json
+import os
+import threading
+
+import pytest
+
+from client_logs import LOCK_NAME, ClientLogClaim
+from flash_orchestrator import load_targets
+
+
+class FakeClient:
+    """Creates its log on the first poll, like UdsClient_CL shortly after start."""
+
+    def __init__(self, log_path, exit_code=None):
+        self.log_path = log_path
+        self.exit_code = exit_code
+
+    def poll(self):
+        if self.log_path and not self.log_path.exists():
+            self.log_path.write_text("Tx) ...\n", encoding="utf-8")
+        return self.exit_code
+
+
+def test_claimed_log_moves_to_the_target(tmp_path):
+    client, target = tmp_path / "temp3", tmp_path / "temp3" / "UPP_ch51"
+    client.mkdir()
+    (client / "older.uds.txt").write_text("", encoding="utf-8")
+    claim = ClientLogClaim(client, target)
+    with claim.starting():
+        assert (client / LOCK_NAME).exists()
+        assert claim.wait_for_log(FakeClient(client / "flash.uds.txt")) == client / "flash.uds.txt"
+    assert not (client / LOCK_NAME).exists()
+    assert claim.collect() == [target / "flash.uds.txt"]
+    assert sorted(p.name for p in client.glob("*.uds.txt")) == ["older.uds.txt"]
+
+
+def test_concurrent_targets_claim_their_own_log(tmp_path):
+    client = tmp_path / "temp3"
+    client.mkdir()
+    claims = {name: ClientLogClaim(client, client / name) for name in ("UPP_ch51", "NewGen_ch52")}
+
+    def flash(name):
+        claim = claims[name]
+        with claim.starting():
+            claim.wait_for_log(FakeClient(client / f"{name}_log.uds.txt"))
+        claim.collect()
+
+    threads = [threading.Thread(target=flash, args=(n,)) for n in claims]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(10)
+    for name in claims:
+        assert [p.name for p in (client / name).iterdir()] == [f"{name}_log.uds.txt"]
+
+
+def test_client_exits_without_a_log(tmp_path):
+    claim = ClientLogClaim(tmp_path / "temp3", tmp_path / "target")
+    with claim.starting():
+        assert claim.wait_for_log(FakeClient(None, exit_code=1)) is None
+    assert claim.collect() == []
+
+
+def test_same_folder_does_nothing(tmp_path):
+    claim = ClientLogClaim(tmp_path, tmp_path)
+    with claim.starting():
+        assert claim.wait_for_log(FakeClient(tmp_path / "x.uds.txt")) is None
+    assert not (tmp_path / LOCK_NAME).exists()
+
+
+def test_stale_lock_is_taken_over(tmp_path):
+    (tmp_path / LOCK_NAME).write_text("", encoding="utf-8")
+    os.utime(tmp_path / LOCK_NAME, (0, 0))
+    with ClientLogClaim(tmp_path, tmp_path / "target").starting():
+        pass
+
+
+def test_duplicate_target_names_are_rejected(tmp_path):
+    targets = tmp_path / "targets.json"
+    targets.write_text(json.dumps([
+        {"channel": 51, "device": "UPP", "old": "a", "new": "b"},
+        {"channel": "51", "device": "UPP", "old": "c", "new": "d"},
+    ]), encoding="utf-8")
+    with pytest.raises(ValueError, match="UPP_ch51"):
+        load_targets(targets)
@@ -0,0 +1,55 @@
+# test_combined_writes.py
+"""Combined 2E writes and their bisection rounds (combined_writes.py) as the engine parses them."""
+import logging
+from pathlib import PureWindowsPath
+
+from combined_writes import BASE_DIR, latest_statuses, plan_script, variant_dir
+from Project.Common.engine import ScriptSectionSplitter
+from Project.Common.profiles import get_profile
+from Project.Common.results_store import STATUS_FAIL, STATUS_PASS, ResultsRecorder
+
+PROFILE = get_profile("UPP")
+SCRIPT = PROFILE.scripts_dir / "Faults_Configuration.script"
+
+
+def _bench_path(round_no: int) -> str:
+    """The variant path as UdsClient_CL prints it on the Windows bench."""
+    rel = variant_dir(PROFILE.name, round_no).relative_to(BASE_DIR)
+    return str(PureWindowsPath(r"C:\Jenkins\workspace\Auto_UDS", *rel.parts, SCRIPT.name))
+
+
+def _section_name(round_no: int) -> str:
+    splitter = ScriptSectionSplitter(logging.getLogger("test_combined_writes"))
+    for line in (f">>> Script Start:{_bench_path(round_no)}",
+                 "Tx) Read Data By Identifier      : 0x07 0x8F",
+                 "Rx) Read Data By Identifier      : 0x07 0x8F 0x01",
+                 "<<< Script End"):
+        section = splitter.feed(line)
+    return section[0]
+
+
+def test_every_round_keeps_the_script_name():
+    for round_no in range(4):
+        assert _section_name(round_no) == "Faults_Configuration"
+
+
+def test_bisection_round_uses_the_stored_statuses(tmp_path):
+    plan = plan_script(SCRIPT, PROFILE)
+    first = plan.bisect({})                      # round 1: every group split in halves
+    assert len(first.groups) == 2 * len(plan.groups) and first.round_no == 1
+
+    # Round 1 parsed under the name the engine gave it: the first half passed, the rest failed
+    passing = {c for p in first.groups[0] for c in p.conditions}
+    db = tmp_path / "results.db"
+    recorder = ResultsRecorder(PROFILE.device, db_path=db)
+    for group in first.groups:
+        for p in group:
+            for c in p.conditions:
+                recorder.record(_section_name(1), p.did, c, 1, "", STATUS_PASS if c in passing else STATUS_FAIL)
+    recorder.commit()
+
+    statuses = latest_statuses(PROFILE, first.name, db_path=db)
+    assert statuses and all(statuses[c] == {STATUS_PASS} for c in passing)
+    # Only the failing halves go on; without the statuses every half would be split again
+    second = first.bisect(statuses)
+    assert [p for g in second.groups for p in g] == [p for g in first.groups[1:] for p in g]
@@ -0,0 +1,55 @@
+# test_decoders.py
+"""Typed DID decoding with units, scales and the convert_bytes fallback (decoders.py)."""
+import pytest
+
+from Project.Common.decoders import Decoder, DecoderTable, load_table
+from Project.Common.frame import convert_bytes
+from Project.Common.profiles import PROFILES
+
+TABLE = DecoderTable(
+    {"F195": ("ascii", 1, ""), "23F9": ("u16", 1, ""), "0101": ("hex", 1, ""), "F1B0": ("uint", 1, "")},
+    {"078F": {0: ("u16", 10, "ms"), 2: ("s8", 1, "degC"), 3: ("u24", 0.5, "V")}},
+)
+
+
+@pytest.mark.parametrize("did, position, data, text", [
+    ("F195", 0, b"03.02.02\x00\x00", "03.02.02"),
+    ("23F9", 0, b"\x01\x00", "256"),           # the old guess read this as 1
+    ("0101", 0, b"\x01\x00\xAB", "01 00 AB"),
+    ("F1B0", 0, b"\x00\x01\x00\x00", "65536"),
+    ("078F", 0, b"\x00\x64\x00\x00\x00\x00", "1000 ms"),
+    ("078F", 1, b"\x00\x64\x00\x00\x00\x00", "1000 ms"),   # any byte of the field finds it
+    ("078F", 2, b"\x00\x00\xEC\x00\x00\x00", "-20 degC"),
+    ("078F", 3, b"\x00\x00\x00\x00\x00\x03", "1.5 V"),
+])
+def test_decode_with_units(did, position, data, text):
+    assert TABLE.decode(did, position, data) == text
+
+
+@pytest.mark.parametrize("did, position, data", [
+    ("ABCD", 0, b"\x01\x00"),            # unknown DID
+    ("078F", 6, b"\x00" * 6 + b"\x05"),  # position without a field
+    ("23F9", 0, b"\x07"),                # record shorter than the spec
+    ("F195", 0, b"\x01\x02\x03\x04\x05"),  # non-printable "ascii"
+])
+def test_fallback_to_convert_bytes(did, position, data):
+    assert TABLE.decode(did, position, data) == convert_bytes(data)
+
+
+def test_width_and_lookup():
+    assert (TABLE.width("23F9"), TABLE.width("F195"), TABLE.width("ABCD")) == (2, None, None)
+    assert TABLE.lookup("078F", 4) is TABLE.lookup("078F", 3) and TABLE.lookup("078F", 4).offset == 3
+    assert TABLE.lookup("078F", 6) is None
+
+
+def test_unknown_type_is_rejected():
+    with pytest.raises(ValueError, match="Unknown decoder type 'f32'"):
+        Decoder("f32")
+
+
+def test_project_tables_compile():
+    assert len(load_table(None)) == 0
+    assert all(len(p.decoders()) for p in PROFILES.values())
+    table = PROFILES["UPP"].decoders()
+    assert table.decode("078F", 1, b"\x00\x64" + bytes(104)) == "1000 ms"
+    assert table.decode("F195", 0, b"03.02.02") == "03.02.02"
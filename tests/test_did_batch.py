@@ -0,0 +1,83 @@
+# test_did_batch.py
+"""Multi-DID 0x22 batching (did_batch.py) and the split back to one frame per DID (engine.py)."""
+import logging
+
+from Project.Common.did_batch import pack, split_request, split_response
+from Project.Common.engine import ScriptSectionSplitter
+
+F195 = bytes.fromhex("F195")
+F1B0 = bytes.fromhex("F1B0")
+F18C = bytes.fromhex("F18C")
+
+
+def test_split_request():
+    assert split_request(bytes.fromhex("F195F1B0F18C")) == [F195, F1B0, F18C]
+
+
+def test_split_response_known_lengths():
+    payload = F195 + b"03.02.02" + F1B0 + b"\x00\x12\x34"
+    assert split_response([F195, F1B0], payload, {"F195": 8, "F1B0": 3}) == [F195 + b"03.02.02",
+                                                                             F1B0 + b"\x00\x12\x34"]
+
+
+def test_split_response_unknown_length_cuts_at_next_did():
+    payload = F195 + b"AB" + F1B0 + b"\x01"
+    assert split_response([F195, F1B0], payload, {}) == [F195 + b"AB", F1B0 + b"\x01"]
+
+
+def test_split_response_missing_did():
+    payload = F195 + b"AB" + F18C + b"SN1"
+    assert split_response([F195, F1B0, F18C], payload, {"F195": 2}) == [F195 + b"AB", F18C + b"SN1"]
+
+
+def test_split_response_not_a_requested_did():
+    assert split_response([F195], F18C + b"SN1", {}) is None
+
+
+def test_pack_respects_buffer_and_unknown_lengths():
+    lengths = {"F195": 8, "F1B0": 3, "F18C": 100}
+    assert pack(["F195", "F1B0", "F18C"], lengths, limit=110) == [["F195", "F1B0"], ["F18C"]]
+    assert pack(["F195", "F1D3", "F1B0"], lengths, limit=255) == [["F195"], ["F1D3"], ["F1B0"]]
+
+
+def _feed(lines, lengths=None):
+    splitter = ScriptSectionSplitter(logging.getLogger("test"), fix_routine_scripts=(), did_lengths=lengths)
+    section = None
+    for line in [">>> Script Start:C:\\x\\Scripts\\Standard_Identifiers.script"] + lines + ["<<< Script End"]:
+        section = splitter.feed(line) or section
+    return section
+
+
+def _rx_payloads(section):
+    return [rx.payload for rx in section[2]]
+
+
+def test_split_rx_multi_did_response():
+    section = _feed(["Tx) Read Data By Identifier      : 0xF1 0x95 0xF1 0xB0",
+                     "Rx) Read Data By Identifier      : 0xF1 0x95 0x41 0x42 0xF1 0xB0 0x01"])
+    assert [tx.payload for tx in section[1]] == [F195, F1B0]
+    assert _rx_payloads(section) == [F195 + b"AB", F1B0 + b"\x01"]
+
+
+def test_split_rx_keeps_dids_over_response_pending():
+    section = _feed(["Tx) Read Data By Identifier      : 0xF1 0x95 0xF1 0xB0",
+                     "Rx) Negative Response            : 0x22 0x78 NRC=Request Correctly Received - Response Pending",
+                     "Rx) Read Data By Identifier      : 0xF1 0x95 0x41 0x42 0xF1 0xB0 0x01"])
+    assert _rx_payloads(section) == [b"\x22\x78", F195 + b"AB", F1B0 + b"\x01"]
+
+
+def test_split_rx_final_nrc_clears_pending_dids():
+    section = _feed(["Tx) Read Data By Identifier      : 0xF1 0x95 0xF1 0xB0",
+                     "Rx) Negative Response            : 0x22 0x31 NRC=Request Out Of Range",
+                     "Rx) Read Data By Identifier      : 0xF1 0x95 0x41 0x42 0xF1 0xB0 0x01"])
+    # The unsolicited response after the final NRC is not split
+    assert _rx_payloads(section) == [b"\x22\x31", F195 + b"AB\xf1\xb0\x01"]
+
+
+def test_split_rx_did_left_out(caplog):
+    with caplog.at_level(logging.WARNING):
+        section = _feed(["Tx) Read Data By Identifier      : 0xF1 0x95 0xF1 0xB0 0xF1 0x8C",
+                         "Rx) Read Data By Identifier      : 0xF1 0x95 0x41 0x42 0xF1 0x8C 0x53 0x4E"],
+                        {"F195": 2})
+    assert _rx_payloads(section) == [F195 + b"AB", F18C + b"SN"]
+    assert "without F1B0" in caplog.text
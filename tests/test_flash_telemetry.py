@@ -0,0 +1,52 @@
+# test_flash_telemetry.py
+"""Stall watchdog of FlashTelemetry (flash_telemetry.py), driven with explicit timestamps."""
+from flash_telemetry import FlashTelemetry
+
+
+class FakeProcess:
+    def __init__(self):
+        self.killed = False
+
+    def poll(self):
+        return -9 if self.killed else None
+
+    def kill(self):
+        self.killed = True
+
+
+def _telemetry(stall_timeout=180, start_timeout=600):
+    return FlashTelemetry("step", "UPP", "app.hex", stall_timeout=stall_timeout, start_timeout=start_timeout)
+
+
+def test_pre_progress_phase_uses_start_timeout():
+    telemetry = _telemetry()
+    t0 = telemetry.t0
+    # Erasing: well past the stall timeout, not yet past the start timeout
+    assert telemetry.stall_reason(now=t0 + 400) is None
+    assert telemetry.stall_reason(now=t0 + 601) == "no flash progress 600s after start"
+
+
+def test_stall_timeout_starts_at_first_progress():
+    telemetry = _telemetry()
+    t0 = telemetry.t0
+    telemetry.sample(0, now=t0 + 590)
+    assert telemetry.stall_reason(now=t0 + 700) is None
+    assert telemetry.stall_reason(now=t0 + 771) == "no flash progress for 180s (last 0%)"
+
+
+def test_progress_keeps_flash_alive():
+    telemetry = _telemetry()
+    t0 = telemetry.t0
+    for i, pct in enumerate(range(0, 100, 10)):
+        telemetry.sample(pct, now=t0 + 100 * i)
+        assert telemetry.stall_reason(now=t0 + 100 * i + 150) is None
+    # A repeated percentage is no progress
+    telemetry.sample(90, now=t0 + 1000)
+    assert telemetry.stall_reason(now=t0 + 1081).endswith("(last 90%)")
+
+
+def test_watchdog_kills_a_stalled_client():
+    telemetry, proc = _telemetry(start_timeout=0), FakeProcess()
+    telemetry.watch(proc, poll=0.01).join(5)
+    assert proc.killed and telemetry.stalled
+    assert telemetry.stall_message == "no flash progress 0s after start"
@@ -0,0 +1,76 @@
+# test_hex_image.py
+"""Intel HEX validation and the hash cache (hex_image.py)."""
+import pytest
+
+import hex_image
+from hex_image import HexImageError, inspect_hex, parse_hex, require_valid_hex
+
+
+def _record(rtype, offset, data=b""):
+    body = bytes([len(data), offset >> 8, offset & 0xFF, rtype]) + data
+    return ":" + (body + bytes([-sum(body) & 0xFF])).hex().upper()
+
+
+EXT_LINEAR = _record(hex_image.REC_EXT_LINEAR, 0, b"\x08\x00")
+DATA = [_record(hex_image.REC_DATA, 0x0000, b"UPP_v03.02.02\x00\xff\xff"),
+        _record(hex_image.REC_DATA, 0x0010, bytes(range(16))),
+        _record(hex_image.REC_DATA, 0x0100, b"\x01\x02\x03\x04")]
+EOF = _record(hex_image.REC_EOF, 0)
+
+
+@pytest.fixture(autouse=True)
+def no_memo(monkeypatch):
+    monkeypatch.setattr(hex_image, "_MEMO", {})
+
+
+def _write(tmp_path, lines, name="app.hex"):
+    path = tmp_path / name
+    path.write_text("\n".join(lines) + "\n", encoding="ascii")
+    return path
+
+
+def test_valid_image_metadata(tmp_path):
+    meta = parse_hex(_write(tmp_path, [EXT_LINEAR, *DATA, EOF]))
+    assert meta["records"] == 5 and meta["size"] == 36
+    assert meta["ranges"] == [["0x08000000", "0x0800001F"], ["0x08000100", "0x08000103"]]
+    assert meta["versions"] == ["UPP_v03.02.02"]
+
+
+def test_checksum_error(tmp_path):
+    bad = DATA[1][:-2] + ("00" if DATA[1][-2:] != "00" else "01")
+    with pytest.raises(HexImageError, match=r"app.hex:3: checksum error"):
+        parse_hex(_write(tmp_path, [EXT_LINEAR, DATA[0], bad, EOF]))
+
+
+@pytest.mark.parametrize("lines, message", [
+    ([EXT_LINEAR, *DATA], "missing EOF record"),
+    ([EXT_LINEAR, DATA[0], DATA[1][:21]], "record length mismatch"),
+    ([EXT_LINEAR, *DATA, EOF, DATA[0]], "data after EOF record"),
+    ([EXT_LINEAR, EOF], "no data records"),
+])
+def test_truncated_or_malformed(tmp_path, lines, message):
+    with pytest.raises(HexImageError, match=message):
+        parse_hex(_write(tmp_path, lines))
+
+
+def test_invalid_image_is_cached_and_rejected(tmp_path):
+    path, cache = _write(tmp_path, [EXT_LINEAR, *DATA]), tmp_path / "hex_cache.json"
+    with pytest.raises(HexImageError, match="Invalid hex image .*missing EOF record"):
+        require_valid_hex(path, cache)
+    hex_image._MEMO.clear()
+    meta = inspect_hex(path, cache)
+    assert meta["cached"] and not meta["valid"]
+
+
+def test_cache_hit_skips_parsing(tmp_path, monkeypatch):
+    path, cache = _write(tmp_path, [EXT_LINEAR, *DATA, EOF]), tmp_path / "hex_cache.json"
+    first = inspect_hex(path, cache)
+    assert first["valid"] and not first["cached"]
+    hex_image._MEMO.clear()
+
+    def fail(_path):
+        raise AssertionError("parsed again")
+
+    monkeypatch.setattr(hex_image, "parse_hex", fail)
+    second = inspect_hex(path, cache)
+    assert second["cached"] and second["crc32"] == first["crc32"]
@@ -0,0 +1,30 @@
+# test_isotp_tuning.py
+"""Per-profile ISO-TP params (isotp_tuning.py) as IsoTpTransport applies them."""
+from Project.Common.isotp_tuning import save_tuning, tuned_params
+from Project.Common.uds_session import TX_PADDING, IsoTpTransport
+
+
+def _stack_params(params, channel):
+    transport = IsoTpTransport(interface="virtual", channel=channel, params=params)
+    transport.open()
+    try:
+        p = transport.stack.params
+        return p.blocksize, p.stmin, p.tx_padding
+    finally:
+        transport.close()
+
+
+def test_untuned_profile_adds_nothing(tmp_path):
+    assert tuned_params("UPP", path=tmp_path / "none.json") == {}
+
+
+def test_untuned_transport_sends_what_it_always_did(tmp_path):
+    # can-isotp defaults (BS 8, STmin 0) with the transport's fill byte
+    assert _stack_params(tuned_params("UPP", path=tmp_path / "none.json"), "tune_a") == (8, 0, TX_PADDING)
+
+
+def test_tuned_params_override_the_transport(tmp_path):
+    path = tmp_path / "isotp_params.json"
+    save_tuning("UPP", {"blocksize": 0, "stmin": 1, "tx_padding": None}, 1000, 5.0, path=path)
+    assert tuned_params("NewGen", path=path) == {}
+    assert _stack_params(tuned_params("UPP", path=path), "tune_b") == (0, 1, None)
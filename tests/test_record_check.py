@@ -0,0 +1,40 @@
+# test_record_check.py
+"""Per-condition write/readback check of packed configuration records (record_check.py)."""
+from Project.Common.record_check import UNKNOWN_CONDITION, ConditionMatrix
+
+MATRIX = ConditionMatrix({
+    "Mode": "05 00 00 00",
+    "Speed limit": "00 0A 0A 00",
+    "Enable": "00 00 00 01",
+})
+
+
+def test_matching_readback_passes_every_written_condition():
+    assert MATRIX.check(bytes.fromhex("00 0A 00 01"), bytes.fromhex("00 0A 00 01")) == [
+        ("Speed limit", 1, True), ("Enable", 3, True)]
+
+
+def test_readback_change_fails_the_owning_condition_only():
+    assert MATRIX.check(bytes.fromhex("03 0A 00 00"), bytes.fromhex("03 0A 07 00")) == [
+        ("Mode", 0, True), ("Speed limit", 1, False)]
+
+
+def test_swapped_bytes_are_a_mismatch():
+    # Comparing with the zero bytes dropped used to call these equal
+    assert MATRIX.check(bytes.fromhex("00 01 00 00"), bytes.fromhex("00 00 01 00")) == [
+        ("Speed limit", 1, False)]
+
+
+def test_mismatch_outside_every_condition_is_unknown():
+    assert MATRIX.check(bytes.fromhex("02 00 00 00"), bytes.fromhex("02 00 00 00 09")) == [
+        ("Mode", 0, True), (UNKNOWN_CONDITION, 4, False)]
+
+
+def test_write_no_condition_covers():
+    matrix = ConditionMatrix({"Mode": "05 00"})
+    assert matrix.check(bytes.fromhex("00 07"), bytes.fromhex("00 07")) == [(UNKNOWN_CONDITION, 1, True)]
+
+
+def test_untouched_record_has_no_results():
+    assert MATRIX.check(bytes(4), bytes(4)) == []
+    assert len(MATRIX) == 3
@@ -0,0 +1,47 @@
+# test_relay_power.py
+"""Relay 1 switching and its state check (relay_power_UPP.py) against FakeSerial."""
+import pytest
+
+from relay_power_UPP import (READ_STATE, RELAY1_OFF, RELAY1_ON, FakeSerial, RelayController,
+                             RelayError)
+
+
+def _relay(fake, verify=False, retries=3):
+    return RelayController("FAKE", serial_factory=lambda *a, **kw: fake, settle=0,
+                           retries=retries, verify=verify)
+
+
+def test_power_cycle_switches_and_reads_back():
+    fake = FakeSerial()
+    with _relay(fake) as relay:
+        relay.power_cycle(off_time=0)
+    assert fake.written == [RELAY1_ON, READ_STATE, RELAY1_OFF, READ_STATE]
+    assert fake.state == 0x00 and not fake.is_open
+
+
+def test_dropped_command_is_retried():
+    fake = FakeSerial(drop_commands=2)
+    with _relay(fake, verify=True) as relay:
+        assert relay.set_relay1(True) == 0x01
+    assert fake.written.count(RELAY1_ON) == 3 and fake.drop_commands == 0
+
+
+def test_mismatch_only_warns_without_verify(capsys):
+    fake = FakeSerial(drop_commands=5)
+    with _relay(fake, retries=2) as relay:
+        assert relay.set_relay1(True) == 0x00
+    assert "continuing" in capsys.readouterr().out
+    assert fake.drop_commands == 3
+
+
+def test_mismatch_raises_with_verify():
+    with _relay(FakeSerial(drop_commands=5), verify=True, retries=2) as relay:
+        with pytest.raises(RelayError, match="did not switch ON"):
+            relay.set_relay1(True)
+
+
+def test_power_cycle_async():
+    fake = FakeSerial()
+    with _relay(fake) as relay:
+        relay.power_cycle_async(off_time=0).result(5)
+    assert fake.written[::2] == [RELAY1_ON, RELAY1_OFF]
@@ -0,0 +1,53 @@
+# test_result_bundle.py
+"""Result bundles (result_bundle.py) and the engine reading their raw logs without unpacking."""
+import logging
+
+from Project.Common.engine import ProjectEngine
+from Project.Common.profiles import get_profile
+from result_bundle import iter_members, pack_run, read_index
+
+LOG = """>>> Script Start:C:\\Jenkins\\Project\\UPP\\Scripts\\Standard_Identifiers.script
+Tx) Read Data By Identifier      : 0xF1 0x95
+Rx) Read Data By Identifier      : 0xF1 0x95 0x30 0x33 0x2E 0x30 0x32
+<<< Script End
+>>> Script Start:C:\\Jenkins\\Project\\UPP\\Scripts\\Network_Missmatch_F1D3.script
+Tx) Read Data By Identifier      : 0xF1 0xD3
+Rx) Negative Response            : 0x22 0x31 NRC=Request Out Of Range
+<<< Script End
+"""
+
+
+def _bundle(tmp_path):
+    run = tmp_path / "run"
+    run.mkdir()
+    (run / "x.uds.txt").write_text(LOG, encoding="utf-8")
+    (run / "Standard_Identifiers.log").write_text("script log\n", encoding="utf-8")
+    return pack_run(tmp_path / "run.udsb", [run], {"device": "UPP"}), run / "x.uds.txt"
+
+
+def test_index_categories(tmp_path):
+    bundle, _ = _bundle(tmp_path)
+    index = read_index(bundle)
+    assert sorted(f["category"] for f in index["files"]) == ["raw", "script_log"]
+    assert index["meta"]["device"] == "UPP"
+
+
+def test_iter_members_by_category(tmp_path):
+    bundle, _ = _bundle(tmp_path)
+    members = [(name, stream.read()) for name, stream in iter_members(bundle, category="raw")]
+    assert len(members) == 1 and members[0][0].endswith("x.uds.txt")
+    assert members[0][1] == LOG
+
+
+def test_engine_reads_bundle_like_the_log(tmp_path, monkeypatch):
+    profile = get_profile("UPP")
+    monkeypatch.setattr(profile, "logs_folder", tmp_path / "Logs")
+    engine = ProjectEngine(profile)
+    logger = logging.getLogger("test_result_bundle")
+    bundle, log = _bundle(tmp_path)
+
+    from_bundle = engine.process_uds_bundle(bundle, logger)
+    from_file = engine.process_uds_file(log, logger)
+    assert [s[0] for s in from_bundle] == ["Standard_Identifiers", "Network_Missmatch_F1D3"]
+    assert [[f.line for f in s[1]] for s in from_bundle] == [[f.line for f in s[1]] for s in from_file]
+    assert [[f.line for f in s[2]] for s in from_bundle] == [[f.line for f in s[2]] for s in from_file]
@@ -0,0 +1,76 @@
+# test_results_store.py
+"""Recording, committing and querying parse runs (results_store.py), with every connection closed."""
+import sqlite3
+import time
+from contextlib import closing
+
+import pytest
+
+from Project.Common import can_trace, results_store
+from Project.Common.results_store import ResultsRecorder, _main, connect, did_history, list_runs
+
+
+@pytest.fixture
+def opened(monkeypatch):
+    """Connections opened through connect(), to check they were closed."""
+    conns = []
+
+    def tracking_connect(db_path=results_store.DB_PATH):
+        conns.append(connect(db_path))
+        return conns[-1]
+
+    monkeypatch.setattr(results_store, "connect", tracking_connect)
+    monkeypatch.setattr(can_trace, "connect", tracking_connect)
+    return conns
+
+
+def _closed(conn):
+    try:
+        conn.execute("SELECT 1")
+    except sqlite3.ProgrammingError:
+        return True
+    return False
+
+
+def _commit(db, version, records, log_file="x.uds.txt"):
+    recorder = ResultsRecorder("UPP", log_file=log_file, db_path=db)
+    for script, did, condition, value, status in records:
+        recorder.record(script, did, condition, value, "", status)
+    recorder.set_version(version)
+    return recorder.commit()
+
+
+def test_commit_stores_the_run_and_closes(tmp_path, opened):
+    db = tmp_path / "results.db"
+    run_id = _commit(db, "03.02.00", [(("Std", 1), "F195", None, "03.02.00", "READ"),
+                                      ("Std", None, "Mode", 5, "FAIL")])
+    assert run_id == 1 and len(opened) == 1 and _closed(opened[0])
+    with closing(connect(db)) as conn:
+        runs = list_runs(conn, "UPP")
+        assert [(r["version"], r["records"], r["failures"]) for r in runs] == [("03.02.00", 2, 1)]
+        history = did_history(conn, "f195")
+        assert [(r["script"], r["value"], r["status"]) for r in history] == [("Std", "03.02.00", "READ")]
+        assert [r["did"] for r in conn.execute("SELECT did FROM records ORDER BY id")] == ["F195", "Unknown"]
+
+
+def test_nothing_recorded_writes_nothing(tmp_path, opened):
+    assert ResultsRecorder("UPP", db_path=tmp_path / "results.db").commit() is None
+    assert opened == []
+
+
+def test_changed_cli(tmp_path, capsys):
+    db = tmp_path / "results.db"
+    _commit(db, "03.02.00", [("Std", "F195", "", "03.02.00", "READ"), ("Std", "F18C", "", "SN1", "PASS")])
+    _commit(db, "03.02.02", [("Std", "F195", "", "03.02.02", "READ"), ("Std", "F18C", "", "SN1", "PASS")])
+    assert _main(["--db", str(db), "--device", "UPP", "changed", "03.02.00", "03.02.02"]) == 0
+    out = capsys.readouterr().out
+    assert "03.02.00 [READ]  ->  03.02.02 [READ]" in out and "1 difference(s)" in out
+    assert _main(["--db", str(db), "--device", "UPP", "changed", "03.02.00", "09.99"]) == 1
+
+
+def test_stored_failures_closes(tmp_path, opened):
+    db = tmp_path / "results.db"
+    since = time.time() - 1
+    _commit(db, "03.02.02", [("Std", "F195", "", "x", "READ"), ("Std", "F1D3", "", "", "NRC")])
+    assert can_trace.stored_failures("UPP", since, db_path=db) == [("Std", "F1D3", "NRC", None)]
+    assert len(opened) == 2 and all(_closed(c) for c in opened)
@@ -0,0 +1,84 @@
+# test_script_lint.py
+"""Lint findings and run-time estimate of .script files (script_lint.py)."""
+import pytest
+
+from Project.Common.profiles import PROFILES
+from Project.Common.script_lint import P2_TIMEOUT_MS, REQUEST_MS, _main, lint_script, lint_scripts, parse_bytes
+
+UPP = PROFILES["UPP"]
+FAULTS_LEN = 106  # data bytes of a Faults_Configuration 0x2E 078F write
+
+
+def _write(tmp_path, lines, name="Faults_Configuration.script"):
+    path = tmp_path / name
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return path
+
+
+def _write_2e(changed_byte, length=FAULTS_LEN):
+    payload = ["00"] * length
+    payload[changed_byte] = "64"
+    return "send 2E 078F " + " ".join(payload)
+
+
+def test_parse_bytes():
+    assert parse_bytes(" 2E 078F 00") == [0x2E, 0x07, 0x8F, 0x00]
+    assert parse_bytes('2E F199 "15"') == [0x2E, 0xF1, 0x99, 0x31, 0x35]
+    assert parse_bytes("22 F19") is None
+
+
+def test_bad_script_findings(tmp_path):
+    path = _write(tmp_path, [
+        "# comment",
+        "security 1",
+        "send 10 03",
+        "send 22 F1",
+        "send 11",
+        "sleep 10s",
+        "sleep 6000",
+        "linedelay 1500",
+        "tester maybe",
+        "flash app.hex",
+        "send 22 ZZ",
+        _write_2e(1, length=10),
+        _write_2e(0),
+        _write_2e(1),
+    ])
+    report = lint_script(path, UPP)
+    assert [(i.line_no, i.level) for i in report.issues] == [
+        (2, "WARN"),    # security before 10 03
+        (4, "ERROR"),   # half a DID
+        (5, "ERROR"),   # 11 without a reset type
+        (6, "ERROR"),   # sleep not in ms
+        (7, "WARN"),    # runaway sleep
+        (8, "WARN"),    # runaway linedelay
+        (9, "ERROR"),   # tester on/off
+        (10, "ERROR"),  # unknown command
+        (11, "ERROR"),  # bad hex
+        (12, "ERROR"),  # payload length does not match the condition table
+        (13, "WARN"),   # changed byte without a condition
+    ]
+    assert "expects 106" in report.issues[9].message
+    assert "byte 0, which has no condition" in report.issues[10].message
+
+
+def test_estimate(tmp_path):
+    path = _write(tmp_path, ["send 10 03", "security 1", "linedelay 200", "send 3E 80", "sleep 500", "send 22 F195"],
+                  name="Standard_Identifiers.script")
+    report, = lint_scripts([path], UPP, use_store=False)
+    assert not report.issues
+    assert (report.sends, report.security, report.suppressed) == (3, 1, 1)
+    assert report.total_seconds == pytest.approx((500 + 2 * 200 + 5 * REQUEST_MS + P2_TIMEOUT_MS) / 1000)
+
+
+def test_unknown_did_warns_for_identifier_scripts(tmp_path):
+    path = _write(tmp_path, ["send 22 F195 ABCD"], name="Standard_Identifiers.script")
+    report = lint_script(path, UPP)
+    assert [str(i) for i in report.warnings] == [
+        f"line 1: DID ABCD not in {UPP.generic_module}, will be reported as 'Unknown DID'"]
+
+
+@pytest.mark.parametrize("project", sorted(PROFILES))
+def test_repo_scripts_are_clean(project, capsys):
+    assert _main(["--project", project, "--no-store"]) == 0
+    assert "0 error(s)" in capsys.readouterr().out
@@ -0,0 +1,67 @@
+# test_session_state.py
+"""Skipping session / security / reset steps the previous script left in place (session_state.py)."""
+from session_state import DEFAULT_SESSION, EcuState, elide_script
+
+PREAMBLE = """tester on
+send 10 03
+security 1
+sleep 500
+send 11 03
+sleep 1000
+send 10 03
+security 1
+sleep 500
+"""
+READ = PREAMBLE + "send 22 F1 95\n"
+WRITE = PREAMBLE + "send 2E 01 03 01\nsend 22 01 03\n"
+
+
+def _script(tmp_path, name, text):
+    path = tmp_path / f"{name}.script"
+    path.write_text(text, encoding="utf-8")
+    return path
+
+
+def _after(tmp_path, previous):
+    state = EcuState()
+    elide_script(_script(tmp_path, "previous", previous), state)
+    return state
+
+
+def test_first_script_runs_unchanged(tmp_path):
+    state = EcuState()
+    lines, skips = elide_script(_script(tmp_path, "first", READ), state)
+    assert skips == [] and lines == READ.splitlines()
+    assert (state.session, state.security, state.clean) == (0x03, 1, True)
+
+
+def test_preamble_skipped_after_a_read_only_script(tmp_path):
+    state = _after(tmp_path, READ)
+    lines, skips = elide_script(_script(tmp_path, "next", READ), state)
+    assert [s.line_no for s in skips] == [2, 3, 4, 5, 6, 7, 8, 9]
+    assert lines[4] == "#[skipped: nothing written since the last reset] send 11 03"
+    assert lines[0] == "tester on" and lines[-1] == "send 22 F1 95"
+
+
+def test_reset_kept_after_a_write(tmp_path):
+    state = _after(tmp_path, WRITE)
+    assert not state.clean
+    lines, skips = elide_script(_script(tmp_path, "next", READ), state)
+    # Only the steps before the reset go; the reset and what follows it run
+    assert [s.line_no for s in skips] == [2, 3, 4]
+    assert lines[4:9] == PREAMBLE.splitlines()[4:9]
+    assert (state.session, state.security, state.clean) == (0x03, 1, True)
+
+
+def test_keep_resets(tmp_path):
+    state = _after(tmp_path, READ)
+    _, skips = elide_script(_script(tmp_path, "boot", READ), state, keep_resets=True)
+    assert [s.line_no for s in skips] == [2, 3, 4]
+
+
+def test_s3_timeout_without_tester_present(tmp_path):
+    state = _after(tmp_path, READ)
+    elide_script(_script(tmp_path, "idle", "sleep 6000\n"), state)
+    assert (state.session, state.security) == (DEFAULT_SESSION, None)
+    _, skips = elide_script(_script(tmp_path, "next", "send 10 03\nsecurity 1\n"), state)
+    assert skips == []
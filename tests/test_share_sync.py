@@ -0,0 +1,37 @@
+# test_share_sync.py
+"""Incremental share sync (share_sync.py) between two local folders."""
+from share_sync import file_sha256, sync_files, sync_tree
+
+
+def _tree(tmp_path):
+    src, dst = tmp_path / "src", tmp_path / "dst"
+    (src / "sub").mkdir(parents=True)
+    (src / "a.log").write_text("a" * 100)
+    (src / "sub" / "b.log").write_text("b" * 50)
+    return src, dst
+
+
+def test_second_sync_skips_unchanged(tmp_path):
+    src, dst = _tree(tmp_path)
+    assert sync_tree(src, dst, verbose=False)["copied"] == 2
+    stats = sync_tree(src, dst, verbose=False)
+    assert (stats["copied"], stats["skipped"]) == (0, 2)
+
+
+def test_file_lost_on_share_is_copied_again(tmp_path):
+    src, dst = _tree(tmp_path)
+    sync_tree(src, dst, verbose=False)
+    (dst / "sub" / "b.log").unlink()
+    (dst / "a.log").write_text("a" * 10)              # truncated copy
+    stats = sync_tree(src, dst, verbose=False)
+    assert (stats["copied"], stats["skipped"]) == (2, 0)
+    assert file_sha256(dst / "sub" / "b.log") == file_sha256(src / "sub" / "b.log")
+    assert (dst / "a.log").read_text() == "a" * 100
+
+
+def test_vanished_source_counts_as_failed_and_keeps_manifest(tmp_path):
+    src, dst = _tree(tmp_path)
+    files = [src / "a.log", src / "gone.log", src / "sub" / "b.log"]
+    stats = sync_files(files, src, dst, verbose=False)
+    assert (stats["copied"], stats["failed"]) == (2, 1)
+    assert sync_tree(src, dst, verbose=False)["skipped"] == 2
@@ -0,0 +1,82 @@
+# test_sleep_optimizer.py
+"""Sleep sites and proposed sleeps from timing files (sleep_optimizer.py)."""
+from Project.Common.script_lint import parse_script
+from sleep_optimizer import (FLOOR_MS, MIN_RUNS, RESET_FLOOR_MS, STEP_DOWN, Exchange, analyse_script,
+                             sleep_sites, write_variant)
+
+SCRIPT = """# demo
+send 10 03
+sleep 500
+send 22 F195
+send 11 01
+sleep 2000
+send 10 03
+sleep 100
+"""
+
+
+def _script(tmp_path):
+    path = tmp_path / "Demo.script"
+    path.write_text(SCRIPT, encoding="utf-8")
+    return path
+
+
+def _timing(tmp_path, n, reset_answer="Rx) Diagnostic Session Control   : 0x03 0x00 0x32"):
+    lines = [
+        r">>> Script Start: C:\UDS\Project\UPP\Scripts\Demo.script",
+        "Tx) Diagnostic Session Control   : 0x03",
+        "Rx) Diagnostic Session Control   : 0x03 0x00 0x32",
+        "Tx) Read Data By Identifier      : 0xF1 0x95",
+        "Rx) Read Data By Identifier      : 0xF1 0x95 0x41",
+        "Tx) ECU Reset                    : 0x01",
+        "Rx) ECU Reset                    : 0x01",
+        "Tx) Diagnostic Session Control   : 0x03",
+        reset_answer,
+        "<<< Script End",
+    ]
+    stamps = [0, 10, 40, 540, 570, 580, 600, 2600, 2630, 2640]
+    path = tmp_path / f"run{n}.timing.txt"
+    path.write_text("".join(f"{ms}\t{line}\n" for ms, line in zip(stamps, lines)), encoding="utf-8")
+    return path
+
+
+def test_sleep_sites(tmp_path):
+    sites = sleep_sites(parse_script(_script(tmp_path)))
+    assert [(s.current, s.label, s.is_reset, nxt) for s, nxt in sites] == [
+        (500, "send 10 03", False, 2),
+        (2000, "send 11 01", True, 5),
+        (100, "send 10 03", False, None),
+    ]
+
+
+def test_proposal_from_single_observations(tmp_path):
+    site, _ = sleep_sites(parse_script(_script(tmp_path)))[0]
+    assert site.proposal() == (500, f"0/{MIN_RUNS} clean run(s)")
+    ok = Exchange(0, "Read Data By Identifier", [])
+    ok.end_ms, ok.outcome = 400, "ok"
+    # 350 ms slower than usual at a 200 ms gap: ready at ~550 ms, plus margin
+    site.observe(200, ok, typical=50)
+    assert site.proposal() == (830, "ECU not ready at 550 ms - raise")
+
+
+def test_clean_runs_step_down_and_busy_raises(tmp_path):
+    script = _script(tmp_path)
+    clean = [_timing(tmp_path, n) for n in range(MIN_RUNS)]
+    start, reset, tail = analyse_script(script, clean)
+    assert start.runs == MIN_RUNS and start.gaps_clean == [500] * MIN_RUNS
+    assert start.proposal()[0] == max(FLOOR_MS, int(500 * STEP_DOWN))
+    assert reset.proposal()[0] == max(RESET_FLOOR_MS, int(2000 * STEP_DOWN))
+    assert tail.runs == 0 and tail.proposal()[0] == 100
+
+    busy = _timing(tmp_path, MIN_RUNS, "Rx) Negative Response            : 0x10 0x22 NRC=Conditions Not Correct")
+    _, reset, _ = analyse_script(script, clean + [busy])
+    assert reset.lower_bound == 2000
+    assert reset.proposal() == (3000, "ECU not ready at 2000 ms - raise")
+
+
+def test_write_variant_only_changes_sleeps(tmp_path):
+    script = _script(tmp_path)
+    sites = analyse_script(script, [_timing(tmp_path, n) for n in range(MIN_RUNS)])
+    out = write_variant(script, sites, tmp_path / "variants" / "Scripts")
+    assert out.name == script.name
+    assert out.read_text(encoding="utf-8") == SCRIPT.replace("sleep 500", "sleep 350").replace("sleep 2000", "sleep 1400")
@@ -0,0 +1,77 @@
+# test_uds_pool.py
+"""ECU file loading and concurrent fleet reads of UdsPool over fake ECUs (uds_pool.py)."""
+import asyncio
+import json
+
+import pytest
+
+from Project.Common.profiles import PROFILES
+from Project.Common.uds_pool import UdsPool, _main, fake_targets, load_ecus
+from Project.Common.uds_session import NegativeResponse
+
+
+def _ecus_file(tmp_path, entries):
+    path = tmp_path / "ecus.json"
+    path.write_text(json.dumps(entries), encoding="utf-8")
+    return path
+
+
+def test_load_ecus_defaults_to_profile_ids(tmp_path):
+    targets = load_ecus(_ecus_file(tmp_path, [
+        {"name": "MCU_front", "device": "UPP", "channel": "PCAN_USBBUS1"},
+        {"name": "MCU_rear", "device": "UPP", "channel": "PCAN_USBBUS1", "tx_id": "0x7D1", "rx_id": "0x7D9"},
+        {"device": "NewGen", "channel": 2},
+    ]))
+    assert [(t.name, t.channel, t.tx_id, t.rx_id) for t in targets[:2]] == [
+        ("MCU_front", "PCAN_USBBUS1", *PROFILES["UPP"].can_ids),
+        ("MCU_rear", "PCAN_USBBUS1", 0x7D1, 0x7D9),
+    ]
+    ng = targets[2]
+    assert (ng.tx_id, ng.rx_id) == PROFILES["NewGen"].can_ids
+    assert ng.name == f"NewGen_{ng.tx_id:X}" and ng.channel == "2"
+
+
+@pytest.mark.parametrize("entries, message", [
+    ([], "non-empty JSON list"),
+    ([{"device": "UPP"}], "ECU #1 is missing: channel"),
+    ([{"device": "XYZ", "channel": "c"}], "unknown device 'XYZ'"),
+    ([{"name": "A", "device": "UPP", "channel": "c"}, {"name": "A", "device": "UPP", "channel": "c"}],
+     "duplicate ECU name"),
+])
+def test_load_ecus_rejects(tmp_path, entries, message):
+    with pytest.raises(ValueError, match=message):
+        load_ecus(_ecus_file(tmp_path, entries))
+
+
+def test_snapshot_runs_ecus_concurrently():
+    async def scenario():
+        async with UdsPool(fake_targets(6), fake=True) as pool:
+            await pool.change_session(0x03)
+            dids = await pool.read_dids([0xF195, 0xF18C, 0x1234])
+            return pool, dids
+
+    pool, dids = asyncio.run(scenario())
+    assert list(dids) == [f"FAKE{i}" for i in range(1, 7)]
+    assert dids["FAKE3"][0xF195] == b"03.02.02" and dids["FAKE3"][0xF18C] == b"SN007D3"
+    # One ECU failing a DID does not stop its other reads or the other ECUs
+    assert all(isinstance(r[0x1234], NegativeResponse) for r in dids.values())
+    # About as long as the slowest ECU, not the sum of all of them
+    assert pool.last_call_s < sum(pool.elapsed.values()) / 2
+    stats = pool.stats()
+    assert all(s["requests"] == 3 and s["min_ms"] <= s["median_ms"] <= s["max_ms"] for s in stats.values())
+
+
+def test_cli_fake_snapshot(tmp_path, capsys):
+    out = tmp_path / "snapshot.json"
+    assert _main(["--fake", "2", "--session", "03", "--read", "F195", "--dtc", "--out", str(out)]) == 0
+    snapshot = json.loads(out.read_text(encoding="utf-8"))
+    assert snapshot["dids"] == {"FAKE1": {"F195": "30 33 2E 30 32 2E 30 32"},
+                                "FAKE2": {"F195": "30 33 2E 30 32 2E 30 32"}}
+    assert snapshot["dtcs"] == {"FAKE1": {}, "FAKE2": {}}
+    assert set(snapshot["latency"]) == {"FAKE1", "FAKE2"}
+    assert "FAKE1: F195=03.02.02" in capsys.readouterr().out
+
+
+def test_cli_bad_ecus_file(tmp_path, capsys):
+    assert _main(["--ecus", str(_ecus_file(tmp_path, [{"device": "UPP"}]))]) == 1
+    assert "[ERROR] ECU #1 is missing: channel" in capsys.readouterr().out
@@ -0,0 +1,116 @@
+# test_uds_session.py
+"""Requests, 0x78 handling and the TesterPresent task of UdsSession against FakeEcu (uds_session.py)."""
+import asyncio
+import time
+
+import pytest
+
+from Project.Common.uds_session import TESTER_PRESENT, FakeEcu, NegativeResponse, UdsError, UdsSession
+
+
+class RecordingEcu(FakeEcu):
+    """FakeEcu that keeps the timeout of every recv, to see which of P2 / P2* was used."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.waits = []
+
+    def recv(self, timeout):
+        self.waits.append(timeout)
+        return super().recv(timeout)
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+def _tester_present(ecu, start=0.0, end=float("inf")):
+    return [t for t, payload in ecu.requests if payload == TESTER_PRESENT and start <= t <= end]
+
+
+def test_response_pending_waits_p2_star():
+    async def scenario():
+        ecu = RecordingEcu(pending=2)
+        async with UdsSession(ecu, keepalive_s=60, p2_s=0.1, p2_star_s=2.0) as uds:
+            data = await uds.read_did(0xF195)
+        return ecu, data, uds
+
+    ecu, data, uds = _run(scenario())
+    assert data == b"03.02.02"
+    assert ecu.waits == [0.1, 2.0, 2.0]
+    assert len(uds.latencies) == 1
+
+
+def test_response_pending_then_negative_response():
+    async def scenario():
+        async with UdsSession(RecordingEcu(pending=1), keepalive_s=60) as uds:
+            await uds.read_did(0x1234)
+
+    with pytest.raises(NegativeResponse, match="NRC 0x31") as e:
+        _run(scenario())
+    assert (e.value.sid, e.value.nrc) == (0x22, 0x31)
+
+
+def test_no_response_and_suppressed_requests():
+    async def scenario():
+        ecu = FakeEcu(reboot=60)
+        async with UdsSession(ecu, keepalive_s=60, p2_s=0.05) as uds:
+            assert await uds.request(b"\x10\x83") is None
+            assert uds.session == 0x03
+            await uds.request(b"\x11\x01")
+            await uds.read_did(0xF195)   # still booting
+
+    with pytest.raises(UdsError, match="No response from ECU to 22 F1 95"):
+        _run(scenario())
+
+
+def test_keepalive_holds_the_session_past_s3():
+    async def scenario(keepalive_s):
+        ecu = FakeEcu(s3=0.3)
+        async with UdsSession(ecu, keepalive_s=keepalive_s) as uds:
+            await uds.change_session(0x03)
+            await asyncio.sleep(0.5)
+            await uds.security_access(0x01, lambda seed: bytes(b ^ 0xFF for b in seed))
+        return ecu
+
+    assert _run(scenario(0.1)).unlocked == 0x01
+    with pytest.raises(NegativeResponse, match="0x27: NRC 0x7F"):
+        _run(scenario(60))
+
+
+def test_paused_sends_no_tester_present():
+    async def scenario():
+        ecu = FakeEcu()
+        async with UdsSession(ecu, keepalive_s=0.02) as uds:
+            await asyncio.sleep(0.1)
+            async with uds.paused():
+                start = time.monotonic()
+                await asyncio.sleep(0.2)
+                await uds.read_did(0xF195)
+                end = time.monotonic()
+            sent = uds.keepalive_sent
+            await asyncio.sleep(0.1)
+        return ecu, uds, start, end, sent
+
+    ecu, uds, start, end, sent = _run(scenario())
+    assert _tester_present(ecu, end=start)
+    assert _tester_present(ecu, start=start, end=end) == []
+    assert uds.keepalive_sent > sent and _tester_present(ecu, start=end)
+
+
+def test_reset_pauses_the_keepalive():
+    async def scenario():
+        ecu = FakeEcu(reboot=0.1)
+        async with UdsSession(ecu, keepalive_s=0.02) as uds:
+            await uds.change_session(0x03)
+            await uds.reset(wait_s=0.2)
+            back = time.monotonic()
+            session = uds.session
+            await asyncio.sleep(0.1)
+        return ecu, session, back
+
+    ecu, session, back = _run(scenario())
+    reset_at = next(t for t, payload in ecu.requests if payload[0] == 0x11)
+    assert session == 0x01
+    assert _tester_present(ecu, start=reset_at, end=back) == []
+    assert _tester_present(ecu, start=back)
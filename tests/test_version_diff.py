@@ -0,0 +1,53 @@
+# test_version_diff.py
+"""Results store queries (results_store.py) and the version diff built on them (version_diff.py)."""
+import pytest
+
+from Project.Common.results_store import ResultsRecorder, changed_between, connect
+from Project.Common.version_diff import diff_runs, previous_run_id
+
+
+def _run(db, version, records):
+    recorder = ResultsRecorder("UPP", version=version, db_path=db)
+    for script, did, value, status in records:
+        recorder.record(script, did, "", value, "", status)
+    return recorder.commit()
+
+
+@pytest.fixture
+def runs(tmp_path):
+    db = tmp_path / "results.db"
+    old = _run(db, "03.02.00", [("Std", "F195", "03.02.00", "READ"),
+                                ("Std", "F18C", "SN1", "PASS"),
+                                ("Std", "F1B0", "1", "FAIL"),
+                                ("Std", "F1D3", "5", "NRC"),
+                                ("Std", "F1D5", "7", "PASS"),
+                                ("Std", "F100", "x", "PASS")])
+    new = _run(db, "03.02.02", [("Std", "F195", "03.02.02", "READ"),
+                                ("Std", "F18C", "SN1", "NRC"),
+                                ("Std", "F1B0", "1", "PASS"),
+                                ("Std", "F1D3", "5", "NO_RESPONSE"),
+                                ("Std", "F1D5", "7", "READ"),
+                                ("Std", "F200", "y", "PASS")])
+    conn = connect(db)
+    yield conn, old, new
+    conn.close()
+
+
+def test_changed_between_lists_every_value_or_status_change(runs):
+    conn, _, _ = runs
+    dids = [key[1] for key, _, _ in changed_between(conn, "UPP", "03.02.00", "03.02.02")]
+    assert dids == ["F100", "F18C", "F195", "F1B0", "F1D3", "F1D5", "F200"]
+
+
+def test_changed_between_unknown_version(runs):
+    with pytest.raises(LookupError, match="03.09.99"):
+        changed_between(runs[0], "UPP", "03.02.00", "03.09.99")
+
+
+def test_diff_runs_classifies_the_store_changes(runs):
+    conn, old, new = runs
+    assert previous_run_id(conn, "UPP", new) == old
+    classes = {r["did"]: r["class"] for r in diff_runs(conn, old, new)}
+    # F1D3 (NRC -> NO_RESPONSE) and F1D5 (PASS -> READ) stay on the same side
+    assert classes == {"F18C": "newly_failing", "F1B0": "newly_passing", "F195": "value_changed",
+                       "F200": "new_did", "F100": "missing_did"}
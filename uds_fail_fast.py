@@ -0,0 +1,108 @@
+# uds_fail_fast.py
+"""
+Fail-fast policy for UdsClient_CL script batches.
+
+A dead or unpowered ECU answers every request with "No response from ECU",
+and the batch still walks through every script before anyone notices.
+FailFastMonitor looks at the client output line by line, counts consecutive
+timeouts and negative responses inside the current script section, and tells
+the runner to stop as soon as a threshold is crossed. The runner then kills the
+client and stores what was seen so far as a partial result.
+"""
+import json
+import re
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Defaults: consecutive events (no positive response in between) per section
+MAX_CONSECUTIVE_TIMEOUTS = 3
+MAX_CONSECUTIVE_NRCS = 10
+
+SCRIPT_START_RE = re.compile(r">>>\s*Script Start:?(.*)")
+SCRIPT_NAME_RE = re.compile(r"\\Scripts\\([^\\]+)\.script")
+TIMEOUT_RE = re.compile(r"No response from ECU", re.IGNORECASE)
+
+
+class FailFastMonitor:
+    def __init__(self, max_timeouts: int = MAX_CONSECUTIVE_TIMEOUTS,
+                 max_nrcs: int = MAX_CONSECUTIVE_NRCS):
+        self.max_timeouts = max_timeouts
+        self.max_nrcs = max_nrcs
+        self.current_script: Optional[str] = None
+        self.sections: List[Dict] = []
+        self.consecutive_timeouts = 0
+        self.consecutive_nrcs = 0
+        self.reason: Optional[str] = None
+
+    def _section(self) -> Dict:
+        if not self.sections or self.sections[-1]["ended"]:
+            self.sections.append({"script": self.current_script or "unknown", "tx": 0, "rx": 0,
+                                  "timeouts": 0, "nrcs": 0, "ended": False})
+        return self.sections[-1]
+
+    def feed(self, line: str) -> Optional[str]:
+        """Feed one output line; returns the abort reason once a threshold is crossed."""
+        if self.reason:
+            return self.reason
+        line = line.strip()
+
+        m = SCRIPT_START_RE.search(line)
+        if m:
+            if self.sections and not self.sections[-1]["ended"]:
+                self.sections[-1]["ended"] = True
+            name = SCRIPT_NAME_RE.search(line)
+            self.current_script = name.group(1) if name else m.group(1).strip() or "unknown"
+            self.consecutive_timeouts = self.consecutive_nrcs = 0
+            self._section()
+            return None
+
+        if "<<< Script End" in line:
+            if self.sections:
+                self.sections[-1]["ended"] = True
+            return None
+
+        if line.startswith("Tx)"):
+            self._section()["tx"] += 1
+        elif TIMEOUT_RE.search(line):
+            sec = self._section()
+            sec["timeouts"] += 1
+            self.consecutive_timeouts += 1
+            if self.consecutive_timeouts >= self.max_timeouts:
+                self.reason = (f"{self.consecutive_timeouts} consecutive 'No response from ECU' "
+                               f"in {sec['script']}")
+        elif line.startswith("Rx)"):
+            sec = self._section()
+            sec["rx"] += 1
+            if "Negative Response" in line or "NRC=" in line:
+                # 0x78 only means "wait", it is not a failure
+                if "Response Pending" in line:
+                    return None
+                sec["nrcs"] += 1
+                self.consecutive_nrcs += 1
+                self.consecutive_timeouts = 0
+                if self.consecutive_nrcs >= self.max_nrcs:
+                    self.reason = f"{self.consecutive_nrcs} consecutive negative responses in {sec['script']}"
+            else:
+                self.consecutive_timeouts = self.consecutive_nrcs = 0
+        return self.reason
+
+    def partial_result(self, scripts: List[Path]) -> Dict:
+        started = {s["script"] for s in self.sections}
+        return {
+            "aborted_at": datetime.now().isoformat(timespec="seconds"),
+            "reason": self.reason,
+            "sections": self.sections,
+            "not_started": [p.stem for p in scripts if p.stem not in started],
+        }
+
+    def write_partial_result(self, out_dir: Path, scripts: List[Path]) -> Optional[Path]:
+        path = Path(out_dir) / f"uds_partial_result_{datetime.now():%Y%m%d_%H%M%S}.json"
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(self.partial_result(scripts), f, indent=2)
+            return path
+        except OSError as e:
+            print(f"[WARN] Could not write partial result to {out_dir}: {e}")
+            return None
@@ -0,0 +1,255 @@
+# uds_shards.py
+"""
+Sharded execution of UDS .script files over several UdsClient_CL channels.
+
+The script list is split into one shard per channel, balanced by the
+historical run time of each script (longest-first greedy). Each shard runs as
+its own `UdsClient_CL.exe <channel> <device> /s ...` process, all in
+parallel. When they are done, the *.uds.txt logs they wrote are merged into one
+log (sections in the original script order), so the normal parser runs once
+over the whole batch.
+
+Per-script durations are measured from the '>>> Script Start' /
+'<<< Script End' markers in the client output and kept in
+script_durations.json, so the balancing improves with every run.
+"""
+import json
+import re
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from uds_fail_fast import FailFastMonitor
+
+# =========================
+# ======  CONFIG  =========
+# =========================
+
+DURATIONS_FILE = Path(__file__).resolve().parent / "script_durations.json"
+
+# Used for scripts that were never timed
+DEFAULT_SCRIPT_SECONDS = 120.0
+
+# Weight of the newest measurement in the running average
+EWMA_ALPHA = 0.5
+
+SCRIPT_NAME_RE = re.compile(r">>>\s*Script Start:?.*?([^\\/]+)\.script")
+
+_print_lock = threading.Lock()
+
+
+# =========================
+# ===  DURATION HISTORY ===
+# =========================
+
+def load_durations(path: Path = DURATIONS_FILE) -> Dict[str, float]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return {k: float(v) for k, v in json.load(f).items()}
+    except (OSError, ValueError):
+        return {}
+
+
+def save_durations(measured: Dict[str, float], path: Path = DURATIONS_FILE) -> None:
+    """Fold new measurements into the stored averages."""
+    if not measured:
+        return
+    history = load_durations(path)
+    for name, secs in measured.items():
+        old = history.get(name)
+        history[name] = round(secs if old is None else EWMA_ALPHA * secs + (1 - EWMA_ALPHA) * old, 2)
+    try:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(history, f, indent=2, sort_keys=True)
+    except OSError as e:
+        print(f"[WARN] Could not save script durations to {path}: {e}")
+
+
+class ScriptTimer:
+    """Feed client output lines; collects wall time per script section."""
+
+    def __init__(self):
+        self.durations: Dict[str, float] = {}
+        self._current: Optional[str] = None
+        self._start = 0.0
+
+    def feed(self, line: str) -> None:
+        now = time.monotonic()
+        m = SCRIPT_NAME_RE.search(line)
+        if m:
+            self._close(now)
+            self._current, self._start = m.group(1), now
+        elif "<<< Script End" in line:
+            self._close(now)
+
+    def _close(self, now: float) -> None:
+        if self._current:
+            self.durations[self._current] = self.durations.get(self._current, 0.0) + now - self._start
+            self._current = None
+
+
+# =========================
+# ======  PLANNING  =======
+# =========================
+
+def plan_shards(scripts: List[Path], n_shards: int,
+                durations: Optional[Dict[str, float]] = None) -> List[List[Path]]:
+    """
+    Longest-processing-time-first: give each script to the least loaded shard.
+    Inside a shard the original script order is kept.
+    """
+    durations = durations if durations is not None else load_durations()
+    n_shards = max(1, min(n_shards, len(scripts)))
+    order = {p: i for i, p in enumerate(scripts)}
+    cost = lambda p: durations.get(p.stem, DEFAULT_SCRIPT_SECONDS)
+
+    loads = [0.0] * n_shards
+    shards: List[List[Path]] = [[] for _ in range(n_shards)]
+    for p in sorted(scripts, key=cost, reverse=True):
+        i = loads.index(min(loads))
+        shards[i].append(p)
+        loads[i] += cost(p)
+    return [sorted(s, key=order.get) for s in shards]
+
+
+def estimate(shards: List[List[Path]], durations: Dict[str, float]) -> List[float]:
+    return [sum(durations.get(p.stem, DEFAULT_SCRIPT_SECONDS) for p in s) for s in shards]
+
+
+# =========================
+# ======  LOG MERGE  ======
+# =========================
+
+def split_log_sections(path: Path) -> List[Tuple[str, List[str]]]:
+    """Raw (script_name, lines) blocks from one *.uds.txt, markers included."""
+    sections: List[Tuple[str, List[str]]] = []
+    current: Optional[List[str]] = None
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            m = SCRIPT_NAME_RE.search(line)
+            if m:
+                current = [line]
+                sections.append((m.group(1), current))
+                continue
+            if current is not None:
+                current.append(line)
+                if "<<< Script End" in line:
+                    current = None
+    return sections
+
+
+def merge_logs(log_paths: List[Path], scripts: List[Path], out_path: Path) -> Path:
+    """Write one log containing every section, ordered like `scripts`."""
+    rank = {p.stem: i for i, p in enumerate(scripts)}
+    sections = []
+    for lp in log_paths:
+        sections.extend(split_log_sections(lp))
+    sections.sort(key=lambda s: rank.get(s[0], len(rank)))
+    with open(out_path, "w", encoding="utf-8") as f:
+        for _, lines in sections:
+            f.writelines(lines)
+            if lines and not lines[-1].endswith("\n"):
+                f.write("\n")
+    return out_path
+
+
+def find_new_logs(folder: Path, since: float, pattern: str = "*.uds.txt") -> List[Path]:
+    return sorted((p for p in folder.glob(pattern) if p.stat().st_mtime >= since),
+                  key=lambda p: p.stat().st_mtime)
+
+
+# =========================
+# ======  RUNNING  ========
+# =========================
+
+def _run_shard(exe: Path, cwd: Path, channel: str, device: str, shard: List[Path],
+               timeout_sec: int, monitor: FailFastMonitor, result: Dict) -> None:
+    args = [str(exe), channel, device, "/s"] + [str(p) for p in shard]
+    timer = ScriptTimer()
+    start = time.monotonic()
+    try:
+        proc = subprocess.Popen(
+            args, cwd=str(cwd), stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+            creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0),
+        )
+        killer = threading.Timer(timeout_sec, proc.kill)
+        killer.start()
+        try:
+            for line in proc.stdout:
+                timer.feed(line)
+                with _print_lock:
+                    sys.stdout.write(f"[ch{channel}] {line}")
+                reason = monitor.feed(line)
+                if reason:
+                    result["error"] = f"fail-fast: {reason}"
+                    proc.kill()
+                    break
+            rc = proc.wait()
+        finally:
+            killer.cancel()
+        if rc != 0 and not result.get("error"):
+            result["error"] = f"exit code {rc}"
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["durations"] = timer.durations
+    result["elapsed_s"] = round(time.monotonic() - start, 1)
+
+
+def run_sharded(scripts: List[Path], channels: List[str], device: str, exe: Path, cwd: Path,
+                logs_dir: Path, timeout_sec: int, max_timeouts: int = 3,
+                max_nrcs: int = 10,
+                prepare: Optional[Callable[[List[Path], str], List[Path]]] = None) -> Tuple[Path, List[str]]:
+    """
+    Run `scripts` over `channels` in parallel and merge the logs.
+    Each shard has its own fail-fast monitor; a dead bench only stops its shard.
+    `prepare(shard, channel)` may swap a shard's scripts for variants that
+    depend on the run order (session_state.py) before it starts.
+    Returns (merged log path, list of shard errors) so the sections that did run
+    can still be parsed before the caller fails the stage.
+    """
+    durations = load_durations()
+    shards = plan_shards(scripts, len(channels), durations)
+    print(f"\nSharding {len(scripts)} script(s) over {len(shards)} channel(s):")
+    for ch, shard, est in zip(channels, shards, estimate(shards, durations)):
+        print(f"  ch{ch} (~{int(est)}s): {', '.join(p.stem for p in shard)}")
+    if prepare:
+        shards = [prepare(shard, ch) for ch, shard in zip(channels, shards)]
+
+    since = time.time()
+    results = [{"channel": ch, "scripts": [p.stem for p in shard]} for ch, shard in zip(channels, shards)]
+    monitors = [FailFastMonitor(max_timeouts, max_nrcs) for _ in shards]
+    threads = [threading.Thread(target=_run_shard, args=(exe, cwd, ch, device, shard, timeout_sec, mon, res),
+                                name=f"shard-ch{ch}")
+               for ch, shard, mon, res in zip(channels, shards, monitors, results)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    measured: Dict[str, float] = {}
+    for res, shard, mon in zip(results, shards, monitors):
+        measured.update(res.get("durations", {}))
+        status = f"FAILED ({res['error']})" if res.get("error") else "OK"
+        print(f"[INFO] Shard ch{res['channel']}: {status} in {res.get('elapsed_s')}s")
+        if mon.reason:
+            partial = mon.write_partial_result(logs_dir, shard)
+            if partial:
+                print(f"[INFO] Partial result for ch{res['channel']} written to {partial}")
+    # Aborted shards would store misleading (short) durations
+    failed_scripts = {name for r in results if r.get("error") for name in r["scripts"]}
+    save_durations({k: v for k, v in measured.items() if k not in failed_scripts})
+
+    logs = find_new_logs(logs_dir, since)
+    if not logs:
+        raise RuntimeError(f"No new *.uds.txt logs found in {logs_dir} after the sharded run")
+    # Name it so it sorts/mtimes as the newest log: the parser picks the newest file
+    merged = merge_logs(logs, scripts, logs_dir / f"merged_{datetime.now():%Y%m%d_%H%M%S}.uds.txt")
+    print(f"[INFO] Merged {len(logs)} log(s) into {merged}")
+
+    errors = [f"ch{r['channel']}: {r['error']}" for r in results if r.get("error")]
+    return merged, errors
@@ -2,8 +2,15 @@ import os
 import sys
 import shutil
 import subprocess
+import time
 from pathlib import Path
 from typing import List
+from uds_fail_fast import FailFastMonitor
+from Project.Common.profiles import NEWGEN
+from Project.Common.script_lint import lint_scripts, print_reports
+from sleep_optimizer import TimingRecorder
+from Project.Common.did_batch import write_variants
+from Project.Common.can_trace import CanTrace, pcan_channel, stored_failures
 
 # =========================
 # ======  CONFIG  =========
@@ -38,6 +45,19 @@ SCRIPT = SOURCE_UDS / 'NewGen' / 'Scripts' / 'Standard_Identifiers.script'
 TIMEOUT_PER_SCRIPT = 500          # seconds for UdsClient_CL
 PARSER_TIMEOUT_SEC = 200          # seconds for ng.py
 
+# Read the identifiers with multi-DID 0x22 requests (Project/Common/did_batch.py):
+# UDS_BATCH_READS=1
+USE_BATCH_READS = os.environ.get("UDS_BATCH_READS") == "1"
+
+# Keep a CAN trace ring buffer of the channel while the script runs and dump it to
+# Logs/Traces around every request the parser flags (Project/Common/can_trace.py); UDS_CAN_TRACE=0 turns it off
+CAN_TRACE = os.environ.get("UDS_CAN_TRACE", "1") == "1"
+
+# Fail-fast: kill the client after this many consecutive timeouts / NRCs in a script
+FAIL_FAST_MAX_TIMEOUTS = 3
+FAIL_FAST_MAX_NRCS = 10
+PARTIAL_RESULT_DIR = Path(r"C:\temp3")
+
 # =========================
 # =====  UTILITIES  =======
 # =========================
@@ -80,16 +100,31 @@ def run_one_script(script_path: Path):
         text=True,
         creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0)  # safe on *nix too
     )
+    monitor = FailFastMonitor(FAIL_FAST_MAX_TIMEOUTS, FAIL_FAST_MAX_NRCS)
+    # Arrival time of every line, for sleep_optimizer.py
+    timing = TimingRecorder(DEVICE.lower())
     try:
         assert proc.stdout is not None
         for line in proc.stdout:
             sys.stdout.write(line)
+            timing.feed(line)
+            reason = monitor.feed(line)
+            if reason:
+                print(f"\n[ERROR] Fail-fast: {reason} – stopping UdsClient_CL")
+                proc.kill()
+                proc.wait()
+                partial = monitor.write_partial_result(PARTIAL_RESULT_DIR, [script_path])
+                if partial:
+                    print(f"[INFO] Partial result written to {partial}")
+                raise RuntimeError(f"UDS script aborted (fail-fast): {reason}")
         rc = proc.wait(timeout=TIMEOUT_PER_SCRIPT)
         if rc != 0:
             raise subprocess.CalledProcessError(rc, args)
     except subprocess.TimeoutExpired:
         proc.kill()
         raise RuntimeError(f"Timed out after {TIMEOUT_PER_SCRIPT}s: {script_path}")
+    finally:
+        timing.close()
 
 def run_parser_for(script_path: Path):
     """Run ng.py after script, with its own timeout."""
@@ -160,11 +195,29 @@ def main():
     if not SCRIPT.is_file():
         raise FileNotFoundError(f"Missing .script file: {SCRIPT}")
 
+    script = write_variants([SCRIPT], NEWGEN).get(SCRIPT, SCRIPT) if USE_BATCH_READS else SCRIPT
+
+    reports = lint_scripts([script], NEWGEN)
+    print_reports(reports, TIMEOUT_PER_SCRIPT)
+    if any(r.errors for r in reports):
+        raise RuntimeError("Script lint failed, fix the errors above before running the bench.")
+
     # 3) Run UDS, then run parser
     print("[INFO] Starting UDS script + parser for NewGen...")
-    run_one_script(SCRIPT)
-    print("[INFO] UDS script finished, starting parser...")
-    run_parser_for(SCRIPT)
+    trace = CanTrace.open(pcan_channel(CHANNEL), NEWGEN) if CAN_TRACE else None
+    try:
+        run_one_script(script)
+        print("[INFO] UDS script finished, starting parser...")
+        run_parser_for(script)
+    except RuntimeError:
+        # Fail-fast / timeout: nothing was parsed, keep the last seconds of traffic
+        if trace:
+            trace.dump_tail("aborted")
+        raise
+    finally:
+        if trace:
+            trace.dump_failures(stored_failures(NEWGEN.device, trace.opened), trace.opened, time.time())
+            trace.close()
 
     print("\n✅ All scripts executed and parsed.")
 
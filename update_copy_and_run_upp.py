@@ -4,6 +4,15 @@ import shutil
 import subprocess
 from pathlib import Path
 from typing import List
+from uds_fail_fast import FailFastMonitor
+from uds_shards import ScriptTimer, run_sharded, save_durations
+from Project.Common.profiles import UPP
+from Project.Common.script_lint import lint_scripts, print_reports
+from sleep_optimizer import TimingRecorder, variant_path
+from combined_writes import COMBINED_SCRIPTS, plan_script, run_bisection, variant_dir
+from Project.Common.did_batch import write_variants
+from session_state import elide_batch
+from Project.Common.can_trace import pcan_channel
 
 # =========================
 # ======  CONFIG  =========
@@ -32,6 +41,11 @@ EXE = TARGET_DIR / "UdsClient_CL.exe"          # tool exe
 CHANNEL = "51"
 DEVICE = "UPP"
 
+# Extra channels/benches with the same ECU: with more than one entry the script
+# list is sharded over them (balanced by script_durations.json) and the logs are
+# merged into one file before parsing. Override with UDS_CHANNELS=51,52
+CHANNELS: List[str] = [c.strip() for c in os.environ.get("UDS_CHANNELS", CHANNEL).split(",") if c.strip()]
+
 # List of scripts to run (full paths)
 SCRIPTS: List[Path] = [
     SOURCE_UDS / 'UPP' / 'Scripts' / 'Standard_Identifiers.script',
@@ -47,6 +61,22 @@ SCRIPTS: List[Path] = [
 
 ]
 
+# Run the sleep-optimized copies from sleep_optimizer.py (where they exist) instead
+# of the originals: UDS_SLEEP_VARIANTS=1
+USE_SLEEP_VARIANTS = os.environ.get("UDS_SLEEP_VARIANTS") == "1"
+
+# Run the parameter tables (combined_writes.COMBINED_SCRIPTS) as one 2E per DID,
+# bisecting only the groups that fail (UDS_COMBINED_WRITES=1)
+USE_COMBINED_WRITES = os.environ.get("UDS_COMBINED_WRITES") == "1"
+
+# Read the identifier scripts with multi-DID 0x22 requests (Project/Common/did_batch.py):
+# UDS_BATCH_READS=1
+USE_BATCH_READS = os.environ.get("UDS_BATCH_READS") == "1"
+
+# Skip session/security/reset steps the previous script already left in place
+# (session_state.py), per shard when sharded: UDS_SESSION_ELISION=1
+USE_SESSION_ELISION = os.environ.get("UDS_SESSION_ELISION") == "1"
+
 # How long to allow the single “all scripts” run (seconds)
 TIMEOUT_SINGLE_RUN = 3600
 
@@ -55,6 +85,21 @@ PARSER_CMD = [
     "-m", "Project.UPP.upp"
 ]
 
+# Parse each script section while the batch is still running (upp.py --follow)
+LIVE_PARSE = True
+
+# The live parser keeps a CAN trace ring buffer of the channel and dumps it to
+# Logs/Traces around every failing request (Project/Common/can_trace.py); UDS_CAN_TRACE=0 turns it off
+CAN_TRACE = os.environ.get("UDS_CAN_TRACE", "1") == "1"
+
+# How long the live parser may take to finish after the batch ends (seconds)
+PARSER_DRAIN_TIMEOUT = 600
+
+# Fail-fast: kill the batch after this many consecutive timeouts / NRCs in a script
+FAIL_FAST_MAX_TIMEOUTS = 3
+FAIL_FAST_MAX_NRCS = 10
+PARTIAL_RESULT_DIR = Path(r"C:\temp3")
+
 # =========================
 # =====  UTILITIES  =======
 # =========================
@@ -85,8 +130,9 @@ def copy_all_files(src_dir: Path, dst_dir: Path) -> List[Path]:
         copied.append(target)
     return copied
 
-def run_all_together(scripts: List[Path], timeout_sec: int = TIMEOUT_SINGLE_RUN):
-    """Run UdsClient_CL once: UdsClient_CL.exe 51 UPP /s <script1> <script2> ..."""
+def run_all_together(scripts: List[Path], timeout_sec: int = TIMEOUT_SINGLE_RUN, record: bool = True):
+    """Run UdsClient_CL once: UdsClient_CL.exe 51 UPP /s <script1> <script2> ...
+    record=False keeps the run out of the duration history and uds_timing/."""
     args = [str(EXE), CHANNEL, DEVICE, "/s"] + [str(p) for p in scripts]
 
     print("\nRunning once with all scripts:")
@@ -102,21 +148,46 @@ def run_all_together(scripts: List[Path], timeout_sec: int = TIMEOUT_SINGLE_RUN)
         text=True,
         creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0)
     )
+    monitor = FailFastMonitor(FAIL_FAST_MAX_TIMEOUTS, FAIL_FAST_MAX_NRCS)
+    timer = ScriptTimer()
+    # Arrival time of every line, for sleep_optimizer.py
+    timing = TimingRecorder(DEVICE.lower()) if record else None
     try:
         assert proc.stdout is not None
         for line in proc.stdout:
             sys.stdout.write(line)
+            timer.feed(line)
+            if timing:
+                timing.feed(line)
+            reason = monitor.feed(line)
+            if reason:
+                print(f"\n[ERROR] Fail-fast: {reason} – stopping UdsClient_CL")
+                proc.kill()
+                proc.wait()
+                partial = monitor.write_partial_result(PARTIAL_RESULT_DIR, scripts)
+                if partial:
+                    print(f"[INFO] Partial result written to {partial}")
+                raise RuntimeError(f"UDS batch aborted (fail-fast): {reason}")
         rc = proc.wait(timeout=timeout_sec)
         if rc != 0:
             raise subprocess.CalledProcessError(rc, args)
     except subprocess.TimeoutExpired:
         proc.kill()
         raise RuntimeError(f"Timed out after {timeout_sec}s running ALL scripts")
-
-def run_parser_once():
-    """Run parser once after the UDS batch finishes.
-    Ensures both repo root and Project/UPP are in PYTHONPATH for imports."""
-    print("\n==> Launching parser …")
+    finally:
+        if timing:
+            timing.close()
+    # Complete runs feed the per-script history used to balance shards
+    if record:
+        save_durations(timer.durations)
+
+def run_bisection_round(scripts: List[Path]):
+    """Bisection re-runs only part of each script: their durations would drag the
+    shard/lint estimates down and their timing would skew sleep_optimizer."""
+    run_all_together(scripts, record=False)
+
+def parser_env() -> dict:
+    """Ensures both repo root and Project/UPP are in PYTHONPATH for imports."""
     env = os.environ.copy()
 
     add_paths = [
@@ -125,8 +196,54 @@ def run_parser_once():
     ]
     current_pp = env.get("PYTHONPATH", "")
     env["PYTHONPATH"] = os.pathsep.join([p for p in add_paths + [current_pp] if p])
+    return env
 
-    subprocess.run(PARSER_CMD, check=True, env=env, cwd=str(base_dir))
+def run_parser_once():
+    """Run parser once after the UDS batch finishes."""
+    print("\n==> Launching parser …")
+    subprocess.run(PARSER_CMD, check=True, env=parser_env(), cwd=str(base_dir))
+
+def start_live_parser() -> subprocess.Popen:
+    """Start the parser in --follow mode before the batch; it tails the new log
+    and analyses every script as soon as its '<<< Script End' is written."""
+    print("\n==> Launching live parser …")
+    trace = ["--trace", pcan_channel(CHANNEL)] if CAN_TRACE else []
+    return subprocess.Popen(
+        PARSER_CMD + ["--follow"] + trace,
+        stdin=subprocess.PIPE,
+        env=parser_env(),
+        cwd=str(base_dir),
+    )
+
+def finish_live_parser(proc: subprocess.Popen, timeout_sec: int = PARSER_DRAIN_TIMEOUT):
+    """Tell the live parser the batch is over (close its stdin) and wait for it."""
+    try:
+        if proc.stdin:
+            proc.stdin.close()
+        rc = proc.wait(timeout=timeout_sec)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        raise RuntimeError(f"Live parser did not finish within {timeout_sec}s after the batch")
+    if rc != 0:
+        raise subprocess.CalledProcessError(rc, proc.args)
+
+def stop_live_parser(proc: subprocess.Popen, timeout_sec: int = PARSER_DRAIN_TIMEOUT):
+    """After a failed batch: let the parser store what it has, kill it if it hangs.
+    Never raises, so the batch error is the one that fails the stage."""
+    try:
+        if proc.stdin:
+            proc.stdin.close()
+        rc = proc.wait(timeout=timeout_sec)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+        print(f"[WARN] Live parser killed, still running {timeout_sec}s after the failed batch")
+        return
+    except OSError as e:
+        print(f"[WARN] Could not stop the live parser: {e}")
+        return
+    if rc != 0:
+        print(f"[WARN] Live parser exited with {rc} after the failed batch")
 
 # =========================
 # ========= MAIN ==========
@@ -176,15 +293,63 @@ def main():
     if not EXE.is_file():
         raise FileNotFoundError(f"UdsClient not found: {EXE}")
 
-    missing = [str(s) for s in SCRIPTS if not s.is_file()]
+    scripts = SCRIPTS
+    if USE_SLEEP_VARIANTS:
+        scripts = [variant_path(s, DEVICE) if variant_path(s, DEVICE).is_file() else s for s in SCRIPTS]
+        print(f"[INFO] Sleep variants: {sum(s not in SCRIPTS for s in scripts)} of {len(SCRIPTS)} script(s)")
+
+    missing = [str(s) for s in scripts if not s.is_file()]
     if missing:
         raise FileNotFoundError("Missing .script file(s):\n  " + "\n  ".join(missing))
 
-    # 3) Run ALL scripts in a single UdsClient_CL call
-    run_all_together(SCRIPTS)
-
-    # 4) Run parser once after everything finished
-    run_parser_once()
+    plans = []
+    if USE_COMBINED_WRITES:
+        plans = [plan_script(s, UPP) for s in scripts if s.stem in COMBINED_SCRIPTS]
+        combined = {p.name: p.write(variant_dir(UPP.name)) for p in plans}
+        scripts = [combined.get(s.stem, s) for s in scripts]
+        for p in plans:
+            print(f"[INFO] Combined writes: {p.name} {sum(len(g) for g in p.groups)} parameter(s) "
+                  f"in {len(p.groups)} write(s)")
+
+    if USE_BATCH_READS:
+        batched = write_variants(scripts, UPP)
+        scripts = [batched.get(s, s) for s in scripts]
+
+    # Lint + run-time estimate, so a typo does not cost a whole bench run
+    reports = lint_scripts(scripts, UPP)
+    print_reports(reports, TIMEOUT_SINGLE_RUN)
+    if any(r.errors for r in reports):
+        raise RuntimeError("Script lint failed, fix the errors above before running the bench.")
+
+    if USE_SESSION_ELISION and len(CHANNELS) == 1:
+        scripts, _ = elide_batch(scripts, UPP)
+
+    # 3) Run ALL scripts in a single UdsClient_CL call (or sharded over CHANNELS)
+    # 4) Parse: live while the batch runs, or once after everything finished
+    if len(CHANNELS) > 1:
+        prepare = (lambda shard, ch: elide_batch(shard, UPP, tag=f"ch{ch}")[0]) if USE_SESSION_ELISION else None
+        _, errors = run_sharded(scripts, CHANNELS, DEVICE, EXE, TARGET_DIR, PARTIAL_RESULT_DIR,
+                                TIMEOUT_SINGLE_RUN, FAIL_FAST_MAX_TIMEOUTS, FAIL_FAST_MAX_NRCS,
+                                prepare=prepare)
+        # The merged log is the newest *.uds.txt, so a single parse covers every shard
+        run_parser_once()
+        if errors:
+            raise RuntimeError("Shard(s) failed: " + "; ".join(errors))
+    elif LIVE_PARSE:
+        parser = start_live_parser()
+        try:
+            run_all_together(scripts)
+        except BaseException:
+            stop_live_parser(parser)
+            raise
+        finish_live_parser(parser)
+    else:
+        run_all_together(scripts)
+        run_parser_once()
+
+    # 5) Combined writes that failed: re-run their groups in halves down to the failing parameters
+    if plans:
+        run_bisection(plans, UPP, run_bisection_round, run_parser_once)
 
     print("\n✅ All scripts executed and parsed.")
 